@@ -1,3 +1,4 @@
+import json
 import os
 from pathlib import Path
 
@@ -7,6 +8,57 @@ DB_PATH = os.getenv("DB_PATH", "data/context.db")
 # Ensure db directory exists
 Path(DB_PATH).parent.mkdir(exist_ok=True)
 
+# Write-behind interaction storage (SQLite); off by default so writes are synchronous
+MEMORY_WRITE_BEHIND = os.getenv("MEMORY_WRITE_BEHIND", "false").lower() in ("1", "true", "yes")
+MEMORY_WRITE_BATCH_SIZE = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "100"))
+MEMORY_WRITE_FLUSH_INTERVAL_MS = int(os.getenv("MEMORY_WRITE_FLUSH_INTERVAL_MS", "50"))
+MEMORY_WRITE_QUEUE_SIZE = int(os.getenv("MEMORY_WRITE_QUEUE_SIZE", "10000"))
+
+# Interaction retention: newest N per (user, module), optional max age; pruned in amortized sweeps.
+# RETENTION_MODULE_OVERRIDES is JSON, e.g. '{"creator": {"max_count": 10, "max_age_seconds": 86400}}'
+RETENTION_MAX_PER_MODULE = int(os.getenv("RETENTION_MAX_PER_MODULE", "5"))
+RETENTION_MAX_AGE_SECONDS = float(os.getenv("RETENTION_MAX_AGE_SECONDS", "0")) or None
+RETENTION_MODULE_OVERRIDES = json.loads(os.getenv("RETENTION_MODULE_OVERRIDES", "{}"))
+RETENTION_SWEEP_EVERY_WRITES = int(os.getenv("RETENTION_SWEEP_EVERY_WRITES", "100"))
+RETENTION_SWEEP_INTERVAL_SECONDS = float(os.getenv("RETENTION_SWEEP_INTERVAL_SECONDS", "60")) or None
+
+# Per-user recent-context cache in front of the memory adapter (per process); off by default.
+# Only writes from the same process invalidate it, so with several workers, or Mongo/Noopur
+# written elsewhere, reads can be up to CONTEXT_CACHE_TTL_SECONDS stale
+CONTEXT_CACHE_ENABLED = os.getenv("CONTEXT_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+CONTEXT_CACHE_MAX_USERS = int(os.getenv("CONTEXT_CACHE_MAX_USERS", "10000"))
+CONTEXT_CACHE_TTL_SECONDS = float(os.getenv("CONTEXT_CACHE_TTL_SECONDS", "30"))
+
+# Upper bound on requests per POST /core/batch
+CORE_BATCH_MAX_ITEMS = int(os.getenv("CORE_BATCH_MAX_ITEMS", "100"))
+
+# JSON encoder for stored interactions and structured logs: auto | orjson | msgspec | json
+# ("auto" uses orjson or msgspec when installed, else the standard library)
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+# Shared HTTP keep-alive pool for CreatorCore calls (one per process, shared by every BridgeClient).
+# CONNECTION_POOL_SIZE is the per-host connection limit; CONNECTION_POOL_HOSTS the number of host pools kept.
+CONNECTION_POOL_SIZE = int(os.getenv("CONNECTION_POOL_SIZE", "10"))
+CONNECTION_POOL_HOSTS = int(os.getenv("CONNECTION_POOL_HOSTS", "4"))
+# Async transport for BridgeClient *_async methods: auto | httpx | thread ("auto" uses httpx when installed)
+BRIDGE_ASYNC_TRANSPORT = os.getenv("BRIDGE_ASYNC_TRANSPORT", "auto")
+
+# BridgeClient circuit breaker (per endpoint): opens after N consecutive network/5xx failures,
+# fails fast for the cool-down, then lets HALF_OPEN_PROBES calls through to test recovery
+BRIDGE_BREAKER_FAILURE_THRESHOLD = int(os.getenv("BRIDGE_BREAKER_FAILURE_THRESHOLD", "5"))
+BRIDGE_BREAKER_COOLDOWN_SECONDS = float(os.getenv("BRIDGE_BREAKER_COOLDOWN_SECONDS", "30"))
+BRIDGE_BREAKER_HALF_OPEN_PROBES = int(os.getenv("BRIDGE_BREAKER_HALF_OPEN_PROBES", "1"))
+# Adaptive per-endpoint deadlines: percentile latency x multiplier, clamped to [min, client timeout]
+BRIDGE_ADAPTIVE_TIMEOUT = os.getenv("BRIDGE_ADAPTIVE_TIMEOUT", "true").lower() in ("1", "true", "yes")
+BRIDGE_TIMEOUT_PERCENTILE = float(os.getenv("BRIDGE_TIMEOUT_PERCENTILE", "99"))
+BRIDGE_TIMEOUT_MULTIPLIER = float(os.getenv("BRIDGE_TIMEOUT_MULTIPLIER", "3"))
+BRIDGE_TIMEOUT_MIN_SECONDS = float(os.getenv("BRIDGE_TIMEOUT_MIN_SECONDS", "0.25"))
+
+# Idempotent upstream GETs (history/context): concurrent identical calls share one fetch and
+# successful results are reused for this many seconds (0 = coalesce in-flight calls only)
+UPSTREAM_GET_CACHE_TTL_SECONDS = float(os.getenv("UPSTREAM_GET_CACHE_TTL_SECONDS", "2"))
+UPSTREAM_GET_CACHE_MAX_ENTRIES = int(os.getenv("UPSTREAM_GET_CACHE_MAX_ENTRIES", "256"))
+
 # Noopur integration
 NOOPUR_BASE_URL = os.getenv("NOOPUR_BASE_URL", "http://localhost:5001")
 # Toggle remote integration; set to "1" or "true" to enable
@@ -1,49 +1,39 @@
-from typing import Dict, Any, List
+import asyncio
+from typing import Dict, Any, List, Optional
 from src.utils.bridge_client import BridgeClient
 from config.config import INTEGRATOR_USE_NOOPUR
 
+# Key under which prewarm_and_prepare passes its /generate result to CreatorAgent
+PREWARM_GENERATION_KEY = "prewarm_generation"
+
 
 class CreatorRouter:
     """Routing helpers for CreatorCore flows (pre-prompt warming, feedback forwarding)."""
 
-    def __init__(self, memory_adapter=None):
+    def __init__(self, memory_adapter=None, bridge: Optional[BridgeClient] = None):
         self.memory = memory_adapter
         # BridgeClient is the canonical surface for CreatorCore communication
-        self.bridge = BridgeClient() if INTEGRATOR_USE_NOOPUR else None
+        if bridge is not None:
+            self.bridge = bridge
+        else:
+            self.bridge = BridgeClient() if INTEGRATOR_USE_NOOPUR else None
 
     def prewarm_and_prepare(self, request: str, user_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Fetch related context and history, attach to input_data."""
         try:
-            topic = input_data.get("topic") or input_data.get("data", {}).get("topic")
-            goal = input_data.get("goal") or input_data.get("data", {}).get("goal")
-            gen_type = input_data.get("type") or input_data.get("data", {}).get("type", "story")
+            topic, goal, gen_type = self._extract_fields(input_data)
 
             # Get history from external service for better context
             if self.bridge:
                 try:
-                    history_resp = self.bridge.history()
-                    if isinstance(history_resp, list):
-                        # Use recent history as additional context
-                        recent_history = history_resp[:5]  # Last 5 generations
-                        input_data.setdefault("recent_history", recent_history)
+                    self._attach_history(input_data, self.bridge.history())
                 except Exception:
                     pass
 
             # Generate with enhanced context
             if self.bridge and topic and goal:
                 payload = {"topic": topic, "goal": goal, "type": gen_type}
-                resp = self.bridge.generate(payload)
-                related = resp.get("related_context", [])
-                input_data.setdefault("related_context", related)
-                
-                # Store generation metadata to be deterministic at gateway level
-                if "generated_text" in resp or "generation_id" in resp:
-                    input_data.setdefault("generation_metadata", {
-                        "source": "external",
-                        "can_provide_feedback": True,
-                        "generation_id": resp.get("generation_id")
-                    })
-                return input_data
+                return self._attach_generation(input_data, self.bridge.generate(payload))
 
             # Fallback: use local memory adapter
             if self.memory and user_id:
@@ -55,6 +45,64 @@ class CreatorRouter:
 
         return input_data
 
+    async def prewarm_and_prepare_async(self, request: str, user_id: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of ``prewarm_and_prepare`` that never blocks the event loop."""
+        try:
+            topic, goal, gen_type = self._extract_fields(input_data)
+
+            if self.bridge:
+                try:
+                    self._attach_history(input_data, await self.bridge.history_async())
+                except Exception:
+                    pass
+
+            if self.bridge and topic and goal:
+                payload = {"topic": topic, "goal": goal, "type": gen_type}
+                return self._attach_generation(input_data, await self.bridge.generate_async(payload))
+
+            if self.memory and user_id:
+                if hasattr(self.memory, "get_context_async"):
+                    ctx = await self.memory.get_context_async(user_id, limit=3)
+                else:
+                    ctx = await asyncio.to_thread(self.memory.get_context, user_id, 3)
+                input_data.setdefault("related_context", ctx)
+
+        except Exception:
+            return input_data
+
+        return input_data
+
+    @staticmethod
+    def _extract_fields(input_data: Dict[str, Any]):
+        topic = input_data.get("topic") or input_data.get("data", {}).get("topic")
+        goal = input_data.get("goal") or input_data.get("data", {}).get("goal")
+        gen_type = input_data.get("type") or input_data.get("data", {}).get("type", "story")
+        return topic, goal, gen_type
+
+    @staticmethod
+    def _attach_history(input_data: Dict[str, Any], history_resp: Any) -> None:
+        if isinstance(history_resp, list):
+            # Use recent history as additional context
+            recent_history = history_resp[:5]  # Last 5 generations
+            input_data.setdefault("recent_history", recent_history)
+
+    @staticmethod
+    def _attach_generation(input_data: Dict[str, Any], resp: Dict[str, Any]) -> Dict[str, Any]:
+        related = resp.get("related_context", [])
+        input_data.setdefault("related_context", related)
+
+        # Hand the upstream result to CreatorAgent so it does not call /generate a second time
+        input_data[PREWARM_GENERATION_KEY] = resp
+
+        # Store generation metadata to be deterministic at gateway level
+        if "generated_text" in resp or "generation_id" in resp:
+            input_data.setdefault("generation_metadata", {
+                "source": "external",
+                "can_provide_feedback": True,
+                "generation_id": resp.get("generation_id")
+            })
+        return input_data
+
     def forward_feedback(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         # Normalize and forward to Noopur feedback endpoint
         if not self.bridge:
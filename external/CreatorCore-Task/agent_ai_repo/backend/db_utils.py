@@ -1,5 +1,6 @@
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 import json
 
@@ -20,9 +21,54 @@ except Exception as e:
 if db is not None:
     generations_collection = db["generations"]
     feedback_loops_collection = db["feedback_loops"]
+    # One document per topic: {"_id": topic, "seq": last iteration number}
+    counters_collection = db["iteration_counters"]
 else:
     generations_collection = None
     feedback_loops_collection = None
+    counters_collection = None
+
+GENERATION_INDEXES = [
+    ([("topic", 1), ("timestamp", -1)], "topic_timestamp"),   # get_latest / iteration seed $match
+]
+
+def ensure_indexes():
+    """
+    Create the indexes the queries below rely on (no-op if they already exist).
+    """
+    if db is None:
+        return
+    for keys, name in GENERATION_INDEXES:
+        generations_collection.create_index(keys, name=name)
+
+try:
+    ensure_indexes()
+except Exception as e:
+    print(f"Failed to create MongoDB indexes: {e}")
+
+def next_iteration(topic: str) -> int:
+    """
+    Atomically allocate the next iteration number for a topic.
+    The counter is seeded once from the highest iteration already stored for the topic;
+    afterwards every call is a single $inc, so concurrent inserts never share a number.
+    """
+    while True:
+        counter = counters_collection.find_one_and_update(
+            {"_id": topic}, {"$inc": {"seq": 1}}, return_document=ReturnDocument.AFTER
+        )
+        if counter is not None:
+            return counter["seq"]
+        # Iterations were stored as strings before counters existed, so compare them as numbers
+        seed = list(generations_collection.aggregate([
+            {"$match": {"topic": topic}},
+            {"$group": {"_id": None, "max": {"$max": {"$convert": {
+                "input": "$iteration", "to": "int", "onError": None, "onNull": None}}}}},
+        ]))
+        try:
+            counters_collection.insert_one({"_id": topic, "seq": (seed[0]["max"] or 0) if seed else 0})
+        except DuplicateKeyError:
+            pass  # another writer seeded it first; retry the $inc
+
 
 def insert_generation(data: dict):
     """
@@ -36,9 +82,7 @@ def insert_generation(data: dict):
         data["timestamp"] = datetime.utcnow().isoformat() + "Z"
     # Add iteration if not provided
     if "iteration" not in data:
-        # Get the latest iteration for this topic
-        latest = generations_collection.find_one({"topic": data["topic"]}, sort=[("iteration", -1)])
-        data["iteration"] = str(int(latest["iteration"]) + 1) if latest else "1"
+        data["iteration"] = next_iteration(data["topic"])
     result = generations_collection.insert_one(data)
     return str(result.inserted_id)
 
@@ -1,40 +1,115 @@
-from flask import Flask, request, jsonify
+import base64
+import binascii
+import json
+import os
+from datetime import datetime
+from flask import Flask, Response, request, jsonify, stream_with_context
+from sqlalchemy import and_, inspect, or_, text, type_coerce
 from models import db, Generation
-from sentence_transformers import SentenceTransformer
-import numpy as np
-from scipy.spatial.distance import cosine
-
-model = SentenceTransformer('all-MiniLM-L6-v2')
+from backend.vector_index import VectorIndex
+from backend.embedding_codec import encode_embedding, decode_embedding
+from backend.model_registry import EMBEDDING_WARMUP, require_model, warm_up
+from backend.embedding_cache import encode_texts
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///context_intelligence.db'
+if EMBEDDING_WARMUP:
+    warm_up()
+app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('SQLALCHEMY_DATABASE_URI', 'sqlite:///context_intelligence.db')
 db.init_app(app)
 
-with app.app_context():
+# Upper bound for GET /history?limit=
+MAX_HISTORY_LIMIT = 1000
+# Rows fetched from SQLite per round when /history streams without a limit
+HISTORY_STREAM_BATCH = 500
+# Upper bound on items per POST /feedback/batch
+MAX_FEEDBACK_BATCH = 500
+
+def ensure_schema():
+    """
+    Create tables, add the user_id and score_version columns and the indexes to databases created
+    before they existed,
+    and convert JSON embeddings to binary once (tracked with PRAGMA user_version).
+    """
     db.create_all()
+    columns = {c['name'] for c in inspect(db.engine).get_columns('generation')}
+    with db.engine.begin() as conn:
+        if 'user_id' not in columns:
+            conn.execute(text('ALTER TABLE generation ADD COLUMN user_id VARCHAR(128)'))
+        if 'score_version' not in columns:
+            conn.execute(text('ALTER TABLE generation ADD COLUMN score_version INTEGER'))
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_generation_created_at ON generation (created_at)'))
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_generation_user_created ON generation (user_id, created_at)'))
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_generation_missing_embedding ON generation (id) '
+                          'WHERE embedding IS NULL'))
+        conn.execute(text('CREATE INDEX IF NOT EXISTS ix_generation_score_version ON generation (score_version)'))
+        if conn.execute(text('PRAGMA user_version')).scalar() < 1:
+            convert_json_embeddings(conn)
+            conn.execute(text('PRAGMA user_version = 1'))
+
+def convert_json_embeddings(conn, batch_size=500):
+    """Rewrite embeddings stored as JSON text (schema version 0) in the packed binary format."""
+    last_id = 0
+    while True:
+        rows = conn.execute(text(
+            "SELECT id, embedding FROM generation WHERE id > :last_id AND typeof(embedding) = 'text' "
+            "ORDER BY id LIMIT :batch"), {"last_id": last_id, "batch": batch_size}).all()
+        if not rows:
+            return
+        updates = []
+        for row in rows:
+            vector = json.loads(row.embedding)  # JSON null becomes SQL NULL
+            updates.append({"id": row.id, "embedding": encode_embedding(vector) if vector is not None else None})
+        conn.execute(text('UPDATE generation SET embedding = :embedding WHERE id = :id'), updates)
+        last_id = rows[-1].id
+
+with app.app_context():
+    ensure_schema()
+
+# Related-context search index; see sync_related_index
+related_index = VectorIndex()
+_synced_id = 0
+_synced_score_version = 0
+
+def embedded_after_query(after_id):
+    """(id, embedding, score) of embedded generations with id > after_id, in id order."""
+    return (db.session.query(Generation.id, Generation.embedding, Generation.score)
+            .filter(Generation.embedding.isnot(None), Generation.id > after_id)
+            .order_by(Generation.id))
+
+def rescored_after_query(after_version):
+    """(id, score, score_version) of generations whose score changed after after_version, in version order."""
+    return (db.session.query(Generation.id, Generation.score, Generation.score_version)
+            .filter(Generation.score_version > after_version)
+            .order_by(Generation.score_version))
+
+def sync_related_index():
+    """
+    Index generations committed since the last sync and apply score changes made since then,
+    including those written by other workers.
+    """
+    global _synced_id, _synced_score_version
+    rows = embedded_after_query(_synced_id).all()
+    for gen_id, embedding, score in rows:
+        related_index.add(gen_id, decode_embedding(embedding), score)
+        _synced_id = gen_id
+    for gen_id, score, version in rescored_after_query(_synced_score_version):
+        related_index.update_score(gen_id, score)
+        _synced_score_version = version
+
+def encode_text(text):
+    """Embedding for one text; identical content is served from the embedding cache."""
+    return encode_texts(require_model(), [text], batch_size=1)[0]
 
 def get_related_context(text, top_k=3):
-    emb = model.encode(text)
-    gens = Generation.query.filter(Generation.embedding.isnot(None)).all()
-    if not gens:
+    emb = encode_text(text)
+    sync_related_index()
+    # 0.7 * cosine similarity + 0.3 * feedback score min-max normalised over all generations
+    hits = related_index.search(emb, top_k, sim_weight=0.7, score_weight=0.3, normalize_scores=True)
+    if not hits:
         return []
-    
-    # Normalize scores
-    scores = [g.score for g in gens]
-    min_score = min(scores) if scores else 0
-    max_score = max(scores) if scores else 1
-    if max_score == min_score:
-        norm_scores = [0.5] * len(scores)
-    else:
-        norm_scores = [(s - min_score) / (max_score - min_score) for s in scores]
-    
-    rankings = []
-    for i, g in enumerate(gens):
-        sim = 1 - cosine(emb, np.array(g.embedding))
-        ranking = 0.7 * sim + 0.3 * norm_scores[i]
-        rankings.append((g, ranking))
-    rankings.sort(key=lambda x: x[1], reverse=True)
-    return [{"text": g.text, "score": round(ranking, 3)} for g, ranking in rankings[:top_k]]
+    texts = dict(db.session.query(Generation.id, Generation.text)
+                 .filter(Generation.id.in_([gen_id for gen_id, _, _, _ in hits])))
+    return [{"text": texts.get(gen_id), "score": round(ranking, 3)} for gen_id, _, _, ranking in hits]
 
 @app.route('/generate', methods=['POST'])
 def generate():
@@ -44,10 +119,10 @@ def generate():
     generated_text = prompt + " generated content."
     
     # Generate embedding
-    emb = model.encode(generated_text).tolist()
+    emb = encode_embedding(encode_text(generated_text))
     
     # Save to DB
-    gen = Generation(text=generated_text, embedding=emb)
+    gen = Generation(text=generated_text, embedding=emb, user_id=data.get('user_id'))
     db.session.add(gen)
     db.session.commit()
     
@@ -60,34 +135,168 @@ def generate():
         "related_context": related_context
     })
 
+def parse_feedback_command(command):
+    """Score adjustment for a command such as "+2" or "-1", or None if it is not one."""
+    if not isinstance(command, str) or command[:1] not in ('+', '-'):
+        return None
+    try:
+        adjust = float(command[1:])
+    except ValueError:
+        return None
+    return adjust if command[0] == '+' else -adjust
+
+def apply_score_adjustments(adjustments):
+    """
+    Add each (generation_id, adjust) in one transaction with UPDATE ... SET score = score + ?,
+    so concurrent feedback never loses an update. Each changed row gets the next score_version
+    (writers are serialised by SQLite), which other workers' sync_related_index picks up.
+    Returns {generation_id: new score} for ids that exist.
+    """
+    db.session.execute(text('UPDATE generation SET score = coalesce(score, 0) + :adjust, '
+                            'score_version = (SELECT coalesce(max(score_version), 0) + 1 FROM generation) '
+                            'WHERE id = :id'),
+                       [{"id": gen_id, "adjust": adjust} for gen_id, adjust in adjustments])
+    ids = {gen_id for gen_id, _ in adjustments}
+    scores = dict(db.session.query(Generation.id, Generation.score).filter(Generation.id.in_(ids)))
+    db.session.commit()
+    for gen_id, score in scores.items():
+        related_index.update_score(gen_id, score)
+    return scores
+
 @app.route('/feedback', methods=['POST'])
 def feedback():
     data = request.json
-    gen_id = data.get('generation_id')
-    command = data.get('command')  # e.g. "+2", "-1"
-    
-    gen = Generation.query.get(gen_id)
-    if not gen:
-        return jsonify({"error": "Generation not found"}), 404
-    
-    # Parse command
-    if command.startswith('+'):
-        adjust = float(command[1:])
-    elif command.startswith('-'):
-        adjust = -float(command[1:])
-    else:
+    adjust = parse_feedback_command(data.get('command'))  # e.g. "+2", "-1"
+    if adjust is None:
         return jsonify({"error": "Invalid command"}), 400
-    
-    gen.score += adjust
-    db.session.commit()
-    
-    return jsonify({"message": "Feedback applied", "new_score": gen.score})
+    try:
+        gen_id = int(data.get('generation_id'))
+    except (TypeError, ValueError):
+        return jsonify({"error": "Generation not found"}), 404
+
+    scores = apply_score_adjustments([(gen_id, adjust)])
+    if gen_id not in scores:
+        return jsonify({"error": "Generation not found"}), 404
+
+    return jsonify({"message": "Feedback applied", "new_score": scores[gen_id]})
+
+@app.route('/feedback/batch', methods=['POST'])
+def feedback_batch():
+    """Apply {"items": [{"generation_id", "command"}, ...]} in one transaction; per-item results."""
+    data = request.json
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Missing items"}), 400
+    if len(items) > MAX_FEEDBACK_BATCH:
+        return jsonify({"error": f"At most {MAX_FEEDBACK_BATCH} items per batch"}), 400
+
+    adjustments = []
+    for item in items:
+        adjust = parse_feedback_command(item.get('command')) if isinstance(item, dict) else None
+        if adjust is None or not isinstance(item.get('generation_id'), int):
+            return jsonify({"error": "Each item needs an integer generation_id and a valid command"}), 400
+        adjustments.append((item['generation_id'], adjust))
+
+    scores = apply_score_adjustments(adjustments)
+    return jsonify({"results": [
+        {"generation_id": gen_id, "new_score": scores[gen_id]} if gen_id in scores
+        else {"generation_id": gen_id, "error": "Generation not found"}
+        for gen_id, _ in adjustments
+    ]})
+
+def history_query(user_id=None, since=None, before=None):
+    """
+    (id, text, score, created_at) of generations newest first, optionally for one user, created
+    after ``since``, and/or strictly after the (created_at, id) position ``before`` in that order.
+    """
+    # created_key is created_at exactly as stored, so cursors compare the same way the index orders
+    created_key = type_coerce(Generation.created_at, db.String)
+    query = db.session.query(Generation.id, Generation.text, Generation.score, Generation.created_at,
+                             created_key.label('created_key'))
+    if user_id:
+        query = query.filter(Generation.user_id == user_id)
+    if since:
+        query = query.filter(Generation.created_at > since)
+    if before:
+        key, gen_id = before
+        key = type_coerce(key, db.String)
+        query = query.filter(or_(created_key < key, and_(created_key == key, Generation.id < gen_id)))
+    return query.order_by(Generation.created_at.desc(), Generation.id.desc())
+
+def encode_history_cursor(row):
+    return base64.urlsafe_b64encode(f"{row.created_key}|{row.id}".encode()).decode()
+
+def decode_history_cursor(cursor):
+    """(stored created_at, id) from a cursor; ValueError if it is malformed."""
+    try:
+        key, gen_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return key, int(gen_id)
+    except (UnicodeError, ValueError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+def history_body(rows, ndjson):
+    """Serialise rows one at a time, as a JSON array or as newline-delimited JSON."""
+    if not ndjson:
+        yield "["
+    for i, row in enumerate(rows):
+        item = json.dumps({"id": row.id, "text": row.text, "score": row.score,
+                           "created_at": row.created_at.isoformat()})
+        if ndjson:
+            yield item + "\n"
+        else:
+            yield item if i == 0 else "," + item
+    if not ndjson:
+        yield "]"
 
 @app.route('/history', methods=['GET'])
 def history():
-    gens = Generation.query.order_by(Generation.created_at.desc()).all()
-    result = [{"id": g.id, "text": g.text, "score": g.score, "created_at": g.created_at.isoformat()} for g in gens]
-    return jsonify(result)
+    """
+    Newest first. Optional filters: user_id, since (ISO timestamp, exclusive) and limit.
+    With limit, X-Next-Cursor is set when more rows follow; pass it back as cursor for the next page.
+    Without limit every row is streamed from the database in HISTORY_STREAM_BATCH chunks.
+    format=ndjson (or Accept: application/x-ndjson) returns one JSON object per line.
+    """
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({"error": "Invalid since; use an ISO 8601 timestamp"}), 400
+
+    cursor = request.args.get('cursor')
+    before = None
+    if cursor:
+        try:
+            before = decode_history_cursor(cursor)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    query = history_query(user_id=request.args.get('user_id'), since=since, before=before)
+
+    limit = request.args.get('limit')
+    next_cursor = None
+    if limit is not None:
+        try:
+            limit = int(limit)
+        except ValueError:
+            return jsonify({"error": "Invalid limit"}), 400
+        if limit < 1:
+            return jsonify({"error": "Invalid limit"}), 400
+        limit = min(limit, MAX_HISTORY_LIMIT)
+        rows = query.limit(limit + 1).all()
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_history_cursor(rows[-1])
+    else:
+        rows = query.yield_per(HISTORY_STREAM_BATCH)
+
+    ndjson = request.args.get('format') == 'ndjson' or \
+        request.accept_mimetypes.best == 'application/x-ndjson'
+    response = Response(stream_with_context(history_body(rows, ndjson)),
+                        mimetype='application/x-ndjson' if ndjson else 'application/json')
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
 
 if __name__ == '__main__':
     app.run(debug=True, port=5001)
\ No newline at end of file
@@ -1,13 +1,22 @@
 from flask import Flask, request, jsonify
 import json
 from datetime import datetime
-from db_utils import insert_generation, get_latest, update_feedback
+from db_utils import insert_generation, get_latest, apply_feedback, apply_feedback_batch
 from prompts import story_prompt, ad_script_prompt, podcast_script_prompt
-from embeddings_utils import generate_embedding, store_embedding, find_similar_generations
+from embeddings_utils import generate_embedding, store_embedding, find_similar_generations, update_index_score
+from model_registry import EMBEDDING_WARMUP, MODEL_NAME, warm_up
+from embedding_cache import get_cache
+from bson import ObjectId
 import os
 
 app = Flask(__name__)   # <-- Flask app created here
 
+if EMBEDDING_WARMUP:
+    warm_up()
+
+# Upper bound on items per POST /feedback/batch
+MAX_FEEDBACK_BATCH = 500
+
 @app.route('/')
 def home():
     return "✅ CreatorCore Context Intelligence Backend is running successfully!"
@@ -106,13 +115,43 @@ def feedback():
     generation_id = data['id']
     feedback_text = data['feedback']
 
-    success = update_feedback(generation_id, feedback_text)
+    new_score = apply_feedback(generation_id, feedback_text)
 
-    if success:
-        return jsonify({"message": "Feedback updated successfully"})
+    if new_score is not None:
+        update_index_score(generation_id, new_score)
+        return jsonify({"message": "Feedback updated successfully", "feedback_score": new_score})
     else:
         return jsonify({"error": "Failed to update feedback"}), 500
 
+@app.route('/feedback/batch', methods=['POST'])
+def feedback_batch():
+    """
+    POST /feedback/batch
+    Applies many feedback items in one bulk write.
+    Expected JSON: {"items": [{"id": "string", "feedback": "string"}, ...]}
+    """
+    data = request.get_json()
+    items = data.get('items') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        return jsonify({"error": "Missing items"}), 400
+    if len(items) > MAX_FEEDBACK_BATCH:
+        return jsonify({"error": f"At most {MAX_FEEDBACK_BATCH} items per batch"}), 400
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('feedback'), str) \
+                or not ObjectId.is_valid(item.get('id')):
+            return jsonify({"error": "Each item needs a valid id and feedback"}), 400
+
+    scores = apply_feedback_batch(items)
+    results = []
+    for item, new_score in zip(items, scores):
+        generation_id = item['id']
+        if new_score is None:
+            results.append({"id": generation_id, "error": "Generation not found"})
+        else:
+            update_index_score(generation_id, new_score)
+            results.append({"id": generation_id, "feedback_score": new_score})
+    return jsonify({"results": results})
+
 @app.route('/history/<topic>', methods=['GET'])
 def history(topic):
     """
@@ -125,6 +164,14 @@ def history(topic):
     else:
         return jsonify({"error": "No generations found for this topic"}), 404
     
+@app.route('/stats/embedding-cache', methods=['GET'])
+def embedding_cache_stats():
+    """
+    GET /stats/embedding-cache
+    Hit/miss counters and hit rate of the embedding cache.
+    """
+    return jsonify(get_cache(MODEL_NAME).stats())
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5001, debug=True)
 
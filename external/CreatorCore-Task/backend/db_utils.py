@@ -1,5 +1,7 @@
 import os
-from pymongo import MongoClient
+import re
+from pymongo import MongoClient, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime
 import json
 
@@ -20,9 +22,57 @@ except Exception as e:
 if db is not None:
     generations_collection = db["generations"]
     feedback_loops_collection = db["feedback_loops"]
+    # One document per topic: {"_id": topic, "seq": last iteration number}
+    counters_collection = db["iteration_counters"]
 else:
     generations_collection = None
     feedback_loops_collection = None
+    counters_collection = None
+
+# Indexes for the hot access paths (see mongo_index_advisor.py). Lookups by _id, including the
+# embedding index sync ({"embedding": {"$exists": true}, "_id": {"$gt": ...}}), use the default _id index.
+GENERATION_INDEXES = [
+    ([("topic", 1), ("timestamp", -1)], "topic_timestamp"),   # get_latest / history by topic / iteration seed $match
+    ([("feedback_updated_at", 1)], "feedback_updated_at"),    # score changes for embeddings_utils.sync_index
+]
+
+def ensure_indexes():
+    """
+    Create the indexes the queries below rely on (no-op if they already exist).
+    """
+    if db is None:
+        return
+    for keys, name in GENERATION_INDEXES:
+        generations_collection.create_index(keys, name=name)
+
+try:
+    ensure_indexes()
+except Exception as e:
+    print(f"Failed to create MongoDB indexes: {e}")
+
+def next_iteration(topic: str) -> int:
+    """
+    Atomically allocate the next iteration number for a topic.
+    The counter is seeded once from the highest iteration already stored for the topic;
+    afterwards every call is a single $inc, so concurrent inserts never share a number.
+    """
+    while True:
+        counter = counters_collection.find_one_and_update(
+            {"_id": topic}, {"$inc": {"seq": 1}}, return_document=ReturnDocument.AFTER
+        )
+        if counter is not None:
+            return counter["seq"]
+        # Iterations were stored as strings before counters existed, so compare them as numbers
+        seed = list(generations_collection.aggregate([
+            {"$match": {"topic": topic}},
+            {"$group": {"_id": None, "max": {"$max": {"$convert": {
+                "input": "$iteration", "to": "int", "onError": None, "onNull": None}}}}},
+        ]))
+        try:
+            counters_collection.insert_one({"_id": topic, "seq": (seed[0]["max"] or 0) if seed else 0})
+        except DuplicateKeyError:
+            pass  # another writer seeded it first; retry the $inc
+
 
 def insert_generation(data: dict):
     """
@@ -36,12 +86,23 @@ def insert_generation(data: dict):
         data["timestamp"] = datetime.utcnow().isoformat() + "Z"
     # Add iteration if not provided
     if "iteration" not in data:
-        # Get the latest iteration for this topic
-        latest = generations_collection.find_one({"topic": data["topic"]}, sort=[("iteration", -1)])
-        data["iteration"] = str(int(latest["iteration"]) + 1) if latest else "1"
+        data["iteration"] = next_iteration(data["topic"])
     result = generations_collection.insert_one(data)
     return str(result.inserted_id)
 
+def convert_iterations() -> int:
+    """
+    Rewrite string iterations ("3") as numbers so they sort numerically. Safe to re-run.
+    """
+    if db is None:
+        return 0
+    result = generations_collection.update_many(
+        {"iteration": {"$type": "string"}},
+        [{"$set": {"iteration": {"$convert": {"input": "$iteration", "to": "int", "onError": "$iteration"}}}}]
+    )
+    print(f"Converted {result.modified_count} string iterations to numbers")
+    return result.modified_count
+
 def get_latest(topic: str):
     """
     Get the latest generation for a given topic.
@@ -54,41 +115,74 @@ def get_latest(topic: str):
         doc["_id"] = str(doc["_id"])
     return doc
 
-def update_feedback(id: str, feedback: str):
+# Scoring logic: each positive keyword present adds 0.5, each negative one subtracts 0.5
+POSITIVE_KEYWORDS = ["good", "great", "excellent", "amazing", "love", "like", "perfect", "awesome"]
+NEGATIVE_KEYWORDS = ["bad", "terrible", "awful", "hate", "dislike", "poor", "worst", "horrible"]
+_KEYWORD_WEIGHTS = {**{w: 0.5 for w in POSITIVE_KEYWORDS}, **{w: -0.5 for w in NEGATIVE_KEYWORDS}}
+# Longest first, so "dislike" is matched as itself rather than as "like"
+_KEYWORD_PATTERN = re.compile("|".join(sorted(map(re.escape, _KEYWORD_WEIGHTS), key=len, reverse=True)))
+
+def score_feedback(feedback: str) -> float:
     """
-    Update the feedback for a generation by its ID and calculate feedback score.
+    Score change for a feedback text, in one scan of the text. Each keyword counts once.
+    """
+    found = set(_KEYWORD_PATTERN.findall(feedback.lower()))
+    return sum(_KEYWORD_WEIGHTS[word] for word in found)
+
+def apply_feedback(id: str, feedback: str):
+    """
+    Store the feedback and add its score change in one atomic find_one_and_update.
+    feedback_updated_at (server time) lets other workers re-sync the score into their index.
+    Returns the new feedback score, or None if the generation does not exist.
     """
     if db is None:
         print(f"Mock update feedback for {id}: {feedback}")
-        return True
+        return score_feedback(feedback)
 
-    # Scoring logic: positive keywords increase score, negative decrease
-    positive_keywords = ["good", "great", "excellent", "amazing", "love", "like", "perfect", "awesome"]
-    negative_keywords = ["bad", "terrible", "awful", "hate", "dislike", "poor", "worst", "horrible"]
-
-    feedback_lower = feedback.lower()
-    score_change = 0
+    from bson import ObjectId
+    doc = generations_collection.find_one_and_update(
+        {"_id": ObjectId(id)},
+        {"$set": {"feedback": feedback}, "$inc": {"feedback_score": score_feedback(feedback)},
+         "$currentDate": {"feedback_updated_at": True}},
+        projection={"feedback_score": 1},
+        return_document=ReturnDocument.AFTER
+    )
+    return doc["feedback_score"] if doc else None
 
-    for word in positive_keywords:
-        if word in feedback_lower:
-            score_change += 0.5
+def update_feedback(id: str, feedback: str):
+    """
+    Update the feedback for a generation by its ID and calculate feedback score.
+    """
+    return apply_feedback(id, feedback) is not None
 
-    for word in negative_keywords:
-        if word in feedback_lower:
-            score_change -= 0.5
+def apply_feedback_batch(items: list) -> list:
+    """
+    Apply many {"id", "feedback"} items with one unordered bulk_write of atomic $inc updates,
+    then read the new scores back in one query. Repeated ids add up. Returns one entry per item,
+    in order: the generation's score after the batch, or None if it does not exist.
+    """
+    if db is None:
+        totals = {}
+        for item in items:
+            totals[item["id"]] = totals.get(item["id"], 0.0) + score_feedback(item["feedback"])
+        return [totals[item["id"]] for item in items]
+    if not items:
+        return []
 
     from bson import ObjectId
-    # Get current score
-    doc = generations_collection.find_one({"_id": ObjectId(id)})
-    current_score = doc.get("feedback_score", 0.0) if doc else 0.0
-
-    new_score = current_score + score_change
-
-    result = generations_collection.update_one(
-        {"_id": ObjectId(id)},
-        {"$set": {"feedback": feedback, "feedback_score": new_score}}
-    )
-    return result.modified_count > 0
+    from pymongo import UpdateOne
+    ids = [ObjectId(item["id"]) for item in items]
+    generations_collection.bulk_write([
+        UpdateOne({"_id": oid}, {"$set": {"feedback": item["feedback"]},
+                                 "$inc": {"feedback_score": score_feedback(item["feedback"])},
+                                 "$currentDate": {"feedback_updated_at": True}})
+        for oid, item in zip(ids, items)
+    ], ordered=False)
+    scores = {
+        str(doc["_id"]): doc.get("feedback_score", 0.0)
+        for doc in generations_collection.find({"_id": {"$in": ids}}, {"feedback_score": 1})
+    }
+    return [scores.get(item["id"]) for item in items]
 
 # Test functions with mock data
 if __name__ == "__main__":
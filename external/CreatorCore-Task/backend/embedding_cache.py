@@ -0,0 +1,142 @@
+"""
+Content-addressed cache in front of the embedding model.
+
+Keys are SHA-256 of the model id plus the normalised text (Unicode NFC,
+whitespace collapsed), so identical content costs one transformer forward pass
+per model. Two tiers: an in-memory LRU of ``EMBEDDING_CACHE_SIZE`` vectors and,
+when ``EMBEDDING_CACHE_PATH`` is set, an SQLite table of packed float32 vectors
+that survives restarts and is shared by workers on the same host.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from .embedding_codec import encode_embedding, decode_embedding
+    from .model_registry import MODEL_NAME
+except ImportError:  # run from backend/ with flat imports
+    from embedding_codec import encode_embedding, decode_embedding
+    from model_registry import MODEL_NAME
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+# Opt-in: unset or empty keeps the cache in memory only
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "")
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """Two-tier (memory LRU, optional SQLite) text -> vector cache. Thread-safe."""
+
+    def __init__(self, model_id: str, max_entries: int = EMBEDDING_CACHE_SIZE, path: str = None):
+        self.model_id = model_id
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vector BLOB NOT NULL)")
+            self._db.commit()
+
+    def key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.model_id}\0{normalize_text(text)}".encode("utf-8")).digest()
+
+    def encode(self, texts, compute, batch_size: int = 32):
+        """
+        Vectors for ``texts`` in order. ``compute(list_of_texts, batch_size)`` runs once,
+        for the distinct texts found in neither tier, and its results are cached.
+        """
+        keys = [self.key(text) for text in texts]
+        found = self._lookup(keys)
+        missing = OrderedDict()
+        for text, key in zip(texts, keys):
+            if key not in found:
+                missing.setdefault(key, text)
+        if missing:
+            vectors = compute(list(missing.values()), batch_size)
+            fresh = {key: np.asarray(vec, dtype=np.float32) for key, vec in zip(missing, vectors)}
+            self._store(fresh)
+            found.update(fresh)
+        return [found[key] for key in keys]
+
+    def stats(self):
+        with self._lock:
+            lookups = sum(self._stats.values())
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_enabled": self._db is not None,
+            }
+
+    def _lookup(self, keys):
+        found = {}
+        with self._lock:
+            for key in keys:
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vec
+            from_disk = set()
+            wanted = [key for key in dict.fromkeys(keys) if key not in found]
+            if wanted and self._db is not None:
+                placeholders = ",".join("?" * len(wanted))
+                for key, blob in self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", wanted):
+                    key = bytes(key)
+                    found[key] = decode_embedding(blob)
+                    from_disk.add(key)
+                    self._remember(key, found[key])
+            for key in keys:
+                if key not in found:
+                    self._stats["misses"] += 1
+                elif key in from_disk:
+                    self._stats["disk_hits"] += 1
+                else:
+                    self._stats["memory_hits"] += 1
+        return found
+
+    def _store(self, vectors):
+        with self._lock:
+            for key, vec in vectors.items():
+                self._remember(key, vec)
+            if self._db is not None:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                                     [(key, encode_embedding(vec, "float32")) for key, vec in vectors.items()])
+                self._db.commit()
+
+    def _remember(self, key, vec):
+        # Caller holds the lock
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(model_id: str) -> EmbeddingCache:
+    """The process-wide cache for ``model_id``."""
+    with _caches_lock:
+        if model_id not in _caches:
+            _caches[model_id] = EmbeddingCache(model_id, path=EMBEDDING_CACHE_PATH or None)
+        return _caches[model_id]
+
+
+def encode_texts(model, texts, batch_size: int = 32, model_id: str = MODEL_NAME):
+    """``model.encode`` for a list of texts, through the shared cache for ``model_id``."""
+    return get_cache(model_id).encode(
+        texts, lambda batch, size: model.encode(batch, batch_size=size), batch_size)
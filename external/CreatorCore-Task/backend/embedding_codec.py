@@ -0,0 +1,60 @@
+"""
+Compact binary encoding for embedding vectors.
+
+An encoded embedding is an 8-byte header followed by the raw vector:
+
+    byte 0     format (1 = float32, 2 = float16, 3 = int8)
+    bytes 1-3  reserved
+    bytes 4-7  little-endian float32 scale (int8 only; 1.0 otherwise)
+
+float32 and float16 decode with ``np.frombuffer`` (zero-copy, read-only); int8
+costs one multiply by the stored scale. A 384-dim MiniLM vector is 1544 bytes
+as float32, 776 as float16 and 392 as int8, versus roughly 8 KB of JSON text.
+
+``decode_embedding`` also accepts legacy JSON float lists so callers work
+before and after the stored data has been migrated.
+"""
+import os
+import struct
+
+import numpy as np
+
+# Default on-disk precision: float32 (lossless), float16 or int8
+EMBEDDING_DTYPE = os.getenv("EMBEDDING_DTYPE", "float32")
+
+_FORMATS = {"float32": 1, "float16": 2, "int8": 3}
+_DTYPES = {1: np.dtype("<f4"), 2: np.dtype("<f2"), 3: np.dtype("i1")}
+_HEADER = struct.Struct("<B3xf")
+
+
+def encode_embedding(vector, dtype=None) -> bytes:
+    """Pack a vector (list or array) as header + raw values."""
+    code = _FORMATS.get(dtype or EMBEDDING_DTYPE)
+    if code is None:
+        raise ValueError(f"Unsupported embedding dtype: {dtype or EMBEDDING_DTYPE}")
+    vec = np.asarray(vector, dtype=np.float32).ravel()
+    scale = 1.0
+    if code == 3:
+        peak = float(np.abs(vec).max()) if vec.size else 0.0
+        scale = peak / 127.0 if peak > 0 else 1.0
+        vec = np.round(vec / scale)
+    return _HEADER.pack(code, scale) + vec.astype(_DTYPES[code]).tobytes()
+
+
+def decode_embedding(value):
+    """Vector for a stored embedding (bytes or legacy JSON list); None stays None."""
+    if value is None:
+        return None
+    if isinstance(value, (list, tuple)):
+        return np.asarray(value, dtype=np.float32)
+    code, scale = _HEADER.unpack_from(value)
+    if code not in _DTYPES:
+        raise ValueError(f"Unknown embedding format: {code}")
+    vec = np.frombuffer(value, dtype=_DTYPES[code], offset=_HEADER.size)
+    if code == 3:
+        return vec.astype(np.float32) * np.float32(scale)
+    return vec
+
+
+def is_encoded(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview))
@@ -1,16 +1,14 @@
-try:
-    from sentence_transformers import SentenceTransformer
-    import numpy as np
-    model = SentenceTransformer('all-MiniLM-L6-v2')
-except Exception as e:
-    # If heavy dependencies aren't available, fall back to mock mode.
-    print(f"Embedding model unavailable, running in mock mode: {e}")
-    model = None
-    import numpy as np
-
+import numpy as np
 from pymongo import MongoClient
 import os
-from datetime import datetime
+import threading
+import time
+from datetime import datetime, timedelta
+from vector_index import VectorIndex
+from embedding_codec import encode_embedding, decode_embedding
+# The model loads on first use (see model_registry); if it can't be loaded, embeddings are mocked
+from model_registry import get_model
+from embedding_cache import encode_texts
 
 # MongoDB connection
 MONGO_URI = os.getenv("MONGO_URI", "mongodb://localhost:27017/")
@@ -26,31 +24,89 @@ except Exception as e:
     db = None
     generations_collection = None
 
+# Related-context search index, filled from MongoDB on first use and on every store_embedding
+vector_index = VectorIndex()
+_index_lock = threading.Lock()
+_index_last_id = None
+# Newest feedback_updated_at applied to the index. Score changes are re-read with this much
+# overlap, so an update stamped just before one we already saw is not missed.
+_scores_seen_at = None
+SCORE_SYNC_OVERLAP = timedelta(seconds=5)
+
 def generate_embedding(text: str) -> list:
     """
-    Generate embeddings for the given text.
+    Generate embeddings for the given text. Repeated content is served from the embedding cache.
     """
     if not text:
         return []
+    model = get_model()
     if model is None:
         # Return a deterministic mock embedding for testing (small vector)
         vec = [float(len(text) % 10)] * 8
         return vec
-    embedding = model.encode(text)
-    return embedding.tolist()
+    return encode_texts(model, [text], batch_size=1)[0].tolist()
+
+def generate_embeddings(texts: list, batch_size: int = 64) -> list:
+    """
+    Generate embeddings for many texts with one batched encode call.
+    """
+    model = get_model()
+    if model is None:
+        return [generate_embedding(text) for text in texts]
+    return encode_texts(model, texts, batch_size=batch_size)
 
 def store_embedding(generation_id: str, embedding: list):
     """
-    Store the embedding for a generation in the database.
+    Store the embedding for a generation in the database, packed by embedding_codec.
     """
     if db is None:
         print(f"Mock store embedding for {generation_id}")
         return
     from bson import ObjectId
-    generations_collection.update_one(
+    doc = generations_collection.find_one_and_update(
         {"_id": ObjectId(generation_id)},
-        {"$set": {"embedding": embedding, "embedding_updated": datetime.utcnow().isoformat() + "Z"}}
+        {"$set": {"embedding": encode_embedding(embedding), "embedding_updated": datetime.utcnow().isoformat() + "Z"}},
+        projection={"topic": 1, "feedback_score": 1}
     )
+    if doc is not None:
+        vector_index.add(generation_id, embedding, doc.get("feedback_score", 0.0), topic=doc.get("topic"))
+
+def sync_index():
+    """
+    Add generations with embeddings that this process has not indexed yet, then apply
+    feedback score changes made since the last sync. Only documents newer (by _id) than the
+    last one seen, and scores changed since the last feedback_updated_at seen, are read, so
+    this is cheap to call before every query and picks up writes made by other workers.
+    """
+    global _index_last_id, _scores_seen_at
+    if db is None:
+        return
+    with _index_lock:
+        query = {"embedding": {"$exists": True}}
+        if _index_last_id is not None:
+            query["_id"] = {"$gt": _index_last_id}
+        cursor = generations_collection.find(
+            query, {"embedding": 1, "feedback_score": 1, "topic": 1}
+        ).sort("_id", 1)
+        for doc in cursor:
+            vector_index.add(str(doc["_id"]), decode_embedding(doc["embedding"]), doc.get("feedback_score", 0.0),
+                             topic=doc.get("topic"))
+            _index_last_id = doc["_id"]
+
+        if _scores_seen_at is None:
+            query = {"feedback_updated_at": {"$exists": True}}
+        else:
+            query = {"feedback_updated_at": {"$gte": _scores_seen_at - SCORE_SYNC_OVERLAP}}
+        for doc in generations_collection.find(query, {"feedback_score": 1, "feedback_updated_at": 1}):
+            vector_index.update_score(str(doc["_id"]), doc.get("feedback_score", 0.0))
+            if _scores_seen_at is None or doc["feedback_updated_at"] > _scores_seen_at:
+                _scores_seen_at = doc["feedback_updated_at"]
+
+def update_index_score(generation_id: str, feedback_score: float):
+    """
+    Record a generation's new feedback score in the index after feedback changed it.
+    """
+    vector_index.update_score(generation_id, feedback_score)
 
 def cosine_similarity(vec1: list, vec2: list) -> float:
     """
@@ -70,56 +126,132 @@ def cosine_similarity(vec1: list, vec2: list) -> float:
 def find_similar_generations(query_embedding: list, topic: str = None, top_k: int = 3, score_weight: float = 0.0):
     """
     Find top-k similar generations based on embeddings, optionally filtered by topic.
-    Incorporates feedback score weighting.
+    Incorporates feedback score weighting. Ranking runs on the in-process vector index;
+    only the top-k documents are read back from MongoDB.
     """
     if db is None:
         return [{"topic": "Mock Topic", "output_text": "Mock similar content", "similarity": 0.8}]
 
-    # Build query
-    query = {"embedding": {"$exists": True}}
-    if topic:
-        query["topic"] = topic
-
-    # Get all matching documents
-    docs = list(generations_collection.find(query))
+    sync_index()
+    hits = vector_index.search(query_embedding, top_k, score_weight=score_weight, topic=topic)
+    if not hits:
+        return []
 
+    from bson import ObjectId
+    docs = {
+        str(doc["_id"]): doc
+        for doc in generations_collection.find(
+            {"_id": {"$in": [ObjectId(item_id) for item_id, _, _, _ in hits]}},
+            {"topic": 1, "output_text": 1}
+        )
+    }
     similarities = []
-    for doc in docs:
-        if "embedding" in doc:
-            sim = cosine_similarity(query_embedding, doc["embedding"])
-            score = doc.get("feedback_score", 0.0)
-            # Combine similarity and score (weighted)
-            combined_score = sim + (score * score_weight)
-            similarities.append({
-                "id": str(doc["_id"]),
-                "topic": doc.get("topic", ""),
-                "output_text": doc.get("output_text", ""),
-                "similarity": sim,
-                "feedback_score": score,
-                "combined_score": combined_score
-            })
-
-    # Sort by combined score and return top-k
-    similarities.sort(key=lambda x: x["combined_score"], reverse=True)
-    return similarities[:top_k]
-
-def backfill_embeddings():
+    for item_id, sim, score, combined_score in hits:
+        doc = docs.get(item_id, {})
+        similarities.append({
+            "id": item_id,
+            "topic": doc.get("topic", ""),
+            "output_text": doc.get("output_text", ""),
+            "similarity": sim,
+            "feedback_score": score,
+            "combined_score": combined_score
+        })
+    return similarities
+
+def convert_json_embeddings(batch_size: int = 500) -> int:
+    """
+    Rewrite embeddings still stored as JSON float arrays in the packed binary format.
+    Safe to re-run: only array-typed embeddings are touched.
+    """
+    if db is None:
+        print("Mock convert embeddings")
+        return 0
+    from pymongo import UpdateOne
+    cursor = generations_collection.find({"embedding": {"$type": "array"}}, {"embedding": 1})
+    converted = 0
+    batch = []
+    for doc in cursor:
+        batch.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"embedding": encode_embedding(doc["embedding"])}}))
+        if len(batch) >= batch_size:
+            generations_collection.bulk_write(batch, ordered=False)
+            converted += len(batch)
+            batch = []
+    if batch:
+        generations_collection.bulk_write(batch, ordered=False)
+        converted += len(batch)
+    print(f"Converted {converted} JSON embeddings to binary")
+    return converted
+
+def _read_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return None
+    from bson import ObjectId
+    with open(path) as f:
+        value = f.read().strip()
+    return ObjectId(value) if value else None
+
+def _write_checkpoint(path, last_id):
+    if not path:
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(str(last_id))
+    os.replace(tmp, path)
+
+def backfill_embeddings(batch_size: int = 64, checkpoint_path: str = None, progress_every: int = 1000) -> int:
     """
     Backfill embeddings for existing generations that don't have them.
+    Streams documents in _id order, encodes batch_size texts per model call and writes each
+    batch with one bulk_write. With checkpoint_path the last processed _id is saved after
+    every batch, and a re-run resumes after it.
     """
     if db is None:
         print("Mock backfill embeddings")
-        return
+        return 0
 
-    docs = generations_collection.find({"embedding": {"$exists": False}})
+    from pymongo import UpdateOne
+    query = {"embedding": {"$exists": False}}
+    last_id = _read_checkpoint(checkpoint_path)
+    if last_id is not None:
+        query["_id"] = {"$gt": last_id}
+        print(f"Resuming backfill after {last_id}")
+    cursor = generations_collection.find(query, {"output_text": 1}).sort("_id", 1).batch_size(batch_size)
+
+    started = time.monotonic()
     count = 0
-    for doc in docs:
-        text = doc.get("output_text", "")
-        if text:
-            embedding = generate_embedding(text)
-            store_embedding(str(doc["_id"]), embedding)
-            count += 1
-    print(f"Backfilled embeddings for {count} generations")
+    reported = 0
+    batch = []
+
+    def flush():
+        nonlocal count, reported
+        docs = [doc for doc in batch if doc.get("output_text")]
+        if docs:
+            embeddings = generate_embeddings([doc["output_text"] for doc in docs], batch_size=batch_size)
+            stamp = datetime.utcnow().isoformat() + "Z"
+            generations_collection.bulk_write([
+                UpdateOne({"_id": doc["_id"]},
+                          {"$set": {"embedding": encode_embedding(embedding), "embedding_updated": stamp}})
+                for doc, embedding in zip(docs, embeddings)
+            ], ordered=False)
+            count += len(docs)
+        _write_checkpoint(checkpoint_path, batch[-1]["_id"])
+        batch.clear()
+        if count - reported >= progress_every:
+            reported = count
+            elapsed = time.monotonic() - started
+            print(f"Backfilled {count} embeddings ({count / elapsed:.1f}/s)")
+
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    elapsed = time.monotonic() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Backfilled embeddings for {count} generations in {elapsed:.1f}s ({rate:.1f}/s)")
+    return count
 
 if __name__ == "__main__":
     # Test embedding generation
@@ -0,0 +1,163 @@
+"""
+Process-wide, lazily loaded embedding model.
+
+Importing this module is cheap: the SentenceTransformer is loaded on the first
+``get_model()`` call (or in the background by ``warm_up()``) and then shared by
+every module in the process. When ``EMBEDDING_WORKER`` is set, encodings are
+served instead by one worker process over a local socket, so web workers do not
+each hold a copy of the model:
+
+    EMBEDDING_WORKER=/tmp/creatorcore-embed.sock EMBEDDING_WORKER_KEY=... \\
+        python backend/model_registry.py serve
+
+``EMBEDDING_WORKER`` is a Unix socket path or ``host:port``; client and worker
+must share ``EMBEDDING_WORKER_KEY``.
+"""
+import os
+import sys
+import threading
+import time
+from multiprocessing.connection import Client, Listener
+
+MODEL_NAME = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_WORKER = os.getenv("EMBEDDING_WORKER")
+EMBEDDING_WORKER_KEY = os.getenv("EMBEDDING_WORKER_KEY")
+# Start loading the model in the background when the app starts
+EMBEDDING_WARMUP = os.getenv("EMBEDDING_WARMUP", "true").lower() in ("1", "true", "yes")
+# After a failed load, wait this long before trying again (worker restarting, package installed later)
+EMBEDDING_RETRY_SECONDS = float(os.getenv("EMBEDDING_RETRY_SECONDS", "30"))
+
+_lock = threading.Lock()
+_models = {}
+_errors = {}  # name -> (exception, time.monotonic() of the failed load)
+
+
+def _worker_address(value):
+    if ":" in value and not value.startswith("/"):
+        host, port = value.rsplit(":", 1)
+        return host, int(port)
+    return value
+
+
+def _worker_authkey():
+    if not EMBEDDING_WORKER_KEY:
+        raise ValueError("EMBEDDING_WORKER_KEY must be set to use an embedding worker")
+    return EMBEDDING_WORKER_KEY.encode()
+
+
+class RemoteModel:
+    """``encode()``-compatible proxy for a model served by ``serve()``."""
+
+    def __init__(self, address, authkey):
+        self.address = address
+        self.authkey = authkey
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        with self._lock:
+            for attempt in range(2):
+                try:
+                    if self._conn is None:
+                        self._conn = Client(self.address, authkey=self.authkey)
+                    self._conn.send(("encode", sentences, batch_size))
+                    status, result = self._conn.recv()
+                    break
+                except (OSError, EOFError):
+                    # Worker restarted or the connection went stale; reconnect once
+                    self._conn = None
+                    if attempt:
+                        raise
+        if status != "ok":
+            raise RuntimeError(f"Embedding worker error: {result}")
+        return result
+
+
+def _load(name):
+    if EMBEDDING_WORKER:
+        return RemoteModel(_worker_address(EMBEDDING_WORKER), _worker_authkey())
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(name)
+
+
+def get_model(name=MODEL_NAME):
+    """
+    Shared model instance, loaded on first use. Returns None when it cannot be
+    loaded (e.g. sentence-transformers missing); see ``load_error()``. A failed
+    load is retried once ``EMBEDDING_RETRY_SECONDS`` have passed.
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+    with _lock:
+        failed = _errors.get(name)
+        if name not in _models and (failed is None or time.monotonic() - failed[1] >= EMBEDDING_RETRY_SECONDS):
+            try:
+                _models[name] = _load(name)
+                _errors.pop(name, None)
+            except Exception as e:
+                print(f"Embedding model {name} unavailable: {e}")
+                _errors[name] = (e, time.monotonic())
+        return _models.get(name)
+
+
+def require_model(name=MODEL_NAME):
+    """Like ``get_model`` but raises RuntimeError when the model is unavailable."""
+    model = get_model(name)
+    if model is None:
+        raise RuntimeError(f"Embedding model {name} unavailable: {load_error(name)}")
+    return model
+
+
+def load_error(name=MODEL_NAME):
+    """The exception from the last failed load, or None."""
+    failed = _errors.get(name)
+    return failed[0] if failed else None
+
+
+def warm_up(name=MODEL_NAME):
+    """Load the model on a daemon thread so the first request does not pay for it."""
+    thread = threading.Thread(target=get_model, args=(name,), name="embedding-warm-up", daemon=True)
+    thread.start()
+    return thread
+
+
+def serve(address, authkey, name=MODEL_NAME, model=None):
+    """Run an embedding worker: one model, any number of local client connections."""
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(name)
+    encode_lock = threading.Lock()
+
+    def handle(conn):
+        with conn:
+            while True:
+                try:
+                    op, sentences, batch_size = conn.recv()
+                except EOFError:
+                    return
+                try:
+                    if op != "encode":
+                        raise ValueError(f"unknown operation {op!r}")
+                    with encode_lock:
+                        conn.send(("ok", model.encode(sentences, batch_size=batch_size)))
+                except Exception as e:
+                    conn.send(("error", str(e)))
+
+    with Listener(address, authkey=authkey) as listener:
+        print(f"Embedding worker serving {name} on {address}")
+        while True:
+            try:
+                conn = listener.accept()
+            except Exception as e:
+                # Failed handshake (wrong key, port scan); keep serving
+                print(f"Rejected embedding worker connection: {e}")
+                continue
+            threading.Thread(target=handle, args=(conn,), daemon=True).start()
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["serve"] or not EMBEDDING_WORKER:
+        sys.exit("usage: EMBEDDING_WORKER=<socket path|host:port> EMBEDDING_WORKER_KEY=<key> "
+                 "python model_registry.py serve")
+    serve(_worker_address(EMBEDDING_WORKER), _worker_authkey())
@@ -0,0 +1,65 @@
+"""
+Explain CreatorCore's hot MongoDB queries and report collection scans.
+
+    python mongo_index_advisor.py
+
+For each query the winning plan's stages, index and documents examined per
+document returned are printed. Exits with status 1 if any query falls back
+to a COLLSCAN; run ``db_utils.ensure_indexes()`` (done on app start) to fix.
+"""
+import sys
+from datetime import datetime, timedelta
+from bson import ObjectId
+from db_utils import db, generations_collection
+
+def hot_queries(topic, some_id):
+    """name -> (filter, sort) for the queries the API runs on every request."""
+    return {
+        "latest generation for a topic": ({"topic": topic}, [("timestamp", -1)]),
+        # $match stage of next_iteration's seed aggregate (runs once per topic, then counters take over)
+        "iteration seed for a topic": ({"topic": topic}, None),
+        "embedding index sync": ({"embedding": {"$exists": True}, "_id": {"$gt": some_id}}, [("_id", 1)]),
+        "embedding index score sync": ({"feedback_updated_at": {"$gte": datetime.utcnow() - timedelta(seconds=5)}}, None),
+        "generation by id": ({"_id": some_id}, None),
+    }
+
+def plan_stages(plan):
+    """Stage names of a winning plan, outermost first (with index names for IXSCAN)."""
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        stages.append(f"IXSCAN({plan['indexName']})" if stage == "IXSCAN" else stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return stages
+
+def explain(query, sort):
+    cursor = generations_collection.find(query).limit(1)
+    if sort:
+        cursor = cursor.sort(sort)
+    result = cursor.explain()
+    planner = result["queryPlanner"]
+    plan = planner["winningPlan"]
+    plan = plan.get("queryPlan", plan)  # slot-based engine wraps the classic plan
+    stats = result.get("executionStats", {})
+    return plan_stages(plan), stats.get("totalDocsExamined"), stats.get("nReturned")
+
+def main():
+    if db is None:
+        print("MongoDB unavailable; nothing to explain")
+        return 2
+    sample = generations_collection.find_one({}, {"topic": 1})
+    topic = sample.get("topic", "") if sample else ""
+    some_id = sample["_id"] if sample else ObjectId()
+    found = False
+    for name, (query, sort) in hot_queries(topic, some_id).items():
+        stages, examined, returned = explain(query, sort)
+        collscan = "COLLSCAN" in stages
+        found = found or collscan
+        print(f"{'!!' if collscan else 'ok'} {name}: {' <- '.join(stages)} "
+              f"(docs examined {examined}, returned {returned})")
+    if found:
+        print("Collection scans found; run db_utils.ensure_indexes() or add an index for these filters.")
+    return 1 if found else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import pytest
+pytest.importorskip("numpy")
+from bson import ObjectId
+import embeddings_utils
+from embedding_codec import decode_embedding
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[key]))
+
+    def batch_size(self, size):
+        return self
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = {doc["_id"]: doc for doc in docs}
+        self.bulk_calls = 0
+
+    def find(self, query, projection=None):
+        after = query.get("_id", {}).get("$gt")
+        return FakeCursor(dict(doc) for doc in self.docs.values()
+                          if "embedding" not in doc and (after is None or doc["_id"] > after))
+
+    def bulk_write(self, requests, ordered=True):
+        self.bulk_calls += 1
+        for request in requests:
+            self.docs[request._filter["_id"]].update(request._doc["$set"])
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    docs = [{"_id": ObjectId(), "output_text": f"text {i}" if i != 3 else ""} for i in range(10)]
+    fake = FakeCollection(docs)
+    monkeypatch.setattr(embeddings_utils, "db", object())
+    monkeypatch.setattr(embeddings_utils, "generations_collection", fake)
+    return fake
+
+
+def test_backfill_writes_in_batches(collection):
+    count = embeddings_utils.backfill_embeddings(batch_size=4)
+
+    assert count == 9
+    assert collection.bulk_calls == 3
+    embedded = [doc for doc in collection.docs.values() if "embedding" in doc]
+    assert len(embedded) == 9
+    assert len(decode_embedding(embedded[0]["embedding"])) > 0
+
+
+def test_backfill_resumes_from_checkpoint(collection, tmp_path):
+    checkpoint = str(tmp_path / "backfill.ckpt")
+    ids = sorted(collection.docs)
+    with open(checkpoint, "w") as f:
+        f.write(str(ids[5]))
+
+    count = embeddings_utils.backfill_embeddings(batch_size=4, checkpoint_path=checkpoint)
+
+    assert count == 4
+    assert all("embedding" not in collection.docs[i] for i in ids[:6])
+    assert open(checkpoint).read() == str(ids[-1])
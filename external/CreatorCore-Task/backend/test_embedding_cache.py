@@ -0,0 +1,47 @@
+import pytest
+np = pytest.importorskip("numpy")
+from embedding_cache import EmbeddingCache
+
+
+class CountingModel:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size):
+        self.calls.append(list(texts))
+        return [np.full(4, len(text), dtype=np.float32) for text in texts]
+
+
+def test_memory_tier_dedupes_and_counts_hits():
+    cache = EmbeddingCache("model-a", path=None)
+    compute = CountingModel()
+
+    first = cache.encode(["hello  world", "other", "hello world"], compute)
+    second = cache.encode([" hello world\n"], compute)
+
+    assert compute.calls == [["hello  world", "other"]]
+    assert np.array_equal(first[0], first[2]) and np.array_equal(second[0], first[0])
+    stats = cache.stats()
+    assert (stats["misses"], stats["memory_hits"]) == (3, 1)
+    assert stats["hit_rate"] == 0.25
+
+
+def test_disk_tier_survives_restart_and_model_is_part_of_key(tmp_path):
+    path = str(tmp_path / "cache.db")
+    compute = CountingModel()
+    EmbeddingCache("model-a", path=path).encode(["text"], compute)
+
+    reopened = EmbeddingCache("model-a", path=path)
+    assert reopened.encode(["text"], compute)[0].tolist() == [4.0] * 4
+    assert reopened.stats()["disk_hits"] == 1
+
+    EmbeddingCache("model-b", path=path).encode(["text"], compute)
+    assert len(compute.calls) == 2
+
+
+def test_lru_evicts_oldest():
+    cache = EmbeddingCache("model-a", max_entries=2, path=None)
+    compute = CountingModel()
+    cache.encode(["a", "b", "c"], compute)
+    cache.encode(["a"], compute)
+    assert compute.calls[-1] == ["a"]
@@ -0,0 +1,28 @@
+import pytest
+np = pytest.importorskip("numpy")
+from embedding_codec import encode_embedding, decode_embedding
+
+
+@pytest.mark.parametrize("dtype,size,tolerance", [("float32", 1544, 0), ("float16", 776, 1e-3), ("int8", 392, 2e-2)])
+def test_round_trip_and_size(dtype, size, tolerance):
+    vec = np.random.default_rng(0).normal(size=384).astype(np.float32)
+
+    blob = encode_embedding(vec, dtype)
+    decoded = decode_embedding(blob)
+
+    assert len(blob) == size
+    assert np.allclose(decoded, vec, atol=tolerance * float(np.abs(vec).max()))
+
+
+def test_float32_decodes_without_copy():
+    blob = encode_embedding([1.0, 2.0, 3.0], "float32")
+    decoded = decode_embedding(blob)
+    assert not decoded.flags["OWNDATA"]
+    assert decoded.tolist() == [1.0, 2.0, 3.0]
+
+
+def test_legacy_lists_and_none():
+    assert decode_embedding([0.5, 0.25]).dtype == np.float32
+    assert decode_embedding(None) is None
+    with pytest.raises(ValueError):
+        encode_embedding([1.0], "float64")
@@ -0,0 +1,72 @@
+import pytest
+from unittest.mock import Mock
+from bson import ObjectId
+import db_utils
+
+
+@pytest.mark.parametrize("text,expected", [
+    ("This is great work, I love it!", 1.0),
+    ("great great great", 0.5),
+    ("I dislike it", -0.5),
+    ("Terrible and AWFUL", -1.0),
+    ("no opinion", 0.0),
+])
+def test_score_feedback(text, expected):
+    assert db_utils.score_feedback(text) == expected
+
+
+def test_apply_feedback_is_one_atomic_update(monkeypatch):
+    collection = Mock()
+    collection.find_one_and_update.return_value = {"feedback_score": 1.5}
+    monkeypatch.setattr(db_utils, "db", object())
+    monkeypatch.setattr(db_utils, "generations_collection", collection)
+    oid = ObjectId()
+
+    assert db_utils.apply_feedback(str(oid), "Great!") == 1.5
+
+    collection.find_one.assert_not_called()
+    query, update = collection.find_one_and_update.call_args[0]
+    assert query == {"_id": oid}
+    assert update == {"$set": {"feedback": "Great!"}, "$inc": {"feedback_score": 0.5},
+                      "$currentDate": {"feedback_updated_at": True}}
+
+
+def test_apply_feedback_batch_uses_one_bulk_write(monkeypatch):
+    first, second = ObjectId(), ObjectId()
+    collection = Mock()
+    collection.find.return_value = [{"_id": first, "feedback_score": 2.0}]
+    monkeypatch.setattr(db_utils, "db", object())
+    monkeypatch.setattr(db_utils, "generations_collection", collection)
+
+    scores = db_utils.apply_feedback_batch([
+        {"id": str(first), "feedback": "amazing"},
+        {"id": str(second), "feedback": "bad"},
+    ])
+
+    assert collection.bulk_write.call_count == 1
+    assert len(collection.bulk_write.call_args[0][0]) == 2
+    assert scores == [2.0, None]
+
+
+def test_apply_feedback_batch_keeps_duplicate_items(monkeypatch):
+    oid = ObjectId()
+    collection = Mock()
+    collection.find.return_value = [{"_id": oid, "feedback_score": 1.0}]
+    monkeypatch.setattr(db_utils, "db", object())
+    monkeypatch.setattr(db_utils, "generations_collection", collection)
+
+    scores = db_utils.apply_feedback_batch([
+        {"id": str(oid), "feedback": "great"},
+        {"id": str(oid), "feedback": "love"},
+    ])
+
+    # Both $inc updates are sent; each item reports the score after the batch
+    assert len(collection.bulk_write.call_args[0][0]) == 2
+    assert scores == [1.0, 1.0]
+
+
+def test_apply_feedback_batch_mock_mode_adds_up_duplicates(monkeypatch):
+    monkeypatch.setattr(db_utils, "db", None)
+    assert db_utils.apply_feedback_batch([
+        {"id": "a", "feedback": "great"}, {"id": "b", "feedback": "bad"}, {"id": "a", "feedback": "love"},
+    ]) == [1.0, -0.5, 1.0]
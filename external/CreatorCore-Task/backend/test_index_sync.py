@@ -0,0 +1,59 @@
+import pytest
+pytest.importorskip("numpy")
+from datetime import datetime, timedelta
+from bson import ObjectId
+import embeddings_utils
+from embedding_codec import encode_embedding
+from vector_index import VectorIndex
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[key]))
+
+
+class FakeCollection:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        if "embedding" in query:
+            after = query.get("_id", {}).get("$gt")
+            return FakeCursor(dict(d) for d in self.docs if after is None or d["_id"] > after)
+        since = query["feedback_updated_at"].get("$gte")
+        return FakeCursor(dict(d) for d in self.docs if "feedback_updated_at" in d
+                          and (since is None or d["feedback_updated_at"] >= since))
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    docs = [{"_id": ObjectId(), "embedding": encode_embedding([1.0, float(i)]), "feedback_score": 0.0}
+            for i in range(3)]
+    fake = FakeCollection(docs)
+    monkeypatch.setattr(embeddings_utils, "db", object())
+    monkeypatch.setattr(embeddings_utils, "generations_collection", fake)
+    monkeypatch.setattr(embeddings_utils, "vector_index", VectorIndex())
+    monkeypatch.setattr(embeddings_utils, "_index_last_id", None)
+    monkeypatch.setattr(embeddings_utils, "_scores_seen_at", None)
+    return fake
+
+
+def scores():
+    hits = embeddings_utils.vector_index.search([1.0, 1.0], k=3)
+    return {item_id: score for item_id, _, score, _ in hits}
+
+
+def test_sync_applies_score_changes_from_other_workers(collection):
+    embeddings_utils.sync_index()
+    first, second, _ = collection.docs
+    now = datetime.utcnow()
+
+    # Feedback applied by another worker: only the documents change
+    first.update(feedback_score=2.0, feedback_updated_at=now)
+    embeddings_utils.sync_index()
+    assert scores()[str(first["_id"])] == 2.0
+
+    # A write stamped slightly earlier than one already seen is still picked up
+    second.update(feedback_score=-1.0, feedback_updated_at=now - timedelta(seconds=1))
+    embeddings_utils.sync_index()
+    assert scores()[str(second["_id"])] == -1.0
@@ -0,0 +1,65 @@
+import threading
+from unittest.mock import Mock
+import pytest
+from pymongo.errors import DuplicateKeyError
+import db_utils
+
+
+class FakeCounters:
+    """find_one_and_update/$inc and insert_one with _id uniqueness, like MongoDB."""
+
+    def __init__(self):
+        self.docs = {}
+        self.lock = threading.Lock()
+
+    def find_one_and_update(self, query, update, return_document=None):
+        with self.lock:
+            doc = self.docs.get(query["_id"])
+            if doc is None:
+                return None
+            doc["seq"] += update["$inc"]["seq"]
+            return dict(doc)
+
+    def insert_one(self, doc):
+        with self.lock:
+            if doc["_id"] in self.docs:
+                raise DuplicateKeyError("duplicate")
+            self.docs[doc["_id"]] = dict(doc)
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    generations = Mock()
+    generations.aggregate.return_value = [{"_id": None, "max": 9}]
+    generations.insert_one.return_value = Mock(inserted_id="x")
+    counters = FakeCounters()
+    monkeypatch.setattr(db_utils, "db", object())
+    monkeypatch.setattr(db_utils, "generations_collection", generations)
+    monkeypatch.setattr(db_utils, "counters_collection", counters)
+    return generations, counters
+
+
+def test_counter_is_seeded_from_existing_iterations(collections):
+    generations, _ = collections
+
+    assert db_utils.next_iteration("AI") == 10
+    assert db_utils.next_iteration("AI") == 11
+    assert generations.aggregate.call_count == 1
+
+
+def test_insert_generation_stores_numeric_iteration(collections):
+    generations, _ = collections
+    db_utils.insert_generation({"topic": "AI", "output_text": "x"})
+    assert generations.insert_one.call_args[0][0]["iteration"] == 10
+    generations.find_one.assert_not_called()
+
+
+def test_concurrent_writers_get_distinct_numbers(collections):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(db_utils.next_iteration("new")))
+               for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert sorted(results) == list(range(10, 30))
@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+import model_registry
+
+
+class FakeModel:
+    def encode(self, sentences, batch_size=32):
+        if isinstance(sentences, str):
+            return [float(len(sentences))]
+        return [[float(len(s))] for s in sentences]
+
+
+@pytest.fixture(autouse=True)
+def clean_registry(monkeypatch):
+    monkeypatch.setattr(model_registry, "_models", {})
+    monkeypatch.setattr(model_registry, "_errors", {})
+
+
+def test_model_loads_once_on_first_use(monkeypatch):
+    loads = []
+    monkeypatch.setattr(model_registry, "_load", lambda name: loads.append(name) or FakeModel())
+
+    threads = [threading.Thread(target=model_registry.get_model) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == [model_registry.MODEL_NAME]
+    assert model_registry.get_model() is model_registry.get_model()
+
+
+def test_unavailable_model_is_none_and_require_raises(monkeypatch):
+    def fail(name):
+        raise ImportError("no sentence_transformers")
+    monkeypatch.setattr(model_registry, "_load", fail)
+
+    assert model_registry.get_model() is None
+    assert isinstance(model_registry.load_error(), ImportError)
+    with pytest.raises(RuntimeError):
+        model_registry.require_model()
+
+
+def test_failed_load_is_retried_after_back_off(monkeypatch):
+    attempts = []
+
+    def flaky(name):
+        attempts.append(name)
+        if len(attempts) == 1:
+            raise OSError("embedding worker not up yet")
+        return FakeModel()
+    monkeypatch.setattr(model_registry, "_load", flaky)
+    monkeypatch.setattr(model_registry, "EMBEDDING_RETRY_SECONDS", 60)
+
+    assert model_registry.get_model() is None
+    assert model_registry.get_model() is None
+    assert len(attempts) == 1  # still backing off
+
+    monkeypatch.setattr(model_registry, "EMBEDDING_RETRY_SECONDS", 0)
+    assert isinstance(model_registry.get_model(), FakeModel)
+    assert model_registry.load_error() is None
+    assert len(attempts) == 2
+
+
+def test_remote_model_round_trip(tmp_path):
+    address = str(tmp_path / "embed.sock")
+    threading.Thread(target=model_registry.serve, args=(address, b"secret"),
+                     kwargs={"model": FakeModel()}, daemon=True).start()
+    remote = model_registry.RemoteModel(address, b"secret")
+
+    for _ in range(50):
+        try:
+            assert remote.encode("abc") == [3.0]
+            break
+        except (FileNotFoundError, ConnectionRefusedError):
+            time.sleep(0.05)
+    assert remote.encode(["a", "bb"], batch_size=2) == [[1.0], [2.0]]
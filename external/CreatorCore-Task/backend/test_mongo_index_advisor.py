@@ -0,0 +1,26 @@
+from unittest.mock import MagicMock
+import mongo_index_advisor
+
+
+def test_plan_stages_walks_nested_plan():
+    plan = {"stage": "LIMIT", "inputStage": {"stage": "FETCH", "inputStage": {
+        "stage": "IXSCAN", "indexName": "topic_timestamp"}}}
+    assert mongo_index_advisor.plan_stages(plan) == ["LIMIT", "FETCH", "IXSCAN(topic_timestamp)"]
+
+
+def test_main_flags_collection_scans(monkeypatch, capsys):
+    collection = MagicMock()
+    collection.find_one.return_value = {"_id": "x", "topic": "AI"}
+    collection.find.return_value.limit.return_value.sort.return_value.explain.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+        "executionStats": {"totalDocsExamined": 1000, "nReturned": 1},
+    }
+    collection.find.return_value.limit.return_value.explain.return_value = {
+        "queryPlanner": {"winningPlan": {"stage": "IDHACK"}}, "executionStats": {}}
+    monkeypatch.setattr(mongo_index_advisor, "db", object())
+    monkeypatch.setattr(mongo_index_advisor, "generations_collection", collection)
+
+    assert mongo_index_advisor.main() == 1
+    out = capsys.readouterr().out
+    assert "!! latest generation for a topic: SORT <- COLLSCAN (docs examined 1000, returned 1)" in out
+    assert "ok generation by id: IDHACK" in out
@@ -0,0 +1,98 @@
+import pytest
+np = pytest.importorskip("numpy")
+from vector_index import FlatIndex, VectorIndex
+
+
+def random_vectors(n, dim=16, seed=1):
+    return np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+
+
+def exact_top_k(vectors, query, k):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    sims = unit @ (query / np.linalg.norm(query))
+    return list(np.argsort(-sims)[:k])
+
+
+def test_exact_below_train_threshold():
+    vectors = random_vectors(50)
+    index = VectorIndex(train_threshold=1000)
+    for i, vec in enumerate(vectors):
+        index.add(i, vec.tolist())
+
+    hits = index.search(vectors[7], k=5)
+
+    assert not index.trained
+    assert [h[0] for h in hits] == exact_top_k(vectors, vectors[7], 5)
+    assert hits[0][1] == pytest.approx(1.0, abs=1e-5)
+
+
+def test_trained_index_finds_near_duplicates():
+    vectors = random_vectors(2000)
+    index = VectorIndex(train_threshold=500, nprobe=4)
+    for i, vec in enumerate(vectors):
+        index.add(i, vec)
+
+    assert index.trained
+    noise = random_vectors(20, seed=2) * 0.05
+    found = sum(index.search(vectors[i] + noise[i], k=1)[0][0] == i for i in range(20))
+    assert found >= 18
+
+
+def test_score_weighting_and_normalisation():
+    index = VectorIndex()
+    index.add("a", [1.0, 0.0], score=0.0)
+    index.add("b", [0.9, 0.1], score=10.0)
+
+    assert index.search([1.0, 0.0], k=1)[0][0] == "a"
+    assert index.search([1.0, 0.0], k=1, score_weight=0.1)[0][0] == "b"
+
+    hits = index.search([1.0, 0.0], k=2, sim_weight=0.7, score_weight=0.3, normalize_scores=True)
+    assert hits[0][0] == "b"
+    assert dict((h[0], h[3]) for h in hits)["a"] == pytest.approx(0.7)
+
+    index.update_score("a", 20.0)
+    assert index.search([1.0, 0.0], k=1, score_weight=0.1)[0][0] == "a"
+
+
+def test_topic_filter_falls_back_when_probed_lists_miss():
+    vectors = random_vectors(600)
+    index = VectorIndex(train_threshold=500, nprobe=1)
+    for i, vec in enumerate(vectors):
+        index.add(i, vec, topic="rare" if i == 3 else "common")
+
+    hits = index.search(-vectors[3], k=3, topic="rare")
+
+    assert [h[0] for h in hits] == [3]
+
+
+def test_add_replaces_existing_id_and_ignores_empty():
+    index = VectorIndex()
+    index.add(1, [1.0, 0.0])
+    index.add(1, [0.0, 1.0])
+    assert index.add(2, []) is False
+
+    assert len(index) == 1
+    assert index.search([0.0, 1.0], k=1)[0][1] == pytest.approx(1.0)
+    with pytest.raises(ValueError):
+        index.add(3, [1.0, 0.0, 0.0])
+
+
+def test_flat_index_grows_in_place_and_removes_by_swap():
+    flat = FlatIndex(dim=2, capacity=2)
+    for i in range(5):
+        flat.append(i, np.array([i, 1.0], dtype=np.float32), float(i), 0)
+
+    assert len(flat) == 5 and flat.vectors.flags["C_CONTIGUOUS"]
+    assert flat.remove(1) == 4
+    assert flat.ids == [0, 4, 2, 3]
+    assert list(flat.scores) == [0.0, 4.0, 2.0, 3.0]
+
+
+def test_exact_mode_matches_brute_force_at_any_size():
+    vectors = random_vectors(3000)
+    index = VectorIndex(train_threshold=None)
+    for i, vec in enumerate(vectors):
+        index.add(i, vec)
+
+    assert not index.trained
+    assert [h[0] for h in index.search(vectors[42], k=10)] == exact_top_k(vectors, vectors[42], 10)
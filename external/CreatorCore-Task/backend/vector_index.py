@@ -0,0 +1,300 @@
+"""
+In-process approximate nearest-neighbour index for generation embeddings.
+
+IVF (inverted file) over cosine similarity, NumPy only. Vectors are
+L2-normalised and filed under the nearest of ``nlist`` k-means centroids; a
+query scans only the ``nprobe`` closest lists, so it touches about
+nprobe/nlist of the corpus instead of all of it. Below ``train_threshold``
+vectors there is a single list and search is exact. Each list is a
+``FlatIndex``: one contiguous, pre-normalised float32 matrix, so scoring a
+list is a matrix-vector product and top-k is an ``argpartition``.
+
+Feedback scores are kept next to the vectors so ranking blends similarity and
+score in the same pass:
+
+    combined = sim_weight * cosine + score_weight * score
+
+where ``score`` is either the raw feedback score or, with
+``normalize_scores=True``, min-max normalised across the whole index.
+"""
+import threading
+
+import numpy as np
+
+
+def _normalize(vec):
+    vec = np.asarray(vec, dtype=np.float32).ravel()
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+def _top_k(values, k):
+    """Indices of the ``k`` largest values, largest first, without sorting the rest."""
+    if k < len(values):
+        candidates = np.argpartition(-values, k - 1)[:k]
+    else:
+        candidates = np.arange(len(values))
+    return candidates[np.argsort(-values[candidates], kind="stable")]
+
+
+class FlatIndex:
+    """
+    Exact storage for one list: a contiguous, pre-normalised float32 matrix with
+    parallel score and topic-code arrays. Rows are appended in place (capacity
+    doubles), so indexing a new generation never re-stacks the corpus, and all
+    similarities are a single matrix-vector product.
+    """
+
+    def __init__(self, dim, capacity=64):
+        self.dim = dim
+        self.ids = []
+        self._vectors = np.empty((capacity, dim), dtype=np.float32)
+        self._scores = np.empty(capacity, dtype=np.float64)
+        self._topics = np.empty(capacity, dtype=np.int32)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def vectors(self):
+        return self._vectors[:len(self.ids)]
+
+    @property
+    def scores(self):
+        return self._scores[:len(self.ids)]
+
+    @property
+    def topics(self):
+        return self._topics[:len(self.ids)]
+
+    def append(self, item_id, vec, score, topic_code):
+        row = len(self.ids)
+        if row == len(self._vectors):
+            self._grow()
+        self._vectors[row] = vec
+        self._scores[row] = score
+        self._topics[row] = topic_code
+        self.ids.append(item_id)
+        return row
+
+    def remove(self, row):
+        """Drop ``row`` by moving the last row into it; returns the moved id (or None)."""
+        last = len(self.ids) - 1
+        moved = None
+        if row != last:
+            self._vectors[row] = self._vectors[last]
+            self._scores[row] = self._scores[last]
+            self._topics[row] = self._topics[last]
+            self.ids[row] = moved = self.ids[last]
+        self.ids.pop()
+        return moved
+
+    def similarities(self, q):
+        return self.vectors @ q
+
+    def _grow(self):
+        capacity = 2 * len(self._vectors)
+        for name in ("_vectors", "_scores", "_topics"):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+
+class VectorIndex:
+    """Cosine top-k over (id, embedding, feedback score, topic) entries. Thread-safe.
+
+    ``train_threshold=None`` never trains, keeping search exact at any size.
+    """
+
+    def __init__(self, nlist=None, nprobe=8, train_threshold=1024, retrain_factor=4.0,
+                 kmeans_iterations=10, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_factor = retrain_factor
+        self.kmeans_iterations = kmeans_iterations
+        self.dim = None
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.RLock()
+        self._centroids = None
+        self._trained_size = 0
+        self._buckets = []
+        self._where = {}  # id -> (bucket, row)
+        self._topic_codes = {}  # topic -> small int stored per row
+        self._topic_counts = {}  # topic code -> entries
+        self._score_range = None
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, item_id):
+        return item_id in self._where
+
+    @property
+    def trained(self):
+        return self._centroids is not None
+
+    def add(self, item_id, embedding, score=0.0, topic=None):
+        """Insert or replace one entry. Empty embeddings are ignored (returns False)."""
+        if embedding is None or len(embedding) == 0:
+            return False
+        vec = _normalize(embedding)
+        with self._lock:
+            if self.dim is None:
+                self.dim = vec.shape[0]
+                self._buckets = [FlatIndex(self.dim)]
+            elif vec.shape[0] != self.dim:
+                raise ValueError(f"embedding has {vec.shape[0]} dimensions, index has {self.dim}")
+            if item_id in self._where:
+                self._remove(item_id)
+            code = self._topic_codes.setdefault(topic, len(self._topic_codes))
+            self._insert(item_id, vec, float(score or 0.0), code)
+            if self._needs_training():
+                self._train()
+        return True
+
+    def update_score(self, item_id, score):
+        """Set the feedback score of an indexed entry; unknown ids are ignored."""
+        with self._lock:
+            location = self._where.get(item_id)
+            if location is None:
+                return False
+            bucket, row = location
+            self._buckets[bucket].scores[row] = float(score or 0.0)
+            self._score_range = None
+            return True
+
+    def search(self, query, k=3, score_weight=0.0, sim_weight=1.0, normalize_scores=False,
+               topic=None, nprobe=None):
+        """Best ``k`` entries as ``(id, similarity, score, combined)``, highest combined first."""
+        if query is None or len(query) == 0 or k <= 0:
+            return []
+        q = _normalize(query)
+        with self._lock:
+            if not self._where:
+                return []
+            if q.shape[0] != self.dim:
+                raise ValueError(f"query has {q.shape[0]} dimensions, index has {self.dim}")
+            code = None
+            wanted = k
+            if topic is not None:
+                code = self._topic_codes.get(topic)
+                wanted = min(k, self._topic_counts.get(code, 0))
+                if wanted == 0:
+                    return []
+            low, span = self._score_scale(normalize_scores)
+            buckets = self._probe(q, nprobe or self.nprobe)
+            hits = self._scan(q, buckets, k, score_weight, sim_weight, low, span, code)
+            if len(hits) < wanted and len(buckets) < len(self._buckets):
+                # A selective topic filter can leave the probed lists short; fall back to exact
+                hits = self._scan(q, range(len(self._buckets)), k, score_weight, sim_weight, low, span, code)
+            return hits
+
+    # internals; callers hold the lock
+
+    def _insert(self, item_id, vec, score, code):
+        bucket = 0 if self._centroids is None else int(np.argmax(self._centroids @ vec))
+        row = self._buckets[bucket].append(item_id, vec, score, code)
+        self._where[item_id] = (bucket, row)
+        self._topic_counts[code] = self._topic_counts.get(code, 0) + 1
+        if self._score_range is not None:
+            low, high = self._score_range
+            self._score_range = (min(low, score), max(high, score))
+
+    def _remove(self, item_id):
+        bucket, row = self._where.pop(item_id)
+        code = int(self._buckets[bucket].topics[row])
+        moved = self._buckets[bucket].remove(row)
+        if moved is not None:
+            self._where[moved] = (bucket, row)
+        self._topic_counts[code] -= 1
+        self._score_range = None
+
+    def _needs_training(self):
+        size = len(self._where)
+        if self.train_threshold is None or size < self.train_threshold:
+            return False
+        return self._centroids is None or size >= self._trained_size * self.retrain_factor
+
+    def _train(self):
+        vectors = np.concatenate([bucket.vectors for bucket in self._buckets])
+        scores = np.concatenate([bucket.scores for bucket in self._buckets])
+        codes = np.concatenate([bucket.topics for bucket in self._buckets])
+        ids = [item_id for bucket in self._buckets for item_id in bucket.ids]
+        nlist = self.nlist or max(1, int(4 * np.sqrt(len(ids))))
+        self._centroids = self._kmeans(vectors, min(nlist, len(ids)))
+        self._trained_size = len(ids)
+        assignment = np.argmax(vectors @ self._centroids.T, axis=1)
+        self._buckets = []
+        self._where = {}
+        for c in range(len(self._centroids)):
+            rows = np.flatnonzero(assignment == c)
+            bucket = FlatIndex(self.dim, capacity=max(64, 2 * len(rows)))
+            for row in rows:
+                self._where[ids[row]] = (c, bucket.append(ids[row], vectors[row], scores[row], codes[row]))
+            self._buckets.append(bucket)
+
+    def _kmeans(self, vectors, nlist):
+        # Spherical k-means on a sample; centroids stay unit length so assignment is a dot product
+        sample = vectors
+        if len(vectors) > 64 * nlist:
+            sample = vectors[self._rng.choice(len(vectors), 64 * nlist, replace=False)]
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.kmeans_iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+            centroids /= np.where(norms > 0, norms, 1.0)
+        return centroids
+
+    def _probe(self, q, nprobe):
+        if self._centroids is None or nprobe >= len(self._buckets):
+            return range(len(self._buckets))
+        return _top_k(self._centroids @ q, nprobe)
+
+    def _score_scale(self, normalize):
+        if not normalize:
+            return 0.0, None
+        if self._score_range is None:
+            self._score_range = (min(float(b.scores.min()) for b in self._buckets if len(b)),
+                                 max(float(b.scores.max()) for b in self._buckets if len(b)))
+        low, high = self._score_range
+        return low, high - low
+
+    def _scan(self, q, buckets, k, score_weight, sim_weight, low, span, code):
+        ids, sims, scores = [], [], []
+        for b in buckets:
+            bucket = self._buckets[b]
+            if not len(bucket):
+                continue
+            bucket_sims = bucket.similarities(q)
+            bucket_scores = bucket.scores
+            bucket_ids = bucket.ids
+            if code is not None:
+                rows = np.flatnonzero(bucket.topics == code)
+                if not len(rows):
+                    continue
+                bucket_sims, bucket_scores = bucket_sims[rows], bucket_scores[rows]
+                bucket_ids = [bucket_ids[row] for row in rows]
+            ids.append(bucket_ids)
+            sims.append(bucket_sims)
+            scores.append(bucket_scores)
+        if not ids:
+            return []
+        if len(ids) == 1:
+            ids, sims, scores = ids[0], sims[0], scores[0]
+        else:
+            ids = [item_id for chunk in ids for item_id in chunk]
+            sims, scores = np.concatenate(sims), np.concatenate(scores)
+        if span is None:
+            weighted = scores
+        elif span == 0:
+            weighted = np.full_like(scores, 0.5)
+        else:
+            weighted = (scores - low) / span
+        combined = sim_weight * sims + score_weight * weighted
+        return [(ids[i], float(sims[i]), float(scores[i]), float(combined[i])) for i in _top_k(combined, k)]
@@ -1,15 +1,23 @@
 #!/usr/bin/env python3
 """
 Migration script for CreatorCore database.
-Backfills embeddings for existing generations that don't have them.
+Converts string iterations to numbers, JSON-array embeddings to the packed
+binary format, and backfills embeddings for existing generations that don't have them.
 Run this script after deploying the new embeddings functionality.
 """
 
+import argparse
 import os
 from pymongo import MongoClient
-from embeddings_utils import generate_embedding, backfill_embeddings
+from embeddings_utils import backfill_embeddings, convert_json_embeddings
+from db_utils import convert_iterations
 
 def main():
+    parser = argparse.ArgumentParser(description="Migrate CreatorCore embeddings")
+    parser.add_argument("--batch-size", type=int, default=64, help="texts encoded per model call and per bulk write")
+    parser.add_argument("--checkpoint", help="file recording the last backfilled _id; re-runs resume after it")
+    args = parser.parse_args()
+
     print("Starting CreatorCore database migration...")
 
     # Check MongoDB connection
@@ -24,9 +32,17 @@ def main():
         print("Running in mock mode - no actual migration performed")
         return
 
+    # Store iterations as numbers so per-topic ordering is numeric
+    print("Converting string iterations to numbers...")
+    convert_iterations()
+
+    # Pack embeddings stored as JSON arrays into the binary format
+    print("Converting JSON embeddings to binary...")
+    convert_json_embeddings()
+
     # Run backfill
     print("Backfilling embeddings for existing generations...")
-    backfill_embeddings()
+    backfill_embeddings(batch_size=args.batch_size, checkpoint_path=args.checkpoint)
 
     print("Migration completed successfully!")
 
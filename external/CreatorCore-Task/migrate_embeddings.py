@@ -1,15 +1,45 @@
-from app import app, db, model, Generation
+import argparse
+import time
+from app import app, db, Generation, encode_embedding, encode_texts, require_model
+
+def missing_embedding_query(after_id):
+    """(id, text) of generations without an embedding and id > after_id, in id order."""
+    return (db.session.query(Generation.id, Generation.text)
+            .filter(Generation.embedding.is_(None), Generation.id > after_id)
+            .order_by(Generation.id))
+
+def backfill(batch_size=64, progress_every=1000):
+    """
+    Embed generations that have none, batch_size rows at a time: one keyset-paged SELECT of
+    (id, text), one batched (cached) model.encode and one executemany UPDATE per batch, committed as
+    it goes. Rows that already have an embedding are skipped, so an interrupted run resumes.
+    """
+    started = time.monotonic()
+    count = 0
+    reported = 0
+    last_id = 0
+    while True:
+        rows = missing_embedding_query(last_id).limit(batch_size).all()
+        if not rows:
+            break
+        embeddings = encode_texts(require_model(), [row.text for row in rows], batch_size=batch_size)
+        db.session.execute(db.update(Generation), [
+            {"id": row.id, "embedding": encode_embedding(emb)} for row, emb in zip(rows, embeddings)
+        ])
+        db.session.commit()
+        last_id = rows[-1].id
+        count += len(rows)
+        if count - reported >= progress_every:
+            reported = count
+            print(f"Migrated {count} embeddings ({count / (time.monotonic() - started):.1f}/s)")
+    elapsed = time.monotonic() - started
+    rate = count / elapsed if elapsed > 0 else 0.0
+    print(f"Migrated embeddings for {count} records in {elapsed:.1f}s ({rate:.1f}/s)")
+    return count
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Backfill missing generation embeddings")
+    parser.add_argument("--batch-size", type=int, default=64, help="texts encoded per model call and per UPDATE batch")
+    args = parser.parse_args()
     with app.app_context():
-        # Find generations without embeddings
-        gens_without_emb = Generation.query.filter(Generation.embedding.is_(None)).all()
-        
-        for gen in gens_without_emb:
-            # Generate embedding
-            emb = model.encode(gen.text).tolist()
-            gen.embedding = emb
-            # Score is already default 0.0
-        
-        db.session.commit()
-        print(f"Migrated embeddings for {len(gens_without_emb)} records")
\ No newline at end of file
+        backfill(batch_size=args.batch_size)
@@ -5,6 +5,17 @@ db = SQLAlchemy()
 class Generation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     text = db.Column(db.Text, nullable=False)
-    embedding = db.Column(db.JSON)  # List of floats
+    embedding = db.Column(db.LargeBinary)  # Packed vector, see backend/embedding_codec.py
     score = db.Column(db.Float, default=0.0)
-    created_at = db.Column(db.DateTime, default=db.func.now())
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=db.func.now(), index=True)
+    user_id = db.Column(db.String(128))  # Optional owner, used to filter /history
+    score_version = db.Column(db.Integer)  # Bumped on every score change, so workers can re-sync scores
+
+    __table_args__ = (
+        # Per-user history, newest first, without scanning other users' rows
+        db.Index('ix_generation_user_created', 'user_id', 'created_at'),
+        # Partial index: only rows still waiting for an embedding (backfill)
+        db.Index('ix_generation_missing_embedding', 'id', sqlite_where=db.text('embedding IS NULL')),
+        # Score changes since a worker's last related-index sync
+        db.Index('ix_generation_score_version', 'score_version'),
+    )
@@ -0,0 +1,50 @@
+"""
+Show how SQLite executes CreatorCore's hot queries.
+
+    python sql_index_advisor.py
+
+Prints EXPLAIN QUERY PLAN for each query and flags full table scans and
+temporary sort B-trees. Exits with status 1 if any query needs one.
+"""
+import sys
+from datetime import datetime
+from app import app, db, Generation, history_query, embedded_after_query, rescored_after_query
+from migrate_embeddings import missing_embedding_query
+
+def hot_queries():
+    return {
+        "history, newest first": history_query().limit(50),
+        "history for one user": history_query(user_id="user").limit(50),
+        "history since a timestamp": history_query(since=datetime(2024, 1, 1)).limit(50),
+        "history page after a cursor": history_query(before=("2024-01-01 00:00:00", 100)).limit(51),
+        "related-context index sync": embedded_after_query(0),
+        "related-context score sync": rescored_after_query(0),
+        "related-context texts by id": db.session.query(Generation.id, Generation.text)
+                                         .filter(Generation.id.in_([1, 2, 3])),
+        "embedding backfill page": missing_embedding_query(0).limit(64),
+    }
+
+def explain(query):
+    """EXPLAIN QUERY PLAN detail lines for a SQLAlchemy query."""
+    sql = query.statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+    return [row[-1] for row in db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def problems(plan):
+    """Plan lines that read the whole table or sort rows in a temporary B-tree."""
+    return [line for line in plan
+            if (line.startswith("SCAN") and "USING" not in line) or "TEMP B-TREE" in line]
+
+def main():
+    found = False
+    with app.app_context():
+        for name, query in hot_queries().items():
+            plan = explain(query)
+            issues = problems(plan)
+            found = found or bool(issues)
+            print(f"{'!!' if issues else 'ok'} {name}")
+            for line in plan:
+                print(f"     {line}")
+    return 1 if found else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
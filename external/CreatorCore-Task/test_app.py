@@ -1,15 +1,27 @@
+import json
+import os
 import pytest
 pytest.importorskip("flask")
+# The engine binds when app is imported; never let the tests touch the real database file
+os.environ["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+import app as app_module
 from app import app, db, get_related_context
+from backend.vector_index import VectorIndex
 from models import Generation
 
 @pytest.fixture
-def client():
+def client(monkeypatch):
     app.config['TESTING'] = True
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+    # Start each test from empty tables and an empty index
+    with app.app_context():
+        if db.engine.url.database not in (None, "", ":memory:"):
+            pytest.skip(f"app was imported with a file database ({db.engine.url}); refusing to drop it")
+        db.drop_all()
+        app_module.ensure_schema()
+    monkeypatch.setattr(app_module, "related_index", VectorIndex())
+    monkeypatch.setattr(app_module, "_synced_id", 0)
+    monkeypatch.setattr(app_module, "_synced_score_version", 0)
     with app.test_client() as client:
-        with app.app_context():
-            db.create_all()
         yield client
 
 def test_generate_endpoint(client):
@@ -60,4 +72,89 @@ def test_scoring_logic(client):
     data = response.get_json()
     # The first should have higher ranking due to score
     # But since all similar, check that related_context has scores
-    assert all(isinstance(item["score"], float) for item in data["related_context"])
\ No newline at end of file
+    assert all(isinstance(item["score"], float) for item in data["related_context"])
+
+def test_history_filters_by_user_and_limit(client):
+    client.post('/generate', json={"prompt": "a", "user_id": "u1"})
+    client.post('/generate', json={"prompt": "b", "user_id": "u2"})
+    client.post('/generate', json={"prompt": "c", "user_id": "u1"})
+
+    data = client.get('/history?user_id=u1').get_json()
+    assert [g["text"] for g in data] == ["c generated content.", "a generated content."]
+
+    data = client.get('/history?user_id=u1&limit=1').get_json()
+    assert [g["text"] for g in data] == ["c generated content."]
+
+def test_history_since_and_invalid_params(client):
+    client.post('/generate', json={"prompt": "old"})
+    data = client.get('/history?since=2999-01-01T00:00:00').get_json()
+    assert data == []
+    assert client.get('/history?limit=abc').status_code == 400
+    assert client.get('/history?since=yesterday').status_code == 400
+
+def test_feedback_is_cumulative_and_validated(client):
+    client.post('/generate', json={"prompt": "fb"})
+    client.post('/feedback', json={"generation_id": 1, "command": "+2"})
+    data = client.post('/feedback', json={"generation_id": 1, "command": "-0.5"}).get_json()
+    assert data["new_score"] == 1.5
+    assert client.post('/feedback', json={"generation_id": 1, "command": "x"}).status_code == 400
+    assert client.post('/feedback', json={"generation_id": 999, "command": "+1"}).status_code == 404
+
+def test_feedback_batch(client):
+    client.post('/generate', json={"prompt": "one"})
+    client.post('/generate', json={"prompt": "two"})
+    response = client.post('/feedback/batch', json={"items": [
+        {"generation_id": 1, "command": "+1"},
+        {"generation_id": 2, "command": "-2"},
+        {"generation_id": 999, "command": "+1"},
+    ]})
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert results[0]["new_score"] == 1.0
+    assert results[1]["new_score"] == -2.0
+    assert results[2]["error"] == "Generation not found"
+    assert client.post('/feedback/batch', json={"items": [{"generation_id": 1, "command": "2"}]}).status_code == 400
+
+def test_score_changes_from_other_workers_reach_the_index(client, monkeypatch):
+    client.post('/generate', json={"prompt": "one"})
+    client.post('/generate', json={"prompt": "two"})
+    with app.app_context():
+        app_module.sync_related_index()
+        # Another worker applies feedback to its own index; ours only sees the database change
+        with monkeypatch.context() as other_worker:
+            other_worker.setattr(app_module, "related_index", VectorIndex())
+            app_module.apply_score_adjustments([(1, 3.0), (2, -1.0), (1, 1.0)])
+        app_module.sync_related_index()
+        hits = app_module.related_index.search(app_module.encode_text("query"), k=2)
+    assert {gen_id: score for gen_id, _, score, _ in hits} == {1: 4.0, 2: -1.0}
+
+def test_hot_queries_use_indexes(client):
+    import sql_index_advisor
+    with app.app_context():
+        for name, query in sql_index_advisor.hot_queries().items():
+            assert sql_index_advisor.problems(sql_index_advisor.explain(query)) == [], name
+
+def test_history_cursor_pagination(client):
+    for prompt in ("p1", "p2", "p3"):
+        client.post('/generate', json={"prompt": prompt})
+
+    first = client.get('/history?limit=2')
+    assert [g["id"] for g in first.get_json()] == [3, 2]
+    cursor = first.headers["X-Next-Cursor"]
+
+    second = client.get(f'/history?limit=2&cursor={cursor}')
+    assert [g["id"] for g in second.get_json()] == [1]
+    assert "X-Next-Cursor" not in second.headers
+    assert client.get('/history?cursor=nope').status_code == 400
+
+def test_history_streams_ndjson(client):
+    client.post('/generate', json={"prompt": "a"})
+    client.post('/generate', json={"prompt": "b"})
+
+    response = client.get('/history?format=ndjson')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["id"] for line in lines] == [2, 1]
+
+    response = client.get('/history', headers={"Accept": "application/x-ndjson"})
+    assert response.mimetype == 'application/x-ndjson'
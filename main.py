@@ -1,14 +1,15 @@
-from fastapi import FastAPI, HTTPException, Depends, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Response, Query
+from contextlib import asynccontextmanager
 from typing import List, Dict, Any, Optional
 import os
 import sqlite3
 from pathlib import Path
-from src.core.models import CoreRequest, CoreResponse
+from src.core.models import CoreRequest, CoreResponse, CoreBatchRequest, CoreBatchResponse
 from src.core.feedback_models import FeedbackRequest
 from src.core.gateway import Gateway
-from src.db.memory import ContextMemory
 from config.config import DB_PATH
 from src.utils.security_hardening import security_middleware, validate_user_request, security
+from src.utils.bridge_client import close_shared_async_client
 
 # Optional SSPL - can be disabled for testing
 SSPL_ENABLED = os.getenv("SSPL_ENABLED", "false").lower() in ("true", "1", "yes")
@@ -19,18 +20,28 @@ else:
     async def require_sspl():
         return True
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Release pooled CreatorCore connections held by the event loop
+    await close_shared_async_client()
+
 app = FastAPI(
     title="Unified Backend Bridge",
     description="Central orchestration layer for Finance, Education, and Creator agents",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add security middleware
 app.middleware("http")(security_middleware)
 
-# Initialize gateway and memory
+# Initialize gateway; read endpoints use its memory adapter so they share its
+# retention bookkeeping and write-behind queue (read-your-writes)
 gateway = Gateway()
-memory = ContextMemory(DB_PATH)
+
+# Read endpoints never return the stored request, so it is neither selected nor decoded
+PUBLIC_INTERACTION_FIELDS = ("module", "timestamp", "response")
 
 @app.post("/core", response_model=CoreResponse)
 async def core_endpoint(request: CoreRequest, http_request: Request, _sspl=Depends(require_sspl)) -> CoreResponse:
@@ -39,48 +50,119 @@ async def core_endpoint(request: CoreRequest, http_request: Request, _sspl=Depen
         # Security validation
         validated_user_id = validate_user_request(request.user_id, http_request)
         
-        response = gateway.process_request(
+        response = await gateway.process_request_async(
             module=request.module,
             intent=request.intent, 
             user_id=validated_user_id,
             data=request.data
         )
         
-        # Validate response structure
-        if not isinstance(response, dict) or 'status' not in response:
+        try:
+            return build_core_response(response)
+        except ValueError:
             raise HTTPException(status_code=500, detail="Processing failed")
-        
-        # Sanitize response
-        sanitized_response = security.sanitize_response(response)
-        sanitized_response.setdefault('message', 'Request processed')
-        sanitized_response.setdefault('result', {})
-        
-        return CoreResponse(**sanitized_response)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Processing failed")
 
+@app.post("/core/batch", response_model=CoreBatchResponse)
+async def core_batch_endpoint(batch: CoreBatchRequest, http_request: Request, _sspl=Depends(require_sspl)) -> CoreBatchResponse:
+    """Process several agent requests in one call.
+
+    Each distinct user is validated once, but every item counts against the
+    user's rate limit. Context is read once per user and all interactions are
+    stored together. Results are returned in request order; an item that fails
+    (including one over the rate limit) gets an error ``CoreResponse`` in its
+    slot while the other items still succeed.
+    """
+    results: List[Optional[CoreResponse]] = [None] * len(batch.requests)
+    # Raw user_id -> validated id, or -> rejection detail
+    validated: Dict[str, str] = {}
+    rejected: Dict[str, str] = {}
+    accepted = []
+    payloads = []
+    for index, item in enumerate(batch.requests):
+        first_item = item.user_id not in validated and item.user_id not in rejected
+        if first_item:
+            try:
+                # Charges the user's first item to the rate limit
+                validated[item.user_id] = validate_user_request(item.user_id, http_request)
+            except HTTPException as e:
+                rejected[item.user_id] = e.detail
+        if item.user_id in rejected:
+            results[index] = CoreResponse(status="error", message=rejected[item.user_id], result={})
+            continue
+        user_id = validated[item.user_id]
+        if not first_item and not security.check_user_rate_limit(user_id):
+            results[index] = CoreResponse(status="error", message="Rate limit exceeded", result={})
+            continue
+        accepted.append(index)
+        payloads.append({**item.dict(), "user_id": user_id})
+
+    try:
+        responses = await gateway.process_batch_async(payloads)
+    except Exception:
+        raise HTTPException(status_code=500, detail="Processing failed")
+
+    for index, response in zip(accepted, responses):
+        try:
+            results[index] = build_core_response(response)
+        except Exception:
+            results[index] = CoreResponse(status="error", message="Processing failed", result={})
+    return CoreBatchResponse(results=results)
+
+def build_core_response(response: Any) -> CoreResponse:
+    """Sanitized ``CoreResponse`` for a gateway result; ValueError if the result is malformed"""
+    # Validate response structure
+    if not isinstance(response, dict) or 'status' not in response:
+        raise ValueError("Processing failed")
+
+    # Sanitize response
+    sanitized_response = security.sanitize_response(response)
+    sanitized_response.setdefault('message', 'Request processed')
+    sanitized_response.setdefault('result', {})
+
+    return CoreResponse(**sanitized_response)
+
 @app.get("/get-history")
-async def get_history(user_id: str, request: Request) -> List[Dict[str, Any]]:
-    """Get full interaction history for a user"""
+async def get_history(
+    user_id: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    module: Optional[List[str]] = Query(None),
+) -> List[Dict[str, Any]]:
+    """Get a page of interaction history for a user (newest first).
+
+    Pass the ``X-Next-Cursor`` response header back as ``cursor`` to fetch the
+    next page; the header is absent on the last page.
+    """
     try:
         # Security validation
         validated_user_id = validate_user_request(user_id, request)
         
-        history = memory.get_user_history(validated_user_id)
+        try:
+            page = await gateway.memory.get_history_page_async(
+                validated_user_id, limit=limit, cursor=cursor, modules=module, fields=PUBLIC_INTERACTION_FIELDS
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
         
-        # Limit and sanitize history
-        limited_history = history[:10]  # Limit to 10 most recent
+        # Sanitize the page
         sanitized_history = []
         
-        for item in limited_history:
+        for item in page["items"]:
             sanitized_item = {
                 "module": item.get("module"),
                 "timestamp": item.get("timestamp"),
                 "response": security.sanitize_response(item.get("response", {}))
             }
             sanitized_history.append(sanitized_item)
+
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
             
         return sanitized_history
     except HTTPException:
@@ -95,7 +177,7 @@ async def get_context(user_id: str, request: Request) -> List[Dict[str, Any]]:
         # Security validation
         validated_user_id = validate_user_request(user_id, request)
         
-        context = memory.get_context(validated_user_id)
+        context = await gateway.memory.get_context_async(validated_user_id, fields=PUBLIC_INTERACTION_FIELDS)
         
         # Sanitize context data
         sanitized_context = []
@@ -196,7 +278,7 @@ async def submit_feedback(request: FeedbackRequest, http_request: Request, _sspl
         if user_id != "anonymous":
             user_id = validate_user_request(user_id, http_request)
             
-        response = gateway.process_request(
+        response = await gateway.process_request_async(
             module="creator",
             intent="feedback",
             user_id=user_id,
@@ -221,7 +303,7 @@ async def get_creator_history(user_id: str, request: Request):
             
         validated_user_id = validate_user_request(user_id, request)
         
-        response = gateway.process_request(
+        response = await gateway.process_request_async(
             module="creator",
             intent="history",
             user_id=validated_user_id,
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List
 
@@ -8,4 +9,13 @@ class BaseAgent(ABC):
     def handle_request(self, intent: str, data: Dict[str, Any], 
                       context: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Handle incoming request with optional context"""
-        pass
\ No newline at end of file
+        pass
+
+    async def handle_request_async(self, intent: str, data: Dict[str, Any],
+                                   context: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async entry point used by the gateway's async path.
+
+        Agents doing I/O should override this; the default runs ``handle_request``
+        in a worker thread so it never blocks the event loop.
+        """
+        return await asyncio.to_thread(self.handle_request, intent, data, context)
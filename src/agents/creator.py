@@ -1,56 +1,153 @@
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from .base import BaseAgent
 import requests
 from config.config import NOOPUR_BASE_URL
 from src.utils.bridge_client import BridgeClient
+from creator_routing import PREWARM_GENERATION_KEY
 from ..core.feedback_models import CanonicalFeedbackSchema
 
 class CreatorAgent(BaseAgent):
     """Creator module agent for creative operations"""
     
-    def __init__(self):
+    def __init__(self, bridge: Optional[BridgeClient] = None):
         super().__init__()
         # Use BridgeClient as the canonical CreatorCore integration surface
-        self.bridge = BridgeClient()
+        self.bridge = bridge or BridgeClient()
     
     def handle_request(self, intent: str, data: Dict[str, Any], 
                       context: List[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Handle creator-related requests using enhanced data from CreatorRouter"""
         
+        # Reuse the CreatorRouter prewarm result; only call CreatorCore if none was made
+        prewarm_result = data.pop(PREWARM_GENERATION_KEY, None)
+
         if intent == "generate":
-            # Use related_context from CreatorRouter if available
-            related_context = data.get("related_context", [])
-            
-            # Try to call external CreatorCore service via BridgeClient
+            external_result = prewarm_result
             prompt = data.get("prompt") or data.get("topic", "")
-            if prompt:
+            if external_result is None and prompt:
                 external_result = self.bridge.generate({"prompt": prompt})
+            return self._generate_response(data, external_result)
+            
+        elif intent == "feedback":
+            # Data is already validated by Gateway using CanonicalFeedbackSchema
+            try:
+                feedback_schema = CanonicalFeedbackSchema(**data)
                 
-                if not external_result.get("error"):
-                    return {
-                        "status": "success",
-                        "message": "Creative content generated via external service",
-                        "result": {
-                            "generation_id": external_result.get("generation_id"),
-                            "generated_text": external_result.get("generated_text"),
-                            "related_context": external_result.get("related_context", related_context),
-                            "recent_history": data.get("recent_history", [])
-                        }
-                    }
+                # Forward to Noopur using canonical schema
+                result = self.bridge.feedback(feedback_schema.to_noopur_format())
+                return self._feedback_response(feedback_schema, result)
+            except Exception as e:
+                return self._feedback_error(e)
             
-            # Fallback: use enhanced data from CreatorRouter
+        elif intent == "history":
+            # Get history from external service with resilient client
+            return self._history_response(data, self.bridge.history())
+
+        return self._local_response(intent, data)
+
+    async def handle_request_async(self, intent: str, data: Dict[str, Any],
+                                   context: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async variant of ``handle_request`` using the non-blocking BridgeClient calls"""
+
+        prewarm_result = data.pop(PREWARM_GENERATION_KEY, None)
+
+        if intent == "generate":
+            external_result = prewarm_result
+            prompt = data.get("prompt") or data.get("topic", "")
+            if external_result is None and prompt:
+                external_result = await self.bridge.generate_async({"prompt": prompt})
+            return self._generate_response(data, external_result)
+
+        elif intent == "feedback":
+            try:
+                feedback_schema = CanonicalFeedbackSchema(**data)
+                result = await self.bridge.feedback_async(feedback_schema.to_noopur_format())
+                return self._feedback_response(feedback_schema, result)
+            except Exception as e:
+                return self._feedback_error(e)
+
+        elif intent == "history":
+            return self._history_response(data, await self.bridge.history_async())
+
+        return self._local_response(intent, data)
+
+    def _generate_response(self, data: Dict[str, Any], external_result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        # Use related_context from CreatorRouter if available
+        related_context = data.get("related_context", [])
+
+        if external_result is not None and not BridgeClient.is_fallback(external_result):
             return {
                 "status": "success",
-                "message": "Creative content generated with context",
+                "message": "Creative content generated via external service",
                 "result": {
-                    "content": f"Generated content for: {data.get('topic', 'unknown topic')}",
-                    "related_context": related_context,
-                    "enhanced_data": data
+                    "generation_id": external_result.get("generation_id"),
+                    "generated_text": external_result.get("generated_text"),
+                    "related_context": external_result.get("related_context", related_context),
+                    "recent_history": data.get("recent_history", [])
                 }
             }
+        
+        # Fallback: use enhanced data from CreatorRouter
+        return {
+            "status": "success",
+            "message": "Creative content generated with context",
+            "result": {
+                "content": f"Generated content for: {data.get('topic', 'unknown topic')}",
+                "related_context": related_context,
+                "enhanced_data": data
+            }
+        }
+
+    def _feedback_response(self, feedback_schema: CanonicalFeedbackSchema, result: Dict[str, Any]) -> Dict[str, Any]:
+        if not result.get("error"):
+            return {
+                "status": "success",
+                "message": "Feedback forwarded to external service",
+                "result": {
+                    "forwarded": True,
+                    "feedback_data": feedback_schema.to_storage_format(),
+                    "external_response": result
+                }
+            }
+        
+        # Fallback: store locally if forwarding fails
+        return {
+            "status": "success",
+            "message": "Feedback stored locally (external service unavailable)",
+            "result": {
+                "forwarded": False,
+                "feedback_data": feedback_schema.to_storage_format()
+            }
+        }
+
+    def _feedback_error(self, error: Exception) -> Dict[str, Any]:
+        return {
+            "status": "error",
+            "message": f"Feedback processing failed: {str(error)}",
+            "result": {}
+        }
+
+    def _history_response(self, data: Dict[str, Any], history_result: Any) -> Dict[str, Any]:
+        if not history_result.get("error"):
+            return {
+                "status": "success",
+                "message": "History retrieved from external service",
+                "result": {"history": history_result}
+            }
             
-        elif intent == "analyze":
-            related_context = data.get("related_context", [])
+        # Fallback to local context
+        related_context = data.get("related_context", [])
+        return {
+            "status": "success",
+            "message": "Local history retrieved",
+            "result": {"history": related_context}
+        }
+
+    def _local_response(self, intent: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Intents served without calling CreatorCore"""
+        related_context = data.get("related_context", [])
+
+        if intent == "analyze":
             return {
                 "status": "success",
                 "message": "Creative analysis completed with context",
@@ -62,7 +159,6 @@ class CreatorAgent(BaseAgent):
             }
             
         elif intent == "review":
-            related_context = data.get("related_context", [])
             return {
                 "status": "success", 
                 "message": "Creative review completed with context",
@@ -72,65 +168,9 @@ class CreatorAgent(BaseAgent):
                     "feedback": "Enhanced feedback based on context"
                 }
             }
-            
-        elif intent == "feedback":
-            # Data is already validated by Gateway using CanonicalFeedbackSchema
-            try:
-                feedback_schema = CanonicalFeedbackSchema(**data)
-                
-                # Forward to Noopur using canonical schema
-                noopur_payload = feedback_schema.to_noopur_format()
-                result = self.bridge.feedback(noopur_payload)
-                
-                if not result.get("error"):
-                    return {
-                        "status": "success",
-                        "message": "Feedback forwarded to external service",
-                        "result": {
-                            "forwarded": True,
-                            "feedback_data": feedback_schema.to_storage_format(),
-                            "external_response": result
-                        }
-                    }
-                
-                # Fallback: store locally if forwarding fails
-                return {
-                    "status": "success",
-                    "message": "Feedback stored locally (external service unavailable)",
-                    "result": {
-                        "forwarded": False,
-                        "feedback_data": feedback_schema.to_storage_format()
-                    }
-                }
-            except Exception as e:
-                return {
-                    "status": "error",
-                    "message": f"Feedback processing failed: {str(e)}",
-                    "result": {}
-                }
-            
-        elif intent == "history":
-            # Get history from external service with resilient client
-            history_result = self.bridge.history()
-            
-            if not history_result.get("error"):
-                return {
-                    "status": "success",
-                    "message": "History retrieved from external service",
-                    "result": {"history": history_result}
-                }
-                
-            # Fallback to local context
-            related_context = data.get("related_context", [])
-            return {
-                "status": "success",
-                "message": "Local history retrieved",
-                "result": {"history": related_context}
-            }
-            
-        else:
-            return {
-                "status": "error",
-                "message": f"Unknown intent: {intent}",
-                "result": None
-            }
\ No newline at end of file
+
+        return {
+            "status": "error",
+            "message": f"Unknown intent: {intent}",
+            "result": None
+        }
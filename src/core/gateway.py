@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+from ..agents.base import BaseAgent
 from ..agents.finance import FinanceAgent
 from ..agents.education import EducationAgent  
 from ..agents.creator import CreatorAgent
@@ -6,15 +7,24 @@ from ..modules.base import BaseModule
 from .module_loader import load_modules
 from .feedback_models import CanonicalFeedbackSchema
 from ..db.memory import ContextMemory
-from ..db.memory_adapter import SQLiteAdapter, RemoteNoopurAdapter, MONGODB_AVAILABLE
+from ..db.retention import RetentionPolicy
+from ..db.context_cache import CachedMemoryAdapter
+from ..db.memory_adapter import MemoryAdapter, SQLiteAdapter, RemoteNoopurAdapter, MONGODB_AVAILABLE
 from ..utils.logger import setup_logger
 from ..utils.bridge_client import BridgeClient
-from config.config import DB_PATH, INTEGRATOR_USE_NOOPUR, USE_MONGODB, MONGODB_CONNECTION_STRING, MONGODB_DATABASE_NAME
+from config.config import (
+    DB_PATH, INTEGRATOR_USE_NOOPUR, USE_MONGODB, MONGODB_CONNECTION_STRING, MONGODB_DATABASE_NAME,
+    MEMORY_WRITE_BEHIND, MEMORY_WRITE_BATCH_SIZE, MEMORY_WRITE_FLUSH_INTERVAL_MS, MEMORY_WRITE_QUEUE_SIZE,
+    RETENTION_MAX_PER_MODULE, RETENTION_MAX_AGE_SECONDS, RETENTION_MODULE_OVERRIDES,
+    RETENTION_SWEEP_EVERY_WRITES, RETENTION_SWEEP_INTERVAL_SECONDS,
+    CONTEXT_CACHE_ENABLED, CONTEXT_CACHE_MAX_USERS, CONTEXT_CACHE_TTL_SECONDS,
+)
 from pydantic import ValidationError
 
 if MONGODB_AVAILABLE:
     from ..db.mongodb_adapter import MongoDBAdapter
 from creator_routing import CreatorRouter
+import asyncio
 import json
 import os
 
@@ -32,7 +42,7 @@ class Gateway:
         self.agents = {
             "finance": FinanceAgent(),
             "education": EducationAgent(),
-            "creator": CreatorAgent(),
+            "creator": CreatorAgent(bridge=self.bridge_client),
         }
 
         # Dynamically load modules from modules/ directory
@@ -47,16 +57,22 @@ class Gateway:
         # Memory adapter: MongoDB > Noopur > SQLite (priority order with fallback)
         if USE_MONGODB and MONGODB_AVAILABLE:
             try:
-                self.memory = MongoDBAdapter(MONGODB_CONNECTION_STRING, MONGODB_DATABASE_NAME)
+                self.memory = MongoDBAdapter(MONGODB_CONNECTION_STRING, MONGODB_DATABASE_NAME, **self._retention_options())
                 self.logger.info("Using MongoDB adapter")
             except Exception as e:
                 self.logger.warning(f"MongoDB connection failed, falling back to SQLite: {e}")
-                self.memory = SQLiteAdapter(DB_PATH)
+                self.memory = self._sqlite_adapter()
         elif INTEGRATOR_USE_NOOPUR:
             self.memory = RemoteNoopurAdapter()
         else:
-            self.memory = SQLiteAdapter(DB_PATH)
-        self.creator_router = CreatorRouter(self.memory)
+            self.memory = self._sqlite_adapter()
+        # Opt-in: repeat users are served recent context from a per-process cache (write-through on store)
+        if CONTEXT_CACHE_ENABLED:
+            self.memory = CachedMemoryAdapter(
+                self.memory, max_users=CONTEXT_CACHE_MAX_USERS, ttl_seconds=CONTEXT_CACHE_TTL_SECONDS
+            )
+        # Router and CreatorAgent share one BridgeClient so /generate is called at most once per request
+        self.creator_router = CreatorRouter(self.memory, bridge=self.bridge_client if INTEGRATOR_USE_NOOPUR else None)
         # Validate module contracts for any module-like entries (modules under /modules should subclass BaseModule)
         for name, mod in list(self.agents.items()):
             # If the object exposes `process`, expect it to be a BaseModule
@@ -66,6 +82,29 @@ class Gateway:
                     self.logger.error(f"Module '{name}' does not implement BaseModule contract. Marking as invalid.")
                     self.agents[name] = None
 
+    @classmethod
+    def _sqlite_adapter(cls) -> SQLiteAdapter:
+        return SQLiteAdapter(
+            DB_PATH,
+            write_behind=MEMORY_WRITE_BEHIND,
+            batch_size=MEMORY_WRITE_BATCH_SIZE,
+            flush_interval=MEMORY_WRITE_FLUSH_INTERVAL_MS / 1000,
+            queue_size=MEMORY_WRITE_QUEUE_SIZE,
+            **cls._retention_options(),
+        )
+
+    @staticmethod
+    def _retention_options() -> Dict[str, Any]:
+        return {
+            "retention_policy": RetentionPolicy(
+                max_count=RETENTION_MAX_PER_MODULE,
+                max_age_seconds=RETENTION_MAX_AGE_SECONDS,
+                module_overrides=RETENTION_MODULE_OVERRIDES,
+            ),
+            "sweep_every": RETENTION_SWEEP_EVERY_WRITES,
+            "sweep_interval": RETENTION_SWEEP_INTERVAL_SECONDS,
+        }
+
     def _load_module_metadata(self, module_name: str) -> Dict[str, Any]:
         """Try to load `modules/<module>/config.json` for metadata (optional)."""
         try:
@@ -104,27 +143,14 @@ class Gateway:
                        data: Dict[str, Any]) -> Dict[str, Any]:
         """Process incoming request and route to appropriate agent"""
         
-        # Special validation for feedback requests
-        if module == "creator" and intent == "feedback":
-            try:
-                validated_feedback = self.validate_feedback(data)
-                data = validated_feedback.dict()
-                self.logger.info(f"Feedback validated successfully for user: {user_id}")
-            except ValueError as e:
-                return {
-                    "status": "error",
-                    "message": str(e),
-                    "result": {}
-                }
+        data, error = self._prepare_request(module, intent, user_id, data)
+        if error:
+            return error
         
         # Get user context (adapter provides get_context)
         context = self.memory.get_context(user_id) if user_id else []
         
-        # Log request
-        self.logger.info(
-            f"Processing request for module: {module}, intent: {intent}",
-            extra={"user_id": user_id, "request_data": {"module": module, "intent": intent, "data": data}}
-        )
+        self._log_request(module, intent, user_id, data)
         
         # Special handling for creator flows: pre-warm with context from Noopur/local memory
         if module == "creator":
@@ -135,20 +161,8 @@ class Gateway:
                 pass
 
         # Route to agent
-        if module not in self.agents:
-            response = {
-                "status": "error",
-                "message": f"Unknown module: {module}",
-                "result": {}
-            }
-        elif self.agents[module] is None:
-            response = {
-                "status": "error",
-                "message": f"Module {module} is invalid or failed to load",
-                "result": {}
-            }
-        else:
-            agent = self.agents[module]
+        agent, response = self._resolve_agent(module)
+        if agent is not None:
             try:
                 # Check if it's a BaseModule (has process method)
                 if isinstance(agent, BaseModule):
@@ -157,20 +171,208 @@ class Gateway:
                 elif hasattr(agent, 'handle_request'):
                     response = agent.handle_request(intent, data, context)
                 else:
-                    response = {
-                        "status": "error",
-                        "message": f"Module {module} has invalid interface",
-                        "result": {}
-                    }
+                    response = self._invalid_interface(module)
             except Exception as e:
-                self.logger.exception(f"Agent processing failed for {module}")
-                response = {
+                response = self._agent_failure(module, e)
+        
+        normalized = self._normalize_response(response)
+
+        # Store interaction
+        if user_id:
+            request_data = {"module": module, "intent": intent, "user_id": user_id, "data": data}
+            try:
+                self.memory.store_interaction(user_id, request_data, normalized)
+            except Exception:
+                self.logger.exception("Failed to store interaction")
+
+        self._log_response(user_id, normalized)
+        return normalized
+
+    async def process_request_async(self, module: str, intent: str, user_id: str,
+                                    data: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of ``process_request`` for use from async endpoints.
+
+        Memory, agent and CreatorCore I/O are awaited instead of blocking the event
+        loop, so one slow upstream call does not stall other in-flight requests.
+        """
+        data, error = self._prepare_request(module, intent, user_id, data)
+        if error:
+            return error
+
+        context = await self._memory_call("get_context", user_id) if user_id else []
+
+        data, normalized = await self._dispatch_async(module, intent, user_id, data, context)
+
+        if user_id:
+            request_data = {"module": module, "intent": intent, "user_id": user_id, "data": data}
+            try:
+                await self._memory_call("store_interaction", user_id, request_data, normalized)
+            except Exception:
+                self.logger.exception("Failed to store interaction")
+
+        self._log_response(user_id, normalized)
+        return normalized
+
+    async def process_batch_async(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Process several requests (``module``, ``intent``, ``user_id``, ``data`` dicts) together.
+
+        Context is read once per distinct user and shared by that user's requests,
+        agents run concurrently, and every interaction is stored in a single
+        ``store_interactions`` call. Returns one normalized response per request,
+        in order; a request that fails gets an error response without affecting
+        the others. Requests in a batch see the context from before the batch,
+        not each other.
+        """
+        prepared = [
+            self._prepare_request(req["module"], req["intent"], req["user_id"], req.get("data") or {})
+            for req in requests
+        ]
+
+        users = list(dict.fromkeys(
+            req["user_id"] for req, (_, error) in zip(requests, prepared) if req["user_id"] and not error
+        ))
+        fetched = await asyncio.gather(
+            *[self._memory_call("get_context", user_id) for user_id in users], return_exceptions=True
+        )
+        contexts = dict(zip(users, fetched))
+
+        async def run(req: Dict[str, Any], data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], bool]:
+            """(data, normalized response, whether to store the interaction)"""
+            context = contexts.get(req["user_id"], []) if req["user_id"] else []
+            if isinstance(context, BaseException):
+                # Like a failed context read on /core: answered with an error and not stored
+                self.logger.error(f"Context retrieval failed for batch item: {context}")
+                return data, {"status": "error", "message": "Context retrieval failed", "result": {}}, False
+            try:
+                data, normalized = await self._dispatch_async(req["module"], req["intent"], req["user_id"], data, context)
+            except Exception as e:
+                normalized = self._normalize_response(self._agent_failure(req["module"], e))
+            return data, normalized, True
+
+        pending = [run(req, data) for req, (data, error) in zip(requests, prepared) if not error]
+        outcomes = iter(await asyncio.gather(*pending))
+
+        results = []
+        interactions = []
+        for req, (data, error) in zip(requests, prepared):
+            if error:
+                results.append(error)
+                continue
+            data, normalized, store = next(outcomes)
+            results.append(normalized)
+            user_id = req["user_id"]
+            if user_id and store:
+                request_data = {"module": req["module"], "intent": req["intent"], "user_id": user_id, "data": data}
+                interactions.append((user_id, request_data, normalized))
+            self._log_response(user_id, normalized)
+
+        if interactions:
+            try:
+                await self._memory_call("store_interactions", interactions)
+            except Exception:
+                self.logger.exception("Failed to store batch interactions")
+
+        return results
+
+    async def _dispatch_async(self, module: str, intent: str, user_id: str, data: Dict[str, Any],
+                              context: List[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Route one prepared request to its agent; returns (data as stored, normalized response)."""
+        self._log_request(module, intent, user_id, data)
+
+        if module == "creator":
+            try:
+                data = await self.creator_router.prewarm_and_prepare_async(request=user_id and data or {}, user_id=user_id, input_data=data)
+            except Exception:
+                pass
+
+        agent, response = self._resolve_agent(module)
+        if agent is not None:
+            try:
+                if isinstance(agent, BaseModule):
+                    response = await agent.process_async(data, context)
+                elif isinstance(agent, BaseAgent):
+                    response = await agent.handle_request_async(intent, data, context)
+                elif hasattr(agent, 'handle_request'):
+                    response = await asyncio.to_thread(agent.handle_request, intent, data, context)
+                else:
+                    response = self._invalid_interface(module)
+            except Exception as e:
+                response = self._agent_failure(module, e)
+
+        return data, self._normalize_response(response)
+
+    async def _memory_call(self, method: str, *args):
+        """Await a memory adapter call, offloading adapters without async support to a thread."""
+        if isinstance(self.memory, MemoryAdapter):
+            return await getattr(self.memory, f"{method}_async")(*args)
+        return await asyncio.to_thread(getattr(self.memory, method), *args)
+
+    def _prepare_request(self, module: str, intent: str, user_id: str,
+                         data: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Validate request payload; returns (data, error_response)."""
+        # Special validation for feedback requests
+        if module == "creator" and intent == "feedback":
+            try:
+                validated_feedback = self.validate_feedback(data)
+                data = validated_feedback.dict()
+                self.logger.info(f"Feedback validated successfully for user: {user_id}")
+            except ValueError as e:
+                return data, {
                     "status": "error",
-                    "message": f"Agent processing failed: {str(e)}",
+                    "message": str(e),
                     "result": {}
                 }
-        
-        # Normalize response into standardized CoreResponse shape (do not rely on module to emit full CoreResponse)
+        return data, None
+
+    def _log_request(self, module: str, intent: str, user_id: str, data: Dict[str, Any]) -> None:
+        self.logger.info(
+            f"Processing request for module: {module}, intent: {intent}",
+            extra={"user_id": user_id, "request_data": {"module": module, "intent": intent, "data": data}}
+        )
+
+    def _log_response(self, user_id: str, normalized: Dict[str, Any]) -> None:
+        try:
+            self.logger.info(
+                f"Request processed with status: {normalized.get('status')}",
+                extra={"user_id": user_id, "response_data": normalized}
+            )
+        except Exception:
+            pass
+
+    def _resolve_agent(self, module: str) -> Tuple[Any, Optional[Dict[str, Any]]]:
+        """Return (agent, None) for a routable module, else (None, error_response)."""
+        if module not in self.agents:
+            return None, {
+                "status": "error",
+                "message": f"Unknown module: {module}",
+                "result": {}
+            }
+        if self.agents[module] is None:
+            return None, {
+                "status": "error",
+                "message": f"Module {module} is invalid or failed to load",
+                "result": {}
+            }
+        return self.agents[module], None
+
+    def _invalid_interface(self, module: str) -> Dict[str, Any]:
+        return {
+            "status": "error",
+            "message": f"Module {module} has invalid interface",
+            "result": {}
+        }
+
+    def _agent_failure(self, module: str, error: Exception) -> Dict[str, Any]:
+        self.logger.exception(f"Agent processing failed for {module}")
+        return {
+            "status": "error",
+            "message": f"Agent processing failed: {str(error)}",
+            "result": {}
+        }
+
+    @staticmethod
+    def _normalize_response(response: Any) -> Dict[str, Any]:
+        """Normalize response into standardized CoreResponse shape (do not rely on module to emit full CoreResponse)"""
         normalized = {
             'status': 'success',
             'message': '',
@@ -190,21 +392,4 @@ class Gateway:
                 raw = {k: v for k, v in response.items() if k not in ('status', 'message', 'result')}
                 normalized['result'] = raw
 
-        # Store interaction
-        if user_id:
-            request_data = {"module": module, "intent": intent, "user_id": user_id, "data": data}
-            try:
-                self.memory.store_interaction(user_id, request_data, normalized)
-            except Exception:
-                self.logger.exception("Failed to store interaction")
-
-        # Log response
-        try:
-            self.logger.info(
-                f"Request processed with status: {normalized.get('status')}",
-                extra={"user_id": user_id, "response_data": normalized}
-            )
-        except Exception:
-            pass
-
-        return normalized
\ No newline at end of file
+        return normalized
@@ -0,0 +1,239 @@
+"""Per-user recent-context cache in front of any memory adapter.
+
+``Gateway.process_request`` and ``CreatorRouter`` both read a user's recent
+context on every request. ``CachedMemoryAdapter`` keeps the newest
+interactions per user in a bounded LRU with a TTL, updates the entry
+write-through on ``store_interaction`` and only falls back to the wrapped
+adapter on a miss.
+"""
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from .memory_adapter import MemoryAdapter
+from .rows import project, resolve_fields
+
+
+class _Entry:
+    __slots__ = ("items", "covered", "expires_at")
+
+    def __init__(self, items: List[Dict[str, Any]], covered: int, expires_at: float):
+        self.items = items
+        # Largest ``limit`` this entry can answer exactly
+        self.covered = covered
+        self.expires_at = expires_at
+
+
+class ContextCache:
+    """Thread-safe LRU of per-user context lists with TTL expiry and hit/miss counters."""
+
+    def __init__(self, max_users: int = 10000, ttl_seconds: float = 30.0):
+        self.max_users = max_users
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._write_seq: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, user_id: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[user_id]
+                self._expirations += 1
+                entry = None
+            if entry is None or limit > entry.covered:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self._hits += 1
+            return list(entry.items[:limit])
+
+    def token(self, user_id: str) -> int:
+        """Write sequence for ``user_id``; pass it to ``put`` so a fetch that raced a write is not cached."""
+        with self._lock:
+            return self._write_seq.get(user_id, 0)
+
+    def put(self, user_id: str, items: List[Dict[str, Any]], limit: int, token: int):
+        with self._lock:
+            if self._write_seq.get(user_id, 0) != token:
+                return
+            self._entries[user_id] = _Entry(list(items[:limit]), limit, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def _bump(self, user_id: str):
+        # Caller holds the lock. Resetting the table is safe: stale tokens simply stop matching.
+        if len(self._write_seq) >= 2 * self.max_users and user_id not in self._write_seq:
+            self._write_seq = {}
+        self._write_seq[user_id] = self._write_seq.get(user_id, 0) + 1
+
+    def prepend(self, user_id: str, item: Dict[str, Any], policy=None):
+        """Write-through: add a newly stored interaction to a cached entry, if present."""
+        with self._lock:
+            self._bump(user_id)
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            key = (item.get("module"), item.get("timestamp"))
+            if any((i.get("module"), i.get("timestamp")) == key for i in entry.items):
+                # A fetch that raced this write already cached it
+                return
+            items = [item] + entry.items
+            covered = entry.covered
+            if policy is not None:
+                visible = list(policy.visible(items, lambda i: i.get("module")))
+                if len(visible) < len(items):
+                    # A row fell out of its module's retention window; only the prefix is still exact
+                    covered = min(covered, len(visible))
+                items = visible
+            entry.items = items[:covered]
+            entry.covered = covered
+
+    def begin_write(self, user_id: str):
+        """Mark a write as in flight so concurrent fetches that started earlier are not cached."""
+        with self._lock:
+            self._bump(user_id)
+
+    def invalidate(self, user_id: str):
+        with self._lock:
+            self._bump(user_id)
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_users": self.max_users,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+
+class CachedMemoryAdapter(MemoryAdapter):
+    """Wraps a memory adapter with a per-user context cache.
+
+    ``get_context`` is served from the cache when possible (entries always hold
+    full rows; a ``fields`` projection is applied on the way out); ``store_interaction``
+    writes through to the wrapped adapter and then updates (or, if the adapter
+    does not return the stored record, invalidates) the user's cache entry.
+    Any other attribute is delegated to the wrapped adapter.
+    """
+
+    def __init__(self, inner, max_users: int = 10000, ttl_seconds: float = 30.0):
+        self.inner = inner
+        self.cache = ContextCache(max_users=max_users, ttl_seconds=ttl_seconds)
+
+    def __getattr__(self, name):
+        return getattr(self.inner, name)
+
+    def store_interaction(self, user_id: str, request_data: Dict[str, Any], response_data: Dict[str, Any]):
+        self.cache.begin_write(user_id)
+        stored = self.inner.store_interaction(user_id, request_data, response_data)
+        self._write_through(user_id, stored)
+        return stored
+
+    def store_interactions(self, interactions: Iterable[tuple]) -> List[Any]:
+        interactions = list(interactions)
+        for user_id, _, _ in interactions:
+            self.cache.begin_write(user_id)
+        if hasattr(self.inner, "store_interactions"):
+            stored = self.inner.store_interactions(interactions)
+        else:
+            stored = [self.inner.store_interaction(*interaction) for interaction in interactions]
+        self._write_through_all(interactions, stored)
+        return stored
+
+    def get_user_history(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return self.inner.get_user_history(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)
+
+    def get_history_page(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        return self.inner.get_history_page(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)
+
+    def get_context(self, user_id: str, limit: int = 3,
+                    fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        fields = resolve_fields(fields)
+        items = self.cache.get(user_id, limit)
+        if items is None:
+            token = self.cache.token(user_id)
+            items = self.inner.get_context(user_id, limit)
+            self.cache.put(user_id, items, limit, token)
+        return [project(item, fields) for item in items]
+
+    async def store_interaction_async(self, user_id: str, request_data: Dict[str, Any], response_data: Dict[str, Any]):
+        self.cache.begin_write(user_id)
+        if isinstance(self.inner, MemoryAdapter):
+            stored = await self.inner.store_interaction_async(user_id, request_data, response_data)
+        else:
+            stored = await asyncio.to_thread(self.inner.store_interaction, user_id, request_data, response_data)
+        self._write_through(user_id, stored)
+        return stored
+
+    async def store_interactions_async(self, interactions: Iterable[tuple]) -> List[Any]:
+        interactions = list(interactions)
+        if isinstance(self.inner, MemoryAdapter):
+            for user_id, _, _ in interactions:
+                self.cache.begin_write(user_id)
+            stored = await self.inner.store_interactions_async(interactions)
+            self._write_through_all(interactions, stored)
+            return stored
+        return await asyncio.to_thread(self.store_interactions, interactions)
+
+    async def get_history_page_async(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                                     modules: Optional[List[str]] = None,
+                                     fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        if isinstance(self.inner, MemoryAdapter):
+            return await self.inner.get_history_page_async(user_id, limit, cursor, modules, fields)
+        return await asyncio.to_thread(self.inner.get_history_page, user_id, limit, cursor, modules, fields)
+
+    async def get_context_async(self, user_id: str, limit: int = 3,
+                                fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        fields = resolve_fields(fields)
+        # Cache hits are answered on the event loop without a thread hop
+        items = self.cache.get(user_id, limit)
+        if items is None:
+            token = self.cache.token(user_id)
+            if isinstance(self.inner, MemoryAdapter):
+                items = await self.inner.get_context_async(user_id, limit)
+            else:
+                items = await asyncio.to_thread(self.inner.get_context, user_id, limit)
+            self.cache.put(user_id, items, limit, token)
+        return [project(item, fields) for item in items]
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
+
+    def _write_through_all(self, interactions: List[tuple], stored: List[Any]):
+        counts = Counter(user_id for user_id, _, _ in interactions)
+        for (user_id, _, _), record in zip(interactions, stored):
+            if counts[user_id] > 1:
+                # Rows of one batch can share a timestamp, which prepend treats as already cached
+                self.cache.invalidate(user_id)
+            else:
+                self._write_through(user_id, record)
+
+    def _write_through(self, user_id: str, stored: Any):
+        if isinstance(stored, dict) and "module" in stored:
+            self.cache.prepend(user_id, stored, getattr(self.inner, "retention_policy", None))
+        else:
+            self.cache.invalidate(user_id)
@@ -1,208 +1,462 @@
-import sqlite3
-import json
+import atexit
+import logging
+import queue
+import time
+from collections import Counter
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import Iterable, List, Dict, Any, Optional
 from pathlib import Path
 import threading
+from contextlib import nullcontext
+
+from .migrations import apply_migrations
+from .pagination import decode_cursor, encode_cursor
+from .retention import RetentionEngine, RetentionPolicy
+from .rows import InteractionRow, from_columns, resolve_fields, sql_columns
+from .sqlite_pool import SQLitePool
+from ..utils import serialization
+
+logger = logging.getLogger(__name__)
+
+# Sentinel that tells the write-behind thread to exit after draining the queue
+_STOP = object()
+# Sentinel that wakes the write-behind thread when a reader requests a flush
+_WAKE = object()
+# Attempts per write-behind batch before it is written row by row (e.g. "database is locked")
+_WRITE_ATTEMPTS = 3
+_WRITE_RETRY_DELAY = 0.1
 
 class ContextMemory:
     """SQLite-based context memory for storing user interactions"""
     
-    def __init__(self, db_path: str = "data/context.db"):
+    def __init__(self, db_path: str = "data/context.db", write_behind: bool = False,
+                 batch_size: int = 100, flush_interval: float = 0.05, queue_size: int = 10000,
+                 retention_policy: Optional[RetentionPolicy] = None, sweep_every: int = 100,
+                 sweep_interval: Optional[float] = None):
+        """
+        With ``write_behind`` enabled, ``store_interaction`` only enqueues the
+        serialized interaction; a background thread writes queued rows in
+        multi-row transactions of up to ``batch_size`` rows or every
+        ``flush_interval`` seconds. ``queue_size`` bounds the queue, so producers
+        block (backpressure) rather than grow memory when the writer falls behind.
+        Reads for a user with queued writes flush first, so callers always see
+        their own writes. A failed batch is retried, then written row by row.
+
+        Retention (``retention_policy``, default: newest 5 per user and module)
+        is pruned in sweeps every ``sweep_every`` writes and, if set, every
+        ``sweep_interval`` seconds; reads hide surplus rows in between.
+        """
         self.db_path = db_path
         if db_path != ":memory:":
             Path(db_path).parent.mkdir(exist_ok=True)
         self._lock = threading.Lock()
+        # Connections are reused per thread (one shared connection for :memory:);
+        # WAL/busy_timeout are applied once when opened
+        self._pool = SQLitePool(db_path, timeout=30)
         self._init_db()
+
+        self._retention = RetentionEngine(
+            retention_policy or RetentionPolicy(), self._prune,
+            sweep_every=sweep_every, sweep_interval=sweep_interval
+        )
+        # Enforce the current policy on rows written before this process started
+        self._prune_all()
+
+        self.write_behind = write_behind
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        if write_behind:
+            self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+            self._pending: Counter = Counter()
+            self._pending_lock = threading.Lock()
+            self._flush_requested = threading.Event()
+            self._writer = threading.Thread(target=self._writer_loop, name="context-memory-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
     
     def _init_db(self):
-        """Initialize the database with required tables"""
-        # Enable WAL mode and set a busy timeout to improve concurrency
-        with sqlite3.connect(self.db_path, timeout=30) as conn:
-            conn.execute("PRAGMA journal_mode=WAL")
-            conn.execute("PRAGMA busy_timeout=30000")
-            # Create table with module column
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS interactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id TEXT NOT NULL,
-                    module TEXT NOT NULL,
-                    timestamp TEXT NOT NULL,
-                    request_data TEXT NOT NULL,
-                    response_data TEXT NOT NULL
-                )
-            """)
-            # Generations table records canonical mapping from external generation_id -> interaction
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS generations (
-                    generation_id TEXT PRIMARY KEY,
-                    user_id TEXT,
-                    interaction_id INTEGER,
-                    created_at TEXT,
-                    payload TEXT
-                )
-            """)
-            
-            # Check if module column exists (for existing databases)
-            cursor = conn.execute("PRAGMA table_info(interactions)")
-            columns = [row[1] for row in cursor.fetchall()]
-            
-            if 'module' not in columns:
-                try:
-                    # Add module column to existing table
-                    conn.execute("ALTER TABLE interactions ADD COLUMN module TEXT DEFAULT 'unknown'")
-                except sqlite3.OperationalError:
-                    # Column already exists, ignore
-                    pass
-            
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_user_module_timestamp 
-                ON interactions(user_id, module, timestamp DESC)
-            """)
-    
-    def _ensure_table_exists(self, conn):
-        """Ensure table exists in current connection (for in-memory databases)"""
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS interactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                module TEXT NOT NULL,
-                timestamp TEXT NOT NULL,
-                request_data TEXT NOT NULL,
-                response_data TEXT NOT NULL
-            )
-        """)
-        # Ensure generations table exists for in-memory DBs as well
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS generations (
-                generation_id TEXT PRIMARY KEY,
-                user_id TEXT,
-                interaction_id INTEGER,
-                created_at TEXT,
-                payload TEXT
-            )
-        """)
-        conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_user_module_timestamp 
-            ON interactions(user_id, module, timestamp DESC)
-        """)
+        """Bring the schema up to date; runs once per instance, never on the hot path"""
+        with self._lock, self._pool.connection() as conn:
+            self.schema_version = apply_migrations(conn)
+
+    def _reading(self):
+        """Lock guarding reads; only needed when all threads share one in-memory connection"""
+        return self._lock if self._pool.shared else nullcontext()
     
+    def close(self):
+        """Flush queued writes, stop background threads and close all pooled connections."""
+        if self.write_behind and self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+        self._retention.stop()
+        self._pool.close_all()
+
     def store_interaction(self, user_id: str, request_data: Dict[str, Any], 
                          response_data: Dict[str, Any]):
-        """Store a request-response interaction"""
+        """Store a request-response interaction and return it in the shape returned by reads"""
+        return self.store_interactions([(user_id, request_data, response_data)])[0]
+
+    def store_interactions(self, interactions: Iterable[tuple]) -> List[InteractionRow]:
+        """Store ``(user_id, request_data, response_data)`` interactions in one transaction
+
+        Returns the stored rows in order, in the shape returned by reads. With
+        write-behind the records are queued together and persisted by the writer.
+        """
+        records = [self._prepare_record(user_id, request_data, response_data)
+                   for user_id, request_data, response_data in interactions]
+
+        if self.write_behind:
+            # Snapshots are already serialized; the writer thread persists them in a later batch
+            with self._pending_lock:
+                for record in records:
+                    self._pending[record[0]] += 1
+            for record in records:
+                self._queue.put(record)
+        elif records:
+            self._write_batch(records)
+
+        # Decoded lazily from the serialized snapshots, so the caller gets independent copies
+        return [
+            InteractionRow(
+                {"module": record[1], "timestamp": record[2]},
+                {"request": record[3], "response": record[4]}
+            )
+            for record in records
+        ]
+
+    def _prepare_record(self, user_id: str, request_data: Dict[str, Any],
+                        response_data: Dict[str, Any]) -> tuple:
+        """Serialize an interaction into the row tuple consumed by ``_write_batch``"""
         timestamp = datetime.now().isoformat()
         module = request_data.get("module", "unknown")
 
+        # Each payload is encoded exactly once; the generation mapping reuses the encoded text
+        request_json = serialization.dumps(request_data)
+        response_json = serialization.dumps(response_data)
+
+        # If response includes generation_id, persist mapping for deterministic lifecycle
+        gen_id = None
+        gen_payload = None
+        try:
+            resp_result = response_data.get('result', {}) if isinstance(response_data, dict) else {}
+            if isinstance(resp_result, dict):
+                gen_id = resp_result.get('generation_id')
+            # Also check top-level response_data for legacy payloads
+            if not gen_id and isinstance(response_data, dict):
+                gen_id = response_data.get('generation_id')
+            if gen_id:
+                gen_payload = f'{{"request":{request_json},"response":{response_json}}}'
+        except Exception:
+            # Do not let generation mapping failures block the interaction write
+            gen_id = None
+
+        return (user_id, module, timestamp, request_json, response_json,
+                str(gen_id) if gen_id else None, gen_payload)
+
+    def _write_batch(self, records: List[tuple]):
+        """Persist interaction rows in a single transaction"""
         # Use a lock to provide concurrency safety for writes from multiple threads/processes
         with self._lock:
-            with sqlite3.connect(self.db_path, timeout=30) as conn:
-                self._ensure_table_exists(conn)
+            with self._pool.connection() as conn:
                 cursor = conn.cursor()
                 try:
                     cursor.execute("BEGIN IMMEDIATE TRANSACTION")
-                    cursor.execute(
-                        """
-                        INSERT INTO interactions (user_id, module, timestamp, request_data, response_data)
-                        VALUES (?, ?, ?, ?, ?)
-                        """,
-                        (user_id, module, timestamp, json.dumps(request_data), json.dumps(response_data))
-                    )
-                    interaction_id = cursor.lastrowid
-
-                    # If response includes generation_id, persist mapping for deterministic lifecycle
-                    try:
-                        resp_result = response_data.get('result', {}) if isinstance(response_data, dict) else {}
-                        gen_id = None
-                        if isinstance(resp_result, dict):
-                            gen_id = resp_result.get('generation_id')
-                        # Also check top-level response_data for legacy payloads
-                        if not gen_id and isinstance(response_data, dict):
-                            gen_id = response_data.get('generation_id')
-
+                    for user_id, module, timestamp, request_json, response_json, gen_id, gen_payload in records:
+                        cursor.execute(
+                            """
+                            INSERT INTO interactions (user_id, module, timestamp, request_data, response_data)
+                            VALUES (?, ?, ?, ?, ?)
+                            """,
+                            (user_id, module, timestamp, request_json, response_json)
+                        )
                         if gen_id:
                             cursor.execute(
                                 """
                                 INSERT OR REPLACE INTO generations (generation_id, user_id, interaction_id, created_at, payload)
                                 VALUES (?, ?, ?, ?, ?)
                                 """,
-                                (str(gen_id), user_id, interaction_id, timestamp, json.dumps({"request": request_data, "response": response_data}))
+                                (gen_id, user_id, cursor.lastrowid, timestamp, gen_payload)
                             )
-                    except Exception:
-                        # Do not let generation mapping failures block main transaction
-                        pass
 
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+        # Retention is amortized: only record the touched pairs here, pruning happens in sweeps
+        for record in records:
+            self._retention.record_write(record[0], record[1])
+
+    def _prune(self, pairs) -> int:
+        """Retention sweep: trim dirty (user, module) pairs and drop expired rows"""
+        policy = self._retention.policy
+        with self._lock:
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("BEGIN IMMEDIATE TRANSACTION")
+                    pruned = 0
                     # Deterministic retention: keep newest by timestamp, then id
-                    cursor.execute(
-                        """
-                        DELETE FROM interactions
-                        WHERE id IN (
-                            SELECT id FROM interactions
-                            WHERE user_id = ? AND module = ?
-                            ORDER BY timestamp DESC, id DESC
-                            LIMIT -1 OFFSET 5
+                    for user_id, module in pairs:
+                        cursor.execute(
+                            """
+                            DELETE FROM interactions
+                            WHERE id IN (
+                                SELECT id FROM interactions
+                                WHERE user_id = ? AND module = ?
+                                ORDER BY timestamp DESC, id DESC
+                                LIMIT -1 OFFSET ?
+                            )
+                            """,
+                            (user_id, module, policy.count_for(module))
                         )
-                        """,
-                        (user_id, module)
-                    )
+                        pruned += max(cursor.rowcount, 0)
+
+                    clause, params = self._expired_clause()
+                    if clause:
+                        cursor.execute(f"DELETE FROM interactions WHERE {clause}", params)
+                        pruned += max(cursor.rowcount, 0)
 
                     conn.commit()
+                    return pruned
                 except Exception:
                     conn.rollback()
                     raise
+
+    def _prune_all(self) -> int:
+        """Apply the retention policy to every (user, module) pair in one pass"""
+        with self._lock, self._pool.connection() as conn:
+            pairs = conn.execute("SELECT DISTINCT user_id, module FROM interactions").fetchall()
+        return self._prune({(row[0], row[1]) for row in pairs}) if pairs else 0
+
+    def _age_predicate(self):
+        """SQL predicate and params matching rows within their module's age limit ("" without age limits)"""
+        policy = self._retention.policy
+        if not policy.has_age_limits():
+            return "", []
+        overrides, default_cutoff = policy.cutoffs()
+        clauses, params = [], []
+        for module, cutoff in overrides.items():
+            if cutoff:
+                clauses.append("(module = ? AND timestamp >= ?)")
+                params.extend([module, cutoff])
+            else:
+                clauses.append("module = ?")
+                params.append(module)
+        others = f"module NOT IN ({', '.join('?' for _ in overrides)})" if overrides else ""
+        params.extend(overrides)
+        if default_cutoff:
+            clauses.append(f"({others} AND timestamp >= ?)" if others else "timestamp >= ?")
+            params.append(default_cutoff)
+        elif others:
+            clauses.append(others)
+        return " OR ".join(clauses), params
+
+    def _live_clause(self):
+        predicate, params = self._age_predicate()
+        return (f" AND ({predicate})", params) if predicate else ("", [])
+
+    def _expired_clause(self):
+        predicate, params = self._age_predicate()
+        return (f"NOT ({predicate})", params) if predicate else ("", [])
+
+    @property
+    def retention_policy(self) -> RetentionPolicy:
+        return self._retention.policy
+
+    def retention_stats(self) -> Dict[str, Any]:
+        """Retention sweep metrics (sweeps run, rows pruned per sweep and in total)"""
+        return self._retention.stats()
+
+    def sweep_retention(self) -> int:
+        """Run a retention sweep immediately; returns rows pruned"""
+        return self._retention.sweep()
+
+    def _writer_loop(self):
+        """Background writer: drain the queue in batches of up to ``batch_size`` or ``flush_interval`` seconds"""
+        while True:
+            record = self._queue.get()
+            if record is _STOP:
+                self._queue.task_done()
+                return
+            if record is _WAKE:
+                self._queue.task_done()
+                if self._queue.empty():
+                    self._flush_requested.clear()
+                continue
+            batch = [record]
+            stop = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    if self._flush_requested.is_set():
+                        # A reader is waiting: take what is already queued without lingering
+                        record = self._queue.get_nowait()
+                    else:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        record = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if record is _WAKE:
+                    # The flush flag is set, so the rest of the queue is taken without waiting
+                    self._queue.task_done()
+                    continue
+                if record is _STOP:
+                    stop = True
+                    break
+                batch.append(record)
+
+            try:
+                self._persist_batch(batch)
+            finally:
+                with self._pending_lock:
+                    for record in batch:
+                        self._pending[record[0]] -= 1
+                        if self._pending[record[0]] <= 0:
+                            del self._pending[record[0]]
+                for _ in batch:
+                    self._queue.task_done()
+                if self._queue.empty():
+                    self._flush_requested.clear()
+
+            if stop:
+                self._queue.task_done()
+                return
+
+    def _persist_batch(self, batch: List[tuple]):
+        """Write a queued batch, retrying transient failures; a row is dropped only if it fails on its own"""
+        for attempt in range(_WRITE_ATTEMPTS):
+            try:
+                self._write_batch(batch)
+                return
+            except Exception:
+                logger.warning("Write-behind flush of %d interactions failed (attempt %d)",
+                               len(batch), attempt + 1, exc_info=True)
+                if attempt + 1 < _WRITE_ATTEMPTS:
+                    time.sleep(_WRITE_RETRY_DELAY * (attempt + 1))
+        # Isolate the failing rows so one bad record does not take the whole batch with it
+        dropped = 0
+        for record in batch:
+            try:
+                self._write_batch([record])
+            except Exception:
+                dropped += 1
+                logger.exception("Write-behind dropped an interaction for user %s", record[0])
+        if dropped:
+            logger.error("Write-behind dropped %d of %d interactions", dropped, len(batch))
+
+    def flush(self):
+        """Block until every queued interaction has been written (no-op without write-behind)"""
+        if not self.write_behind:
+            return
+        self._flush_requested.set()
+        try:
+            # Wake a writer that is lingering for more records; a full queue means it is already busy
+            self._queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+        self._queue.join()
+
+    def _sync_pending(self, user_id: Optional[str] = None):
+        """Read-your-writes: flush first if the reader (or anyone, when user_id is None) has queued writes"""
+        if not self.write_behind:
+            return
+        with self._pending_lock:
+            pending = self._pending.get(user_id, 0) if user_id is not None else sum(self._pending.values())
+        if pending:
+            self.flush()
     
-    def get_user_history(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get full interaction history for a user"""
-        with sqlite3.connect(self.db_path, timeout=30) as conn:
-            self._ensure_table_exists(conn)
-            cursor = conn.execute(
-                """
-                SELECT module, timestamp, request_data, response_data
+    def get_user_history(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get interaction history for a user (newest first), optionally paginated and filtered by module"""
+        return self.get_history_page(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)["items"]
+
+    def get_history_page(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Keyset-paginated history: returns ``{"items": [...], "next_cursor": str | None}``
+
+        Only ``limit + 1`` rows are read per page; ``next_cursor`` is ``None`` on
+        the last page. ``fields`` limits the keys of each item (and the columns
+        selected); payloads are decoded lazily either way. Raises ``ValueError``
+        for a malformed cursor or an unknown field.
+        """
+        fields = resolve_fields(fields)
+        payloads, columns = sql_columns(fields)
+        self._sync_pending(user_id)
+        after = decode_cursor(cursor) if cursor else None
+        if after and self._retention.unswept(user_id):
+            # Per-module limits are counted from the newest row, so later pages need surplus rows pruned
+            self._retention.sweep()
+
+        live, params = self._live_clause()
+        where = f"user_id = ?{live}"
+        params = [user_id, *params]
+        if modules:
+            where += f" AND module IN ({', '.join('?' for _ in modules)})"
+            params.extend(modules)
+        if after:
+            where += " AND (timestamp < ? OR (timestamp = ? AND id < ?))"
+            params.extend([after[0], after[0], after[1]])
+        # Over-fetch by unswept writes (first page) and one row to detect further pages
+        fetch = -1 if limit is None else limit + 1 + (0 if after else self._retention.unswept(user_id))
+
+        with self._reading(), self._pool.connection() as conn:
+            rows = conn.execute(
+                f"""
+                SELECT id, module, timestamp{columns}
                 FROM interactions
-                WHERE user_id = ?
+                WHERE {where}
                 ORDER BY timestamp DESC, id DESC
+                LIMIT ?
             """,
-                (user_id,)
-            )
+                (*params, fetch)
+            ).fetchall()
 
-            return [
-                {
-                    "module": row[0],
-                    "timestamp": row[1],
-                    "request": json.loads(row[2]),
-                    "response": json.loads(row[3])
-                }
-                for row in cursor.fetchall()
-            ]
+        visible = list(self._retention.policy.visible(rows, lambda r: r[1], None if limit is None else limit + 1))
+        next_cursor = None
+        if limit is not None and len(visible) > limit:
+            visible = visible[:limit]
+            next_cursor = encode_cursor(visible[-1][2], visible[-1][0])
+
+        return {
+            "items": [from_columns(fields, row[1], row[2], payloads, row[3:]) for row in visible],
+            "next_cursor": next_cursor
+        }
     
-    def get_context(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
-        """Get recent context (last N interactions) for a user"""
-        with sqlite3.connect(self.db_path, timeout=30) as conn:
-            self._ensure_table_exists(conn)
+    def get_context(self, user_id: str, limit: int = 3,
+                    fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get recent context (last N interactions) for a user, optionally projected to ``fields``"""
+        fields = resolve_fields(fields)
+        payloads, columns = sql_columns(fields)
+        self._sync_pending(user_id)
+        live, params = self._live_clause()
+        # Over-fetch by the user's unswept writes: at most that many rows can be over their module's limit
+        fetch = limit + self._retention.unswept(user_id)
+        with self._reading(), self._pool.connection() as conn:
             cursor = conn.execute(
-                """
-                SELECT module, timestamp, request_data, response_data
+                f"""
+                SELECT module, timestamp{columns}
                 FROM interactions
-                WHERE user_id = ?
+                WHERE user_id = ?{live}
                 ORDER BY timestamp DESC, id DESC
                 LIMIT ?
             """,
-                (user_id, limit)
+                (user_id, *params, fetch)
             )
 
             return [
-                {
-                    "module": row[0],
-                    "timestamp": row[1],
-                    "request": json.loads(row[2]),
-                    "response": json.loads(row[3])
-                }
-                for row in cursor.fetchall()
+                from_columns(fields, row[0], row[1], payloads, row[2:])
+                for row in self._retention.policy.visible(cursor.fetchall(), lambda r: r[0], limit)
             ]
 
     def get_generation(self, generation_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve stored generation mapping and associated interaction payload."""
-        with sqlite3.connect(self.db_path, timeout=30) as conn:
-            self._ensure_table_exists(conn)
+        self._sync_pending()
+        with self._reading(), self._pool.connection() as conn:
             cursor = conn.execute(
                 """
                 SELECT generation_id, user_id, interaction_id, created_at, payload
@@ -214,7 +468,7 @@ class ContextMemory:
             row = cursor.fetchone()
             if not row:
                 return None
-            payload = json.loads(row[4]) if row[4] else None
+            payload = serialization.loads(row[4]) if row[4] else None
             # Fetch the interaction record if available
             inter = None
             if row[2]:
@@ -228,12 +482,8 @@ class ContextMemory:
                 )
                 r2 = c2.fetchone()
                 if r2:
-                    inter = {
-                        "module": r2[0],
-                        "timestamp": r2[1],
-                        "request": json.loads(r2[2]),
-                        "response": json.loads(r2[3])
-                    }
+                    inter = InteractionRow({"module": r2[0], "timestamp": r2[1]},
+                                           {"request": r2[2], "response": r2[3]})
 
             return {
                 "generation_id": row[0],
@@ -1,6 +1,11 @@
+import asyncio
+import base64
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional
 from .memory import ContextMemory
+from .pagination import decode_cursor, encode_cursor
+from .retention import RetentionPolicy
+from .rows import project, resolve_fields
 from ..utils.noopur_client import NoopurClient
 from config.config import INTEGRATOR_USE_NOOPUR
 
@@ -18,26 +23,101 @@ class MemoryAdapter(ABC):
         pass
 
     @abstractmethod
-    def get_user_history(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_history(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
         pass
 
     @abstractmethod
-    def get_context(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+    def get_history_page(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Return ``{"items": [...], "next_cursor": str | None}`` newest first (keyset on timestamp, id).
+
+        ``fields`` restricts each item to a subset of module/timestamp/request/response.
+        """
         pass
 
+    @abstractmethod
+    def get_context(self, user_id: str, limit: int = 3,
+                    fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        pass
+
+    def store_interactions(self, interactions: Iterable[tuple]) -> List[Any]:
+        """Store ``(user_id, request_data, response_data)`` interactions; returns each stored record.
+
+        The default stores them one by one; adapters that can write several in one
+        transaction override it.
+        """
+        return [self.store_interaction(*interaction) for interaction in interactions]
+
+    # Async variants used by Gateway.process_request_async. The defaults offload the
+    # blocking implementation to a worker thread; adapters with native async I/O may override.
+    async def store_interaction_async(self, user_id: str, request_data: Dict[str, Any], response_data: Dict[str, Any]):
+        return await asyncio.to_thread(self.store_interaction, user_id, request_data, response_data)
+
+    async def store_interactions_async(self, interactions: Iterable[tuple]) -> List[Any]:
+        return await asyncio.to_thread(self.store_interactions, list(interactions))
+
+    async def get_user_history_async(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                                     modules: Optional[List[str]] = None,
+                                     fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_user_history, user_id, limit, cursor, modules, fields)
+
+    async def get_history_page_async(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                                     modules: Optional[List[str]] = None,
+                                     fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_history_page, user_id, limit, cursor, modules, fields)
+
+    async def get_context_async(self, user_id: str, limit: int = 3,
+                                fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_context, user_id, limit, fields)
+
 
 class SQLiteAdapter(MemoryAdapter):
-    def __init__(self, db_path: str = "data/context.db"):
-        self._mem = ContextMemory(db_path)
+    def __init__(self, db_path: str = "data/context.db", write_behind: bool = False,
+                 batch_size: int = 100, flush_interval: float = 0.05, queue_size: int = 10000,
+                 retention_policy: Optional[RetentionPolicy] = None, sweep_every: int = 100,
+                 sweep_interval: Optional[float] = None):
+        self._mem = ContextMemory(db_path, write_behind=write_behind, batch_size=batch_size,
+                                  flush_interval=flush_interval, queue_size=queue_size,
+                                  retention_policy=retention_policy, sweep_every=sweep_every,
+                                  sweep_interval=sweep_interval)
+
+    def retention_stats(self) -> Dict[str, Any]:
+        return self._mem.retention_stats()
+
+    def flush(self):
+        """Wait for queued write-behind interactions to be persisted."""
+        self._mem.flush()
+
+    def close(self):
+        """Flush queued writes and release the underlying connections."""
+        self._mem.close()
 
     def store_interaction(self, user_id: str, request_data: Dict[str, Any], response_data: Dict[str, Any]):
-        self._mem.store_interaction(user_id, request_data, response_data)
+        return self._mem.store_interaction(user_id, request_data, response_data)
+
+    def store_interactions(self, interactions: Iterable[tuple]) -> List[Any]:
+        return self._mem.store_interactions(interactions)
+
+    @property
+    def retention_policy(self) -> RetentionPolicy:
+        return self._mem.retention_policy
 
-    def get_user_history(self, user_id: str) -> List[Dict[str, Any]]:
-        return self._mem.get_user_history(user_id)
+    def get_user_history(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return self._mem.get_user_history(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)
 
-    def get_context(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
-        return self._mem.get_context(user_id, limit)
+    def get_history_page(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        return self._mem.get_history_page(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)
+
+    def get_context(self, user_id: str, limit: int = 3,
+                    fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return self._mem.get_context(user_id, limit, fields=fields)
 
 
 class RemoteNoopurAdapter(MemoryAdapter):
@@ -98,44 +178,73 @@ class RemoteNoopurAdapter(MemoryAdapter):
 
         return None
 
-    def get_user_history(self, user_id: str) -> List[Dict[str, Any]]:
+    def get_user_history(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        return self.get_history_page(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)["items"]
+
+    def get_history_page(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
         # Try fetching history from Noopur and map to local shape
-        if not self.client:
-            return []
+        fields = resolve_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+        empty = {"items": [], "next_cursor": None}
+        if not self.client or (modules and "creator" not in modules):
+            return empty
         try:
-            items = self.client.history()
-            # API returns a list of generations: {id, text, score, created_at}
-            mapped = [
-                {
-                    "module": "creator",
-                    "timestamp": it.get("created_at") or it.get("timestamp"),
-                    "request": {"prompt": None},
-                    "response": {"generated_text": it.get("text"), "score": it.get("score"), "id": it.get("id")}
-                }
-                for it in items
-            ]
-            # Sort by timestamp desc, fallback to id desc
-            mapped.sort(key=lambda x: (x.get("timestamp") or "", x["response"].get("id") or 0), reverse=True)
-            return mapped
+            # Filtered, limited and positioned server-side, so each page reads only its own rows
+            items, server_cursor = self.client.history_page(
+                user_id=user_id, limit=limit, cursor=self._server_cursor(after) if after else None
+            )
+            mapped = self._map(items)
+            next_cursor = self._local_cursor(server_cursor) if limit is not None and server_cursor else None
         except Exception:
-            return []
+            return empty
+        return {"items": [project(m, fields) for m in mapped[:limit]], "next_cursor": next_cursor}
 
-    def get_context(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+    def get_context(self, user_id: str, limit: int = 3,
+                    fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
         # Fetch recent generations from Noopur and return top-N as context
+        fields = resolve_fields(fields)
         if not self.client:
             return []
         try:
-            items = self.client.history()
-            mapped = [
-                {
-                    "module": "creator",
-                    "timestamp": it.get("created_at") or it.get("timestamp"),
-                    "request": {"prompt": None},
-                    "response": {"generated_text": it.get("text"), "score": it.get("score"), "id": it.get("id")}
-                }
-                for it in items
-            ]
-            mapped.sort(key=lambda x: (x.get("timestamp") or "", x["response"].get("id") or 0), reverse=True)
-            return mapped[:limit]
+            return [project(m, fields) for m in self._fetch(user_id, limit)[:limit]]
         except Exception:
             return []
+
+    def _fetch(self, user_id: str, limit: Optional[int]) -> List[Dict[str, Any]]:
+        """The user's newest generations from Noopur (``/history?user_id=&limit=``) in local shape."""
+        return self._map(self.client.history(user_id=user_id, limit=limit))
+
+    def _map(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # API returns a list of generations: {id, text, score, created_at}
+        mapped = [
+            {
+                "module": "creator",
+                "timestamp": it.get("created_at") or it.get("timestamp"),
+                "request": {"prompt": None},
+                "response": {"generated_text": it.get("text"), "score": it.get("score"), "id": it.get("id")}
+            }
+            for it in items
+        ]
+        # Already newest first server-side; sorting keeps older Noopur deployments correct
+        mapped.sort(key=self._sort_key, reverse=True)
+        return mapped
+
+    @staticmethod
+    def _local_cursor(server_cursor: str) -> str:
+        """Wrap CreatorCore's cursor (base64 ``created_at|id``, created_at as stored) as a local cursor."""
+        key, gen_id = base64.urlsafe_b64decode(server_cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return encode_cursor(key, int(gen_id))
+
+    @staticmethod
+    def _server_cursor(after) -> str:
+        key, gen_id = after
+        return base64.urlsafe_b64encode(f"{key}|{gen_id}".encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _sort_key(item: Dict[str, Any]):
+        # Sort by timestamp desc, fallback to id desc
+        return (item.get("timestamp") or "", item["response"].get("id") or 0)
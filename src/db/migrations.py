@@ -0,0 +1,94 @@
+"""Versioned schema migrations for the ContextMemory SQLite database.
+
+Migrations run once when ``ContextMemory`` is constructed; the applied version
+is recorded in ``schema_version`` so the hot read/write paths never issue DDL.
+Append new migrations to ``MIGRATIONS`` with the next version number; never
+edit a migration that has already shipped.
+"""
+import sqlite3
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+
+def _initial_schema(conn: sqlite3.Connection):
+    # Create table with module column
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS interactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            module TEXT NOT NULL,
+            timestamp TEXT NOT NULL,
+            request_data TEXT NOT NULL,
+            response_data TEXT NOT NULL
+        )
+    """)
+    # Generations table records canonical mapping from external generation_id -> interaction
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS generations (
+            generation_id TEXT PRIMARY KEY,
+            user_id TEXT,
+            interaction_id INTEGER,
+            created_at TEXT,
+            payload TEXT
+        )
+    """)
+
+    # Check if module column exists (databases created before the module column)
+    cursor = conn.execute("PRAGMA table_info(interactions)")
+    columns = [row[1] for row in cursor.fetchall()]
+    if 'module' not in columns:
+        conn.execute("ALTER TABLE interactions ADD COLUMN module TEXT DEFAULT 'unknown'")
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_module_timestamp 
+        ON interactions(user_id, module, timestamp DESC)
+    """)
+
+
+def _history_keyset_index(conn: sqlite3.Connection):
+    # Serves cross-module history pages ordered by (timestamp, id) with keyset cursors
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_user_timestamp_id
+        ON interactions(user_id, timestamp DESC, id DESC)
+    """)
+
+
+MIGRATIONS: List[Tuple[int, Callable[[sqlite3.Connection], None]]] = [
+    (1, _initial_schema),
+    (2, _history_keyset_index),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return (row[0] if row else None) or 0
+
+
+def apply_migrations(conn: sqlite3.Connection) -> int:
+    """Apply pending migrations in one transaction and return the resulting version."""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    # BEGIN IMMEDIATE so concurrent processes starting up do not apply the same migration twice
+    conn.execute("BEGIN IMMEDIATE TRANSACTION")
+    try:
+        version = current_version(conn)
+        for target, migrate in MIGRATIONS:
+            if target <= version:
+                continue
+            migrate(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, applied_at) VALUES (?, ?)",
+                (target, datetime.now().isoformat())
+            )
+            version = target
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return version
@@ -1,13 +1,19 @@
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import Iterable, List, Dict, Any, Optional
 import json
 
+from .pagination import decode_cursor, encode_cursor
+from .retention import RetentionEngine, RetentionPolicy
+from .rows import INTERACTION_FIELDS, PAYLOAD_COLUMNS, resolve_fields
+
 try:
     from pymongo import MongoClient
     from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
+    from bson import ObjectId
     PYMONGO_AVAILABLE = True
 except ImportError:
     MongoClient = None
+    ObjectId = None
     ConnectionFailure = Exception
     ServerSelectionTimeoutError = Exception
     PYMONGO_AVAILABLE = False
@@ -15,7 +21,9 @@ except ImportError:
 class MongoDBAdapter:
     """MongoDB adapter for storing user interactions in MongoDB Atlas"""
     
-    def __init__(self, connection_string: str = None, database_name: str = "core_integrator"):
+    def __init__(self, connection_string: str = None, database_name: str = "core_integrator",
+                 retention_policy: Optional[RetentionPolicy] = None, sweep_every: int = 100,
+                 sweep_interval: Optional[float] = None):
         if not PYMONGO_AVAILABLE:
             raise RuntimeError("pymongo not installed; cannot use MongoDB adapter")
         
@@ -28,12 +36,20 @@ class MongoDBAdapter:
         
         # Create index for efficient queries
         self.collection.create_index([("user_id", 1), ("module", 1), ("timestamp", -1)])
+        # Keyset pagination over a user's history across modules
+        self.collection.create_index([("user_id", 1), ("timestamp", -1), ("_id", -1)])
         
         # Test connection
         try:
             self.client.admin.command('ping')
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
             raise ConnectionError(f"Failed to connect to MongoDB: {e}")
+
+        # Retention is pruned in sweeps rather than with an aggregate + delete_many per insert
+        self._retention = RetentionEngine(
+            retention_policy or RetentionPolicy(), self._prune,
+            sweep_every=sweep_every, sweep_interval=sweep_interval
+        )
     
     def store_interaction(self, user_id: str, request_data: Dict[str, Any], response_data: Dict[str, Any]):
         """Store a request-response interaction"""
@@ -49,25 +65,31 @@ class MongoDBAdapter:
         }
         
         self.collection.insert_one(document)
-        
-        # Retention: keep only latest 5 interactions per user per module
-        pipeline = [
-            {"$match": {"user_id": user_id, "module": module}},
-            {"$sort": {"timestamp": -1, "_id": -1}},
-            {"$skip": 5}
-        ]
-        
-        old_docs = list(self.collection.aggregate(pipeline))
-        if old_docs:
-            old_ids = [doc["_id"] for doc in old_docs]
-            self.collection.delete_many({"_id": {"$in": old_ids}})
-    
-    def get_user_history(self, user_id: str) -> List[Dict[str, Any]]:
-        """Get full interaction history for a user"""
-        cursor = self.collection.find(
-            {"user_id": user_id}
-        ).sort([("timestamp", -1), ("_id", -1)])
-        
+        self._retention.record_write(user_id, module)
+        return {
+            "module": module,
+            "timestamp": timestamp,
+            "request": request_data,
+            "response": response_data
+        }
+
+    def store_interactions(self, interactions) -> List[Dict[str, Any]]:
+        """Store ``(user_id, request_data, response_data)`` interactions with one ``insert_many``"""
+        documents = []
+        for user_id, request_data, response_data in interactions:
+            documents.append({
+                "user_id": user_id,
+                "module": request_data.get("module", "unknown"),
+                "timestamp": datetime.now().isoformat(),
+                "request_data": request_data,
+                "response_data": response_data
+            })
+        if not documents:
+            return []
+        # Unordered: documents are independent, so one failure does not stop the rest
+        self.collection.insert_many(documents, ordered=False)
+        for doc in documents:
+            self._retention.record_write(doc["user_id"], doc["module"])
         return [
             {
                 "module": doc["module"],
@@ -75,21 +97,129 @@ class MongoDBAdapter:
                 "request": doc["request_data"],
                 "response": doc["response_data"]
             }
-            for doc in cursor
+            for doc in documents
         ]
+
+    def _prune(self, pairs) -> int:
+        """Retention sweep: trim dirty (user, module) pairs and drop expired documents"""
+        policy = self._retention.policy
+        pruned = 0
+        for user_id, module in pairs:
+            # Retention: keep only the latest N interactions per user per module
+            old_docs = self.collection.find(
+                {"user_id": user_id, "module": module}, {"_id": 1}
+            ).sort([("timestamp", -1), ("_id", -1)]).skip(policy.count_for(module))
+            old_ids = [doc["_id"] for doc in old_docs]
+            if old_ids:
+                pruned += self.collection.delete_many({"_id": {"$in": old_ids}}).deleted_count
+
+        live = self._live_filter()
+        if live:
+            pruned += self.collection.delete_many({"$nor": [live]}).deleted_count
+        return pruned
+
+    def _live_filter(self) -> Optional[Dict[str, Any]]:
+        """Query filter matching documents within their module's age limit (None without age limits)"""
+        policy = self._retention.policy
+        if not policy.has_age_limits():
+            return None
+        overrides, default_cutoff = policy.cutoffs()
+        clauses = [
+            {"module": module, "timestamp": {"$gte": cutoff}} if cutoff else {"module": module}
+            for module, cutoff in overrides.items()
+        ]
+        others: Dict[str, Any] = {"module": {"$nin": list(overrides)}} if overrides else {}
+        if default_cutoff:
+            clauses.append({**others, "timestamp": {"$gte": default_cutoff}})
+        elif others:
+            clauses.append(others)
+        return {"$or": clauses}
+
+    def _user_filter(self, user_id: str) -> Dict[str, Any]:
+        live = self._live_filter()
+        return {"$and": [{"user_id": user_id}, live]} if live else {"user_id": user_id}
+
+    @property
+    def retention_policy(self) -> RetentionPolicy:
+        return self._retention.policy
+
+    def retention_stats(self) -> Dict[str, Any]:
+        """Retention sweep metrics (sweeps run, rows pruned per sweep and in total)"""
+        return self._retention.stats()
+
+    def sweep_retention(self) -> int:
+        """Run a retention sweep immediately; returns documents pruned"""
+        return self._retention.sweep()
+    
+    def get_user_history(self, user_id: str, limit: Optional[int] = None, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get interaction history for a user (newest first), optionally paginated and filtered by module"""
+        return self.get_history_page(user_id, limit=limit, cursor=cursor, modules=modules, fields=fields)["items"]
+
+    def get_history_page(self, user_id: str, limit: Optional[int] = 10, cursor: Optional[str] = None,
+                         modules: Optional[List[str]] = None,
+                         fields: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Keyset-paginated history: returns ``{"items": [...], "next_cursor": str | None}``"""
+        fields = resolve_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+        if after and self._retention.unswept(user_id):
+            # Per-module limits are counted from the newest document, so later pages need surplus pruned
+            self._retention.sweep()
+
+        query = self._user_filter(user_id)
+        clauses = [query]
+        if modules:
+            clauses.append({"module": {"$in": list(modules)}})
+        if after:
+            timestamp, doc_id = after
+            doc_id = ObjectId(doc_id) if ObjectId is not None and ObjectId.is_valid(doc_id) else doc_id
+            clauses.append({"$or": [
+                {"timestamp": {"$lt": timestamp}},
+                {"timestamp": timestamp, "_id": {"$lt": doc_id}}
+            ]})
+        if len(clauses) > 1:
+            query = {"$and": clauses}
+
+        docs = self._find(query, fields).sort([("timestamp", -1), ("_id", -1)])
+        if limit is not None:
+            docs = docs.limit(limit + 1 + (0 if after else self._retention.unswept(user_id)))
+
+        visible = list(self._retention.policy.visible(docs, lambda d: d["module"], None if limit is None else limit + 1))
+        next_cursor = None
+        if limit is not None and len(visible) > limit:
+            visible = visible[:limit]
+            next_cursor = encode_cursor(visible[-1]["timestamp"], str(visible[-1]["_id"]))
+
+        return {
+            "items": [self._to_item(doc, fields) for doc in visible],
+            "next_cursor": next_cursor
+        }
     
-    def get_context(self, user_id: str, limit: int = 3) -> List[Dict[str, Any]]:
-        """Get recent context (last N interactions) for a user"""
-        cursor = self.collection.find(
-            {"user_id": user_id}
-        ).sort([("timestamp", -1), ("_id", -1)]).limit(limit)
+    def get_context(self, user_id: str, limit: int = 3,
+                    fields: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Get recent context (last N interactions) for a user, optionally projected to ``fields``"""
+        fields = resolve_fields(fields)
+        # Over-fetch by the user's unswept writes: at most that many documents exceed their module's limit
+        fetch = limit + self._retention.unswept(user_id)
+        cursor = self._find(
+            self._user_filter(user_id), fields
+        ).sort([("timestamp", -1), ("_id", -1)]).limit(fetch)
         
         return [
-            {
-                "module": doc["module"],
-                "timestamp": doc["timestamp"],
-                "request": doc["request_data"],
-                "response": doc["response_data"]
-            }
-            for doc in cursor
-        ]
\ No newline at end of file
+            self._to_item(doc, fields)
+            for doc in self._retention.policy.visible(cursor, lambda d: d["module"], limit)
+        ]
+
+    def _find(self, query: Dict[str, Any], fields):
+        """``find`` that only transfers the payload fields the caller asked for"""
+        if fields == INTERACTION_FIELDS:
+            return self.collection.find(query)
+        # module/timestamp/_id are always needed for retention and cursors
+        projection = {"module": 1, "timestamp": 1}
+        projection.update({PAYLOAD_COLUMNS[key]: 1 for key in fields if key in PAYLOAD_COLUMNS})
+        return self.collection.find(query, projection)
+
+    @staticmethod
+    def _to_item(doc: Dict[str, Any], fields) -> Dict[str, Any]:
+        return {key: doc[PAYLOAD_COLUMNS.get(key, key)] for key in fields}
@@ -0,0 +1,25 @@
+"""Opaque keyset cursors for history pagination.
+
+A cursor encodes the ``(timestamp, id)`` of the last row on a page; the next
+page continues strictly after it in ``timestamp DESC, id DESC`` order.
+"""
+import base64
+import json
+from typing import Any, Tuple
+
+
+def encode_cursor(timestamp: str, row_id: Any) -> str:
+    raw = json.dumps([timestamp, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Any]:
+    """Return ``(timestamp, id)``; raises ``ValueError`` for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Invalid history cursor: {e}")
+    if not isinstance(timestamp, str):
+        raise ValueError("Invalid history cursor: timestamp must be a string")
+    return timestamp, row_id
@@ -0,0 +1,166 @@
+"""Amortized retention for interaction storage.
+
+Instead of deleting surplus rows on every insert, adapters record which
+(user, module) pairs were written and a ``RetentionEngine`` prunes them in
+sweeps, either every ``sweep_every`` writes or on a background timer. Reads
+stay exact in between sweeps: adapters over-fetch by the user's unswept write
+count, exclude expired rows in the query and apply ``RetentionPolicy.visible``.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Pair = Tuple[str, str]
+
+
+class RetentionPolicy:
+    """Per-module retention limits.
+
+    ``max_count`` keeps the newest N interactions per (user, module);
+    ``max_age_seconds`` drops interactions older than the given age (``None``
+    disables it). ``module_overrides`` maps a module name to a dict with either
+    key to override the defaults for that module.
+    """
+
+    def __init__(self, max_count: int = 5, max_age_seconds: Optional[float] = None,
+                 module_overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.max_count = max_count
+        self.max_age_seconds = max_age_seconds
+        self.module_overrides = module_overrides or {}
+
+    def count_for(self, module: str) -> int:
+        return self.module_overrides.get(module, {}).get("max_count", self.max_count)
+
+    def age_for(self, module: str) -> Optional[float]:
+        return self.module_overrides.get(module, {}).get("max_age_seconds", self.max_age_seconds)
+
+    def cutoffs(self, now: Optional[datetime] = None) -> Tuple[Dict[str, Optional[str]], Optional[str]]:
+        """Return ``(per-module cutoffs, default cutoff)`` as ISO timestamps; ``None`` means no age limit."""
+        now = now or datetime.now()
+
+        def cutoff(age: Optional[float]) -> Optional[str]:
+            return (now - timedelta(seconds=age)).isoformat() if age else None
+
+        overrides = {
+            module: cutoff(self.age_for(module))
+            for module, limits in self.module_overrides.items()
+            if "max_age_seconds" in limits
+        }
+        return overrides, cutoff(self.max_age_seconds)
+
+    def has_age_limits(self) -> bool:
+        return bool(self.max_age_seconds) or any(
+            limits.get("max_age_seconds") for limits in self.module_overrides.values()
+        )
+
+    def visible(self, rows: Iterable[Any], module_of: Callable[[Any], str], limit: Optional[int] = None) -> Iterator[Any]:
+        """Yield rows (newest first) that are within their module's count limit."""
+        seen: Counter = Counter()
+        emitted = 0
+        for row in rows:
+            if limit is not None and emitted >= limit:
+                return
+            module = module_of(row)
+            seen[module] += 1
+            if seen[module] > self.count_for(module):
+                continue
+            emitted += 1
+            yield row
+
+
+class RetentionEngine:
+    """Batches retention pruning for an adapter.
+
+    ``prune`` receives the set of dirty (user, module) pairs and must return the
+    number of rows it deleted (including age-expired rows).
+    """
+
+    def __init__(self, policy: RetentionPolicy, prune: Callable[[Set[Pair]], int],
+                 sweep_every: int = 100, sweep_interval: Optional[float] = None):
+        self.policy = policy
+        self._prune = prune
+        self.sweep_every = max(1, sweep_every)
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self._dirty: Set[Pair] = set()
+        self._unswept: Counter = Counter()
+        self._writes_since_sweep = 0
+        self._stats = {"sweeps": 0, "rows_pruned_total": 0, "last_sweep": None}
+
+        self._stop = threading.Event()
+        self._timer: Optional[threading.Thread] = None
+        if sweep_interval:
+            self._timer = threading.Thread(
+                target=self._run_timer, args=(sweep_interval,), name="retention-sweeper", daemon=True
+            )
+            self._timer.start()
+
+    def record_write(self, user_id: str, module: str):
+        """O(1) bookkeeping for a stored interaction; sweeps once ``sweep_every`` writes accumulate."""
+        with self._lock:
+            self._dirty.add((user_id, module))
+            self._unswept[user_id] += 1
+            self._writes_since_sweep += 1
+            due = self._writes_since_sweep >= self.sweep_every
+        if due:
+            self.sweep()
+
+    def unswept(self, user_id: str) -> int:
+        """Writes for ``user_id`` not yet covered by a sweep (upper bound on its surplus rows)."""
+        with self._lock:
+            return self._unswept.get(user_id, 0)
+
+    def sweep(self) -> int:
+        """Prune all dirty pairs now; returns the number of rows deleted."""
+        with self._sweep_lock:
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                unswept = dict(self._unswept)
+                self._writes_since_sweep = 0
+
+            started = time.perf_counter()
+            try:
+                pruned = self._prune(dirty)
+            except Exception:
+                logger.exception("Retention sweep failed")
+                with self._lock:
+                    self._dirty |= dirty
+                return 0
+
+            with self._lock:
+                for user_id, count in unswept.items():
+                    self._unswept[user_id] -= count
+                    if self._unswept[user_id] <= 0:
+                        del self._unswept[user_id]
+                self._stats["sweeps"] += 1
+                self._stats["rows_pruned_total"] += pruned
+                self._stats["last_sweep"] = {
+                    "pairs": len(dirty),
+                    "rows_pruned": pruned,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "timestamp": datetime.now().isoformat(),
+                }
+            if pruned:
+                logger.info("Retention sweep pruned %d rows across %d pairs", pruned, len(dirty))
+            return pruned
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "pending_pairs": len(self._dirty),
+                "writes_since_sweep": self._writes_since_sweep,
+            }
+
+    def stop(self):
+        self._stop.set()
+
+    def _run_timer(self, interval: float):
+        while not self._stop.wait(interval):
+            if self._dirty or self.policy.has_age_limits():
+                self.sweep()
@@ -0,0 +1,153 @@
+"""Interaction rows with lazily decoded JSON payloads.
+
+SQLite stores ``request_data``/``response_data`` as JSON text. Read endpoints
+usually need only ``module``, ``timestamp`` and ``response``, so
+``InteractionRow`` keeps the raw text and decodes a payload the first time it
+is read. Callers that know which keys they need can also pass ``fields`` to the
+adapter reads so unused columns are not selected at all.
+"""
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from ..utils import serialization
+from ..utils.serialization import RawJSON
+
+INTERACTION_FIELDS = ("module", "timestamp", "request", "response")
+
+# Storage column for each lazily decoded key
+PAYLOAD_COLUMNS = {"request": "request_data", "response": "response_data"}
+
+
+def resolve_fields(fields: Optional[Iterable[str]]) -> Tuple[str, ...]:
+    """Normalize a projection to an ordered tuple of interaction keys; raises ``ValueError`` on unknown keys."""
+    if fields is None:
+        return INTERACTION_FIELDS
+    fields = tuple(fields)
+    unknown = set(fields) - set(INTERACTION_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown interaction fields: {sorted(unknown)}")
+    return tuple(f for f in INTERACTION_FIELDS if f in fields)
+
+
+def project(item: Dict[str, Any], fields: Tuple[str, ...]) -> Dict[str, Any]:
+    """Restrict an interaction dict to ``fields`` without decoding the omitted payloads."""
+    if fields == INTERACTION_FIELDS:
+        return item
+    if isinstance(item, InteractionRow):
+        return item.project(fields)
+    return {key: item[key] for key in fields if key in item}
+
+
+def sql_columns(fields: Tuple[str, ...]) -> Tuple[Tuple[str, ...], str]:
+    """Return the payload keys in ``fields`` and the matching ``", col, ..."`` SELECT suffix."""
+    payloads = tuple(key for key in fields if key in PAYLOAD_COLUMNS)
+    return payloads, "".join(f", {PAYLOAD_COLUMNS[key]}" for key in payloads)
+
+
+def from_columns(fields: Tuple[str, ...], module: str, timestamp: str, payloads: Tuple[str, ...],
+                 texts: Iterable[Optional[str]], loads: Optional[Callable[[str], Any]] = None) -> "InteractionRow":
+    """Build a row from SQL columns: ``texts`` are the raw JSON values for ``payloads``, in order."""
+    values = {}
+    if "module" in fields:
+        values["module"] = module
+    if "timestamp" in fields:
+        values["timestamp"] = timestamp
+    return InteractionRow(values, dict(zip(payloads, texts)), loads=loads)
+
+
+class InteractionRow(dict):
+    """A ``dict`` whose JSON payload values are decoded on first access.
+
+    It behaves like the plain dicts adapters used to return (indexing, ``get``,
+    iteration over items, ``json.dumps``, equality); each payload is parsed at
+    most once and only if something reads it.
+    """
+
+    __slots__ = ("_loads",)
+
+    def __init__(self, values: Dict[str, Any], raw: Optional[Dict[str, str]] = None,
+                 loads: Optional[Callable[[str], Any]] = None):
+        super().__init__(values)
+        self._loads = loads or serialization.loads
+        for key, text in (raw or {}).items():
+            dict.__setitem__(self, key, RawJSON(text) if text is not None else None)
+
+    def _decode(self, key, value):
+        if isinstance(value, RawJSON):
+            value = self._loads(value.text)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def _materialize(self):
+        for key, value in dict.items(self):
+            if isinstance(value, RawJSON):
+                self._decode(key, value)
+
+    def is_decoded(self, key: str) -> bool:
+        return not isinstance(dict.get(self, key), RawJSON)
+
+    def project(self, fields: Iterable[str]) -> "InteractionRow":
+        row = InteractionRow({}, loads=self._loads)
+        for key in fields:
+            if dict.__contains__(self, key):
+                dict.__setitem__(row, key, dict.__getitem__(self, key))
+        return row
+
+    def __iter__(self):
+        # Overriding __iter__ keeps dict(row), {**row} and update(row) off CPython's
+        # raw-storage fast path, so they read values through __getitem__
+        return dict.__iter__(self)
+
+    def __getitem__(self, key):
+        return self._decode(key, dict.__getitem__(self, key))
+
+    def get(self, key, default=None):
+        if not dict.__contains__(self, key):
+            return default
+        return self[key]
+
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+
+    def pop(self, key, *default):
+        if dict.__contains__(self, key):
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def popitem(self):
+        self._materialize()
+        return dict.popitem(self)
+
+    def setdefault(self, key, default=None):
+        if dict.__contains__(self, key):
+            return self[key]
+        return dict.setdefault(self, key, default)
+
+    def copy(self) -> Dict[str, Any]:
+        self._materialize()
+        return dict(dict.items(self))
+
+    def __eq__(self, other):
+        self._materialize()
+        if isinstance(other, InteractionRow):
+            other._materialize()
+        return dict.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        self._materialize()
+        return dict.__repr__(self)
+
+    def __reduce__(self):
+        # Pickle / deepcopy as a plain dict
+        return (dict, (self.copy(),))
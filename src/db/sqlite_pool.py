@@ -0,0 +1,63 @@
+import sqlite3
+import threading
+from typing import List, Optional
+
+
+class SQLitePool:
+    """Per-thread SQLite connection pool.
+
+    Each thread lazily opens one connection and reuses it for the lifetime of
+    the pool, so connection setup and PRAGMAs (WAL, busy_timeout) are paid once
+    per thread instead of once per query. Use the returned connection as a
+    context manager for transactions: ``with pool.connection() as conn: ...``.
+
+    ``:memory:`` databases are private to the connection that created them, so
+    for those the pool runs in shared mode: every thread receives the same
+    connection and callers must serialize access to it.
+    """
+
+    def __init__(self, db_path: str, timeout: float = 30, shared: Optional[bool] = None):
+        self.db_path = db_path
+        self.timeout = timeout
+        self.shared = db_path == ":memory:" if shared is None else shared
+        self._shared_conn: Optional[sqlite3.Connection] = None
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        if self.shared:
+            with self._lock:
+                if self._shared_conn is None:
+                    self._shared_conn = self._open()
+                    self._connections.append(self._shared_conn)
+                return self._shared_conn
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _open(self) -> sqlite3.Connection:
+        # check_same_thread=False only so close_all() can run from any thread;
+        # each connection is otherwise used exclusively by the thread that opened it.
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+        return conn
+
+    def close_all(self):
+        """Close every connection opened by this pool."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._shared_conn = None
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
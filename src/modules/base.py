@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Dict, Any, List
 
@@ -15,6 +16,10 @@ class BaseModule(ABC):
         """Process incoming data and return a plain result dict."""
         raise NotImplementedError()
 
+    async def process_async(self, data: Dict[str, Any], context: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Async entry point; runs ``process`` in a worker thread by default."""
+        return await asyncio.to_thread(self.process, data, context)
+
     def metadata(self) -> Dict[str, Any]:
         """Optional module metadata. Modules may override to provide name/version."""
         return {}
@@ -5,13 +5,100 @@ Stabilized, versioned, and schema-aware client used as the canonical CreatorCore
 """
 from __future__ import annotations
 
+import asyncio
+import logging
 import requests
+import threading
 import time
+import weakref
+from collections import Counter
 from typing import Dict, Any, Optional
 from enum import Enum
 
+from requests.adapters import HTTPAdapter
+
+from config.config import (
+    BRIDGE_ADAPTIVE_TIMEOUT,
+    BRIDGE_ASYNC_TRANSPORT,
+    BRIDGE_BREAKER_COOLDOWN_SECONDS,
+    BRIDGE_BREAKER_FAILURE_THRESHOLD,
+    BRIDGE_BREAKER_HALF_OPEN_PROBES,
+    BRIDGE_TIMEOUT_MIN_SECONDS,
+    BRIDGE_TIMEOUT_MULTIPLIER,
+    BRIDGE_TIMEOUT_PERCENTILE,
+    CONNECTION_POOL_HOSTS,
+    CONNECTION_POOL_SIZE,
+    UPSTREAM_GET_CACHE_MAX_ENTRIES,
+    UPSTREAM_GET_CACHE_TTL_SECONDS,
+)
+from .circuit_breaker import HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker
+from .single_flight import SingleFlight
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 VERSION = "1.0.0"
 
+logger = logging.getLogger(__name__)
+
+# One keep-alive pool per process: every BridgeClient session mounts the same adapter,
+# and async calls share one httpx client per event loop
+_pool_lock = threading.Lock()
+_shared_adapter: Optional[HTTPAdapter] = None
+_async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def shared_http_adapter() -> HTTPAdapter:
+    """Process-wide ``requests`` adapter (urllib3 pool) used by every BridgeClient."""
+    global _shared_adapter
+    with _pool_lock:
+        if _shared_adapter is None:
+            _shared_adapter = HTTPAdapter(pool_connections=CONNECTION_POOL_HOSTS, pool_maxsize=CONNECTION_POOL_SIZE)
+        return _shared_adapter
+
+
+def _new_async_client():
+    limits = httpx.Limits(
+        max_connections=CONNECTION_POOL_SIZE * CONNECTION_POOL_HOSTS,
+        max_keepalive_connections=CONNECTION_POOL_SIZE,
+    )
+    return httpx.AsyncClient(limits=limits)
+
+
+def shared_async_client():
+    """The httpx client for the running event loop (httpx clients cannot be shared across loops)."""
+    loop = asyncio.get_running_loop()
+    with _pool_lock:
+        client = _async_clients.get(loop)
+        if client is None:
+            client = _async_clients[loop] = _new_async_client()
+        return client
+
+
+async def close_shared_async_client():
+    """Close the running loop's pooled httpx client, e.g. on application shutdown."""
+    with _pool_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+_warned_no_httpx = False
+
+
+def _resolve_async_transport(name: Optional[str]) -> str:
+    global _warned_no_httpx
+    name = (name or "auto").lower()
+    if name in ("auto", "httpx") and httpx is not None:
+        return "httpx"
+    if name in ("auto", "httpx") and not _warned_no_httpx:
+        # Once per process: every BridgeClient resolves its transport
+        _warned_no_httpx = True
+        logger.warning("httpx not installed; BridgeClient async calls fall back to worker threads")
+    return "thread"
+
 
 class ErrorType(Enum):
     NETWORK = "network"
@@ -28,67 +115,272 @@ class BridgeClient:
     - retries with exponential backoff for transient network/timeout errors
     - deterministic fallback responses with error classification
     - a small contract validation layer for expected responses
+
+    Connections come from one process-wide keep-alive pool. ``*_async`` methods
+    use httpx when it is installed (``async_transport``, default
+    ``BRIDGE_ASYNC_TRANSPORT``), otherwise each attempt runs in a worker thread.
+
+    Each endpoint has a circuit breaker: while it is open, calls return the
+    network fallback immediately (with ``circuit_open: True``) instead of
+    retrying. Per-attempt deadlines follow the endpoint's observed latency
+    (``BRIDGE_TIMEOUT_*``), with ``timeout`` as the upper bound.
+
+    ``history`` and ``get_context`` are coalesced: concurrent identical calls
+    share one upstream request, and successful results are reused for
+    ``UPSTREAM_GET_CACHE_TTL_SECONDS`` (fallbacks are never cached).
     """
 
-    def __init__(self, base_url: str = "http://localhost:5002", timeout: int = 5):
+    def __init__(self, base_url: str = "http://localhost:5002", timeout: int = 5,
+                 async_transport: Optional[str] = None, failure_threshold: Optional[int] = None,
+                 cooldown: Optional[float] = None, adaptive_timeout: Optional[bool] = None):
         self.base_url = base_url.rstrip("/")
         self.timeout = timeout
+        self.failure_threshold = failure_threshold or BRIDGE_BREAKER_FAILURE_THRESHOLD
+        self.cooldown = BRIDGE_BREAKER_COOLDOWN_SECONDS if cooldown is None else cooldown
+        self.adaptive_timeout = BRIDGE_ADAPTIVE_TIMEOUT if adaptive_timeout is None else adaptive_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._latency: Dict[str, LatencyTracker] = {}
+        self._route_lock = threading.Lock()
         self.session = requests.Session()
+        adapter = shared_http_adapter()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.async_transport = _resolve_async_transport(async_transport or BRIDGE_ASYNC_TRANSPORT)
         self.client_version = VERSION
+        # Logical calls per endpoint (retries are not counted); lets callers verify call budgets.
+        # The client is shared across threads, so increments go through _count
+        self.request_counts: Counter = Counter()
+        self._counts_lock = threading.Lock()
+        self.get_flight = SingleFlight(
+            ttl=UPSTREAM_GET_CACHE_TTL_SECONDS, max_entries=UPSTREAM_GET_CACHE_MAX_ENTRIES,
+            cacheable=lambda result: not self.is_fallback(result)
+        )
 
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, retries: int = 3) -> Dict[str, Any]:
         """Make HTTP request with retry logic and deterministic error classification."""
-        url = f"{self.base_url}{endpoint}"
+        self._count(endpoint)
+        breaker = self._breaker(endpoint)
+        for attempt in range(retries):
+            if not breaker.allow():
+                return self._circuit_open(endpoint, breaker)
+            result = self._attempt(method, endpoint, data, last_attempt=attempt == retries - 1)
+            if result is not None:
+                return result
+            if breaker.state == OPEN:
+                # This failure tripped the breaker; do not wait out a backoff just to be rejected
+                return self._circuit_open(endpoint, breaker)
+            time.sleep(self._backoff(attempt))  # Exponential backoff
+
+        return self._handle_error(ErrorType.NETWORK, "Max retries exceeded", endpoint)
 
+    async def _make_request_async(self, method: str, endpoint: str, data: Optional[Dict] = None, retries: int = 3) -> Dict[str, Any]:
+        """Async variant of ``_make_request``.
+
+        Attempts go through the pooled httpx client (or a worker thread without
+        httpx) and backoff uses ``asyncio.sleep``, so a slow or unreachable
+        CreatorCore never blocks the event loop.
+        """
+        self._count(endpoint)
+        breaker = self._breaker(endpoint)
         for attempt in range(retries):
-            try:
-                if method.upper() == 'GET':
-                    response = self.session.get(url, timeout=self.timeout)
-                elif method.upper() == 'POST':
-                    response = self.session.post(url, json=data, timeout=self.timeout)
-                else:
-                    raise ValueError(f"Unsupported method: {method}")
-
-                response.raise_for_status()
-
-                # Expect JSON; if decode fails, classify as unexpected
-                try:
-                    return response.json()
-                except ValueError as e:
-                    return self._handle_error(ErrorType.UNEXPECTED, f"Invalid JSON response: {str(e)}", endpoint)
-
-            except requests.exceptions.ConnectionError as e:
-                error_type = ErrorType.NETWORK
-                if attempt == retries - 1:
-                    return self._handle_error(error_type, str(e), endpoint)
-                time.sleep(0.5 * (attempt + 1))  # Exponential backoff
-
-            except requests.exceptions.Timeout as e:
-                error_type = ErrorType.NETWORK
-                if attempt == retries - 1:
-                    return self._handle_error(error_type, f"Timeout after {self.timeout}s", endpoint)
-                time.sleep(0.5 * (attempt + 1))
-
-            except requests.exceptions.HTTPError as e:
-                # Map client errors to schema issues, not found to logic errors
-                status = getattr(e.response, 'status_code', None)
-                if status == 400:
-                    error_type = ErrorType.SCHEMA
-                elif status in [404, 405]:
-                    error_type = ErrorType.LOGIC
-                else:
-                    error_type = ErrorType.UNEXPECTED
-                return self._handle_error(error_type, str(e), endpoint)
-
-            except Exception as e:
-                # Unexpected errors
-                error_type = ErrorType.UNEXPECTED
-                if attempt == retries - 1:
-                    return self._handle_error(error_type, str(e), endpoint)
-                time.sleep(0.5 * (attempt + 1))
+            if not breaker.allow():
+                return self._circuit_open(endpoint, breaker)
+            last_attempt = attempt == retries - 1
+            if self.async_transport == "httpx":
+                result = await self._attempt_async(method, endpoint, data, last_attempt)
+            else:
+                result = await asyncio.to_thread(self._attempt, method, endpoint, data, last_attempt)
+            if result is not None:
+                return result
+            if breaker.state == OPEN:
+                return self._circuit_open(endpoint, breaker)
+            await asyncio.sleep(self._backoff(attempt))
 
         return self._handle_error(ErrorType.NETWORK, "Max retries exceeded", endpoint)
 
+    def _count(self, endpoint: str):
+        with self._counts_lock:
+            self.request_counts[endpoint] += 1
+
+    def _get(self, endpoint: str) -> Dict[str, Any]:
+        """Coalesced idempotent GET (see ``get_flight``)."""
+        return self.get_flight.do(endpoint, lambda: self._make_request('GET', endpoint))
+
+    async def _get_async(self, endpoint: str) -> Dict[str, Any]:
+        return await self.get_flight.do_async(endpoint, lambda: self._make_request_async('GET', endpoint))
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return 0.5 * (attempt + 1)
+
+    @staticmethod
+    def _route(endpoint: str) -> str:
+        """Breaker/latency key: the path without query string, with the history topic collapsed."""
+        path = endpoint.split("?", 1)[0]
+        return "/history/<topic>" if path.startswith("/history/") else path
+
+    def _breaker(self, endpoint: str) -> CircuitBreaker:
+        route = self._route(endpoint)
+        with self._route_lock:
+            breaker = self._breakers.get(route)
+            if breaker is None:
+                breaker = self._breakers[route] = CircuitBreaker(
+                    self.failure_threshold, self.cooldown, BRIDGE_BREAKER_HALF_OPEN_PROBES
+                )
+            return breaker
+
+    def _latency_for(self, endpoint: str) -> LatencyTracker:
+        route = self._route(endpoint)
+        with self._route_lock:
+            tracker = self._latency.get(route)
+            if tracker is None:
+                tracker = self._latency[route] = LatencyTracker(
+                    self.timeout, BRIDGE_TIMEOUT_MIN_SECONDS, BRIDGE_TIMEOUT_PERCENTILE, BRIDGE_TIMEOUT_MULTIPLIER
+                )
+            return tracker
+
+    def _deadline(self, endpoint: str) -> float:
+        if not self.adaptive_timeout or self._breaker(endpoint).state == HALF_OPEN:
+            # Recovery probes get the full configured timeout, so a slow but healthy upstream can close the breaker
+            return self.timeout
+        return self._latency_for(endpoint).timeout()
+
+    def _succeeded(self, endpoint: str, started: float):
+        self._breaker(endpoint).record_success()
+        self._latency_for(endpoint).observe(time.perf_counter() - started)
+
+    def _failed(self, endpoint: str):
+        self._breaker(endpoint).record_failure()
+
+    def _timed_out(self, endpoint: str, timeout: float):
+        self._latency_for(endpoint).observe_timeout(timeout)
+        self._failed(endpoint)
+
+    def _circuit_open(self, endpoint: str, breaker: CircuitBreaker) -> Dict[str, Any]:
+        result = self._handle_error(
+            ErrorType.NETWORK, f"Circuit open; retry after {breaker.retry_after():.1f}s", endpoint
+        )
+        result["circuit_open"] = True
+        return result
+
+    def circuit_stats(self) -> Dict[str, Any]:
+        """Breaker state and current deadline per endpoint, for diagnostics."""
+        with self._route_lock:
+            routes = sorted(set(self._breakers) | set(self._latency))
+        return {
+            route: {**self._breaker(route).stats(), "timeout": self._deadline(route)}
+            for route in routes
+        }
+
+    def _attempt(self, method: str, endpoint: str, data: Optional[Dict], last_attempt: bool) -> Optional[Dict[str, Any]]:
+        """Perform a single request attempt.
+
+        Returns the decoded response or a classified fallback, or ``None`` when the
+        error is transient and another attempt should be made.
+        """
+        url = f"{self.base_url}{endpoint}"
+        timeout = self._deadline(endpoint)
+        started = time.perf_counter()
+        try:
+            if method.upper() == 'GET':
+                response = self.session.get(url, timeout=timeout)
+            elif method.upper() == 'POST':
+                response = self.session.post(url, json=data, timeout=timeout)
+            else:
+                raise ValueError(f"Unsupported method: {method}")
+
+            response.raise_for_status()
+            self._succeeded(endpoint, started)
+
+            # Expect JSON; if decode fails, classify as unexpected
+            try:
+                return response.json()
+            except ValueError as e:
+                return self._handle_error(ErrorType.UNEXPECTED, f"Invalid JSON response: {str(e)}", endpoint)
+
+        except requests.exceptions.ConnectionError as e:
+            self._failed(endpoint)
+            if last_attempt:
+                return self._handle_error(ErrorType.NETWORK, str(e), endpoint)
+
+        except requests.exceptions.Timeout:
+            self._timed_out(endpoint, timeout)
+            if last_attempt:
+                return self._handle_error(ErrorType.NETWORK, f"Timeout after {timeout}s", endpoint)
+
+        except requests.exceptions.HTTPError as e:
+            return self._http_error(getattr(e.response, 'status_code', None), str(e), endpoint)
+
+        except Exception as e:
+            # Unexpected errors
+            self._failed(endpoint)
+            if last_attempt:
+                return self._handle_error(ErrorType.UNEXPECTED, str(e), endpoint)
+
+        return None
+
+    async def _attempt_async(self, method: str, endpoint: str, data: Optional[Dict], last_attempt: bool) -> Optional[Dict[str, Any]]:
+        """``_attempt`` over the shared httpx client; same return and classification rules."""
+        url = f"{self.base_url}{endpoint}"
+        timeout = self._deadline(endpoint)
+        started = time.perf_counter()
+        try:
+            client = shared_async_client()
+            if method.upper() == 'GET':
+                response = await client.get(url, timeout=timeout)
+            elif method.upper() == 'POST':
+                response = await client.post(url, json=data, timeout=timeout)
+            else:
+                raise ValueError(f"Unsupported method: {method}")
+
+            response.raise_for_status()
+            self._succeeded(endpoint, started)
+
+            try:
+                return response.json()
+            except ValueError as e:
+                return self._handle_error(ErrorType.UNEXPECTED, f"Invalid JSON response: {str(e)}", endpoint)
+
+        except httpx.TimeoutException:
+            self._timed_out(endpoint, timeout)
+            if last_attempt:
+                return self._handle_error(ErrorType.NETWORK, f"Timeout after {timeout}s", endpoint)
+
+        except httpx.TransportError as e:
+            self._failed(endpoint)
+            if last_attempt:
+                return self._handle_error(ErrorType.NETWORK, str(e), endpoint)
+
+        except httpx.HTTPStatusError as e:
+            return self._http_error(e.response.status_code, str(e), endpoint)
+
+        except Exception as e:
+            self._failed(endpoint)
+            if last_attempt:
+                return self._handle_error(ErrorType.UNEXPECTED, str(e), endpoint)
+
+        return None
+
+    def _http_error(self, status: Optional[int], message: str, endpoint: str) -> Dict[str, Any]:
+        # 5xx means CreatorCore is unhealthy; 4xx means it answered and the request was wrong
+        if status is not None and status >= 500:
+            self._failed(endpoint)
+        else:
+            self._breaker(endpoint).record_success()
+        # Map client errors to schema issues, not found to logic errors
+        if status == 400:
+            error_type = ErrorType.SCHEMA
+        elif status in [404, 405]:
+            error_type = ErrorType.LOGIC
+        else:
+            error_type = ErrorType.UNEXPECTED
+        return self._handle_error(error_type, message, endpoint)
+
+    @staticmethod
+    def is_fallback(result: Any) -> bool:
+        """True if ``result`` is a fallback/error payload rather than an upstream response."""
+        return isinstance(result, dict) and bool(result.get("error") or result.get("fallback_used"))
+
     def _handle_error(self, error_type: ErrorType, message: str, endpoint: str) -> Dict[str, Any]:
         """Return a deterministic fallback response with classification."""
         return {
@@ -111,7 +403,7 @@ class BridgeClient:
     def get_context(self, limit: int = 3) -> Dict[str, Any]:
         """Fetch context data from CreatorCore; returns either list or fallback."""
         endpoint = f"/core/context?limit={limit}"
-        return self._make_request('GET', endpoint)
+        return self._get(endpoint)
 
     def generate(self, payload: Dict[str, Any]) -> Dict[str, Any]:
         """Request generation from CreatorCore (POST /generate) and return the generator response."""
@@ -120,13 +412,33 @@ class BridgeClient:
     def history(self, topic: Optional[str] = None) -> Dict[str, Any]:
         """Fetch generation history (GET /history or /history/<topic>)."""
         endpoint = f"/history/{topic}" if topic else "/history"
-        return self._make_request('GET', endpoint)
+        return self._get(endpoint)
 
     def health_check(self) -> Dict[str, Any]:
         
         """Ask CreatorCore for its /system/health; returns JSON status or fallback."""
         return self._make_request('GET', '/system/health')
 
+    # Async contract (mirrors the sync API without blocking the event loop)
+    async def log_async(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._make_request_async('POST', '/core/log', data)
+
+    async def feedback_async(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._make_request_async('POST', '/core/feedback', data)
+
+    async def get_context_async(self, limit: int = 3) -> Dict[str, Any]:
+        return await self._get_async(f"/core/context?limit={limit}")
+
+    async def generate_async(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        return await self._make_request_async('POST', '/generate', payload)
+
+    async def history_async(self, topic: Optional[str] = None) -> Dict[str, Any]:
+        endpoint = f"/history/{topic}" if topic else "/history"
+        return await self._get_async(endpoint)
+
+    async def health_check_async(self) -> Dict[str, Any]:
+        return await self._make_request_async('GET', '/system/health')
+
     def is_healthy(self) -> bool:
         """Boolean check derived from `health_check()` result."""
         try:
@@ -0,0 +1,133 @@
+"""Circuit breaker and latency-derived deadlines for upstream HTTP calls.
+
+``BridgeClient`` keeps one ``CircuitBreaker`` and one ``LatencyTracker`` per
+endpoint. After ``failure_threshold`` consecutive network/5xx failures the
+breaker opens and calls fail fast (no I/O, no backoff) for ``cooldown``
+seconds; then up to ``half_open_probes`` calls are let through, and the first
+result closes the breaker again or re-opens it.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one endpoint. Thread-safe."""
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0, half_open_probes: int = 1,
+                 clock=time.monotonic):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.half_open_probes = max(1, half_open_probes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._rejected = 0
+        self._trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        # Caller holds the lock; an open breaker turns half-open once the cool-down has passed
+        if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """True if a call may go upstream now (reserves a probe slot when half-open)."""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_probes:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probes = 0
+
+    def record_failure(self):
+        with self._lock:
+            state = self._current_state()
+            self._failures += 1
+            if state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if state != OPEN:
+                    self._trips += 1
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probes = 0
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker admits a probe (0 when not open)."""
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self.cooldown - (self._clock() - self._opened_at))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "consecutive_failures": self._failures,
+                "rejected": self._rejected,
+                "trips": self._trips,
+            }
+
+
+class LatencyTracker:
+    """Rolling window of call latencies that yields a per-endpoint deadline.
+
+    The deadline is ``percentile`` latency times ``multiplier``, clamped to
+    ``[min_timeout, max_timeout]``. Until ``min_samples`` calls have been
+    observed it is ``max_timeout`` (the client's configured timeout). A timed
+    out call is recorded as a sample at the deadline it hit, so repeated
+    timeouts widen the deadline back toward ``max_timeout``.
+    """
+
+    def __init__(self, max_timeout: float, min_timeout: float = 0.25, percentile: float = 99.0,
+                 multiplier: float = 3.0, window: int = 200, min_samples: int = 20):
+        self.max_timeout = max_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples: deque = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._cached: Optional[float] = None
+
+    def observe(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+            self._cached = None
+
+    def observe_timeout(self, deadline: float):
+        """Record a call that hit ``deadline`` (its real latency is at least that)."""
+        self.observe(deadline)
+
+    def timeout(self) -> float:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return self.max_timeout
+            if self._cached is None:
+                ordered = sorted(self._samples)
+                index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100.0))
+                deadline = ordered[index] * self.multiplier
+                self._cached = min(self.max_timeout, max(self.min_timeout, deadline))
+            return self._cached
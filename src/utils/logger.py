@@ -1,8 +1,9 @@
-import json
 import logging
 from datetime import datetime
 from typing import Dict, Any
 
+from .serialization import dumps
+
 class JSONFormatter(logging.Formatter):
     """Custom JSON formatter for structured logging"""
     
@@ -24,7 +25,7 @@ class JSONFormatter(logging.Formatter):
         if hasattr(record, 'response_data'):
             log_entry['response_data'] = record.response_data
             
-        return json.dumps(log_entry)
+        return dumps(log_entry)
 
 def setup_logger(name: str) -> logging.Logger:
     """Setup structured JSON logger"""
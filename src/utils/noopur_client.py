@@ -1,6 +1,13 @@
 import requests
-from typing import Optional, Dict, Any
-from config.config import NOOPUR_BASE_URL, NOOPUR_API_KEY
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlencode
+from config.config import (
+    NOOPUR_BASE_URL,
+    NOOPUR_API_KEY,
+    UPSTREAM_GET_CACHE_MAX_ENTRIES,
+    UPSTREAM_GET_CACHE_TTL_SECONDS,
+)
+from .single_flight import SingleFlight
 
 
 class NoopurClient:
@@ -10,6 +17,10 @@ class NoopurClient:
       - generate (POST /generate) returns related_context
       - feedback (POST /feedback)
       - history (GET /history or /history/<topic>)
+      - history_page (GET /history with its X-Next-Cursor header)
+
+    ``history`` and ``history_page`` are coalesced: concurrent calls for the same URL share one
+    request and the result is reused for ``UPSTREAM_GET_CACHE_TTL_SECONDS``.
     """
 
     def __init__(self, base_url: str = NOOPUR_BASE_URL, api_key: Optional[str] = NOOPUR_API_KEY):
@@ -18,6 +29,8 @@ class NoopurClient:
         self.session = requests.Session()
         if self.api_key:
             self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        self.history_flight = SingleFlight(ttl=UPSTREAM_GET_CACHE_TTL_SECONDS,
+                                           max_entries=UPSTREAM_GET_CACHE_MAX_ENTRIES)
 
     def generate(self, payload: Dict[str, Any], timeout: int = 5) -> Dict[str, Any]:
         url = f"{self.base_url}/generate"
@@ -34,11 +47,37 @@ class NoopurClient:
         except ValueError:
             return {"status": "ok"}
 
-    def history(self, topic: Optional[str] = None, timeout: int = 5) -> Dict[str, Any]:
+    def history(self, topic: Optional[str] = None, timeout: int = 5, user_id: Optional[str] = None,
+                limit: Optional[int] = None, since: Optional[str] = None) -> Dict[str, Any]:
+        """Fetch history; ``user_id``/``limit``/``since`` are applied server-side by ``GET /history``."""
         if topic:
             url = f"{self.base_url}/history/{topic}"
         else:
             url = f"{self.base_url}/history"
+        params = {k: v for k, v in (("user_id", user_id), ("limit", limit), ("since", since)) if v is not None}
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        return self.history_flight.do(url, lambda: self._get_json(url, timeout))
+
+    def history_page(self, user_id: Optional[str] = None, limit: Optional[int] = None,
+                     cursor: Optional[str] = None, timeout: int = 5) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """One page of ``GET /history`` and its ``X-Next-Cursor`` (None on the last page).
+
+        ``cursor`` is a previous ``X-Next-Cursor``; the page continues after it server-side.
+        """
+        params = {k: v for k, v in (("user_id", user_id), ("limit", limit), ("cursor", cursor)) if v is not None}
+        url = f"{self.base_url}/history"
+        if params:
+            url = f"{url}?{urlencode(params)}"
+
+        def fetch():
+            resp = self.session.get(url, timeout=timeout)
+            resp.raise_for_status()
+            return resp.json(), resp.headers.get("X-Next-Cursor")
+        # Keyed apart from history(), which caches the body alone for the same URL
+        return self.history_flight.do(("page", url), fetch)
+
+    def _get_json(self, url: str, timeout: int) -> Any:
         resp = self.session.get(url, timeout=timeout)
         resp.raise_for_status()
         return resp.json()
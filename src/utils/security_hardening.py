@@ -54,17 +54,24 @@ class SecurityHardening:
             security_logger.warning(f"Rate limit exceeded for IP: {client_ip}")
             return False
             
-        # User-based rate limiting (30 requests per minute)
-        if user_id:
-            user_times = self.user_requests[user_id]
-            user_times.append(now)
-            recent_user_requests = sum(1 for t in user_times if now - t < 60)
-            
-            if recent_user_requests > 30:
-                security_logger.warning(f"Rate limit exceeded for user: {user_id[:8]}...")
-                return False
+        # User-based rate limiting
+        if user_id and not self.check_user_rate_limit(user_id):
+            return False
                 
         return True
+
+    def check_user_rate_limit(self, user_id: str) -> bool:
+        """Per-user rate limiting (30 requests per minute); counts one request"""
+        now = time.time()
+        user_times = self.user_requests[user_id]
+        user_times.append(now)
+        recent_user_requests = sum(1 for t in user_times if now - t < 60)
+
+        if recent_user_requests > 30:
+            security_logger.warning(f"Rate limit exceeded for user: {user_id[:8]}...")
+            return False
+
+        return True
         
     def detect_enumeration(self, request: Request, user_id: str) -> bool:
         """Detect user enumeration patterns"""
@@ -0,0 +1,154 @@
+"""Pluggable JSON serialization for storage and structured logging.
+
+``ContextMemory``, ``JSONFormatter`` and SSPL canonicalization go through this
+module. ``JSON_BACKEND`` selects the encoder: ``orjson`` or ``msgspec`` when
+installed, ``json`` for the standard library, or ``auto`` (the default) for
+the fastest one available. The standard library writes NaN and Infinity as
+bare tokens, which orjson and msgspec reject, so their decoders fall back to
+``json.loads`` on a decode error; data written under one backend therefore
+reads back under any other.
+
+``canonical_bytes`` deliberately always uses the standard library: SSPL
+signatures are computed by clients over ``json.dumps(sort_keys=True,
+separators=(",", ":"))`` and must match byte for byte.
+"""
+import json
+import logging
+from collections.abc import Mapping
+from typing import Any, Union
+
+from config.config import JSON_BACKEND
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+logger = logging.getLogger(__name__)
+
+
+class RawJSON:
+    """Already-encoded JSON text, decoded only if something needs the value (see ``src/db/rows.py``)."""
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: Union[str, bytes]):
+        self.text = text
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, RawJSON):
+        return loads(obj.text)
+    if isinstance(obj, Mapping):
+        return dict(obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    if isinstance(obj, str):
+        return str.__str__(obj)
+    if isinstance(obj, int):
+        return int.__int__(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, default=_default).encode("utf-8")
+
+
+class _Backend:
+    """Encoder/decoder pair; falls back to the standard library for input the fast backend rejects."""
+
+    def __init__(self, name: str, dumps, loads, errors=None, decode_errors=None):
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+        self._errors = None if errors is None else (TypeError, ValueError, OverflowError) + tuple(errors)
+        self._decode_errors = None if decode_errors is None else (ValueError,) + tuple(decode_errors)
+
+    def dumps(self, obj: Any) -> bytes:
+        if self._errors is None:
+            return self._dumps(obj)
+        try:
+            return self._dumps(obj)
+        except self._errors:
+            # e.g. integers beyond 64 bits; the standard library handles (or rejects) them as before
+            return _stdlib_dumps(obj)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        if self._decode_errors is None:
+            return self._loads(data)
+        try:
+            return self._loads(data)
+        except self._decode_errors:
+            # e.g. NaN/Infinity written by the standard library; invalid JSON still raises here
+            return json.loads(data)
+
+
+def _orjson_backend() -> _Backend:
+    # Subclasses of dict/list/str/int (lazy interaction rows, OrderedDict, str enums)
+    # go through _default so they serialize by value, not by their raw storage
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_SUBCLASS
+    return _Backend(
+        "orjson",
+        lambda obj: orjson.dumps(obj, default=_default, option=option),
+        orjson.loads,
+        (orjson.JSONEncodeError,),
+        (orjson.JSONDecodeError,),
+    )
+
+
+def _msgspec_backend() -> _Backend:
+    encoder = msgspec.json.Encoder(enc_hook=_default)
+    decoder = msgspec.json.Decoder()
+    return _Backend("msgspec", encoder.encode, decoder.decode, (msgspec.EncodeError,), (msgspec.DecodeError,))
+
+
+def _stdlib_backend() -> _Backend:
+    return _Backend("json", _stdlib_dumps, json.loads)
+
+
+def select_backend(name: str = "auto") -> _Backend:
+    """Build the backend named ``name`` ("auto", "orjson", "msgspec" or "json")."""
+    name = (name or "auto").lower()
+    if name in ("auto", "orjson") and orjson is not None:
+        return _orjson_backend()
+    if name in ("auto", "msgspec") and msgspec is not None:
+        return _msgspec_backend()
+    if name not in ("auto", "json"):
+        logger.warning("JSON backend %r is not installed; using the standard library", name)
+    return _stdlib_backend()
+
+
+_backend = select_backend(JSON_BACKEND)
+
+
+def use_backend(name: str) -> str:
+    """Switch the process-wide backend (mainly for tests and benchmarks); returns the active name."""
+    global _backend
+    _backend = select_backend(name)
+    return _backend.name
+
+
+def backend_name() -> str:
+    return _backend.name
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    return _backend.dumps(obj)
+
+
+def dumps(obj: Any) -> str:
+    return _backend.dumps(obj).decode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return _backend.loads(data)
+
+
+def canonical_bytes(obj: Any) -> bytes:
+    """Deterministic encoding used for SSPL signatures (always the standard library)."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":")).encode("utf-8")
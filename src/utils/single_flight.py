@@ -0,0 +1,152 @@
+"""Request coalescing for idempotent upstream GETs.
+
+``SingleFlight`` runs at most one call per key at a time: concurrent callers
+with the same key wait for the in-flight call and share its result. Results
+accepted by ``cacheable`` are also kept for ``ttl`` seconds, so a burst of
+requests costs the upstream one fetch. Errors are shared with the callers that
+were waiting but never cached.
+
+Callers receive a shallow copy of cached lists/dicts; treat the items as read-only.
+"""
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+_MISS = object()
+
+
+def _share(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class _Call:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls (sync or async) and caches successful results briefly."""
+
+    def __init__(self, ttl: float = 2.0, max_entries: int = 256,
+                 cacheable: Callable[[Any], bool] = lambda value: True, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._cacheable = cacheable
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._async_inflight: Dict[Hashable, tuple] = {}
+        self._stats = {"calls": 0, "cache_hits": 0, "coalesced": 0}
+
+    def _cached(self, key: Hashable) -> Any:
+        # Caller holds the lock
+        entry = self._cache.get(key)
+        if entry is None:
+            return _MISS
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._cache[key]
+            return _MISS
+        self._stats["cache_hits"] += 1
+        return value
+
+    def _finish(self, key: Hashable, value: Any, failed: bool):
+        # Caller holds the lock
+        self._stats["calls"] += 1
+        if failed or self.ttl <= 0 or not self._cacheable(value):
+            return
+        self._cache[key] = (self._clock() + self.ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            value = self._cached(key)
+            if value is not _MISS:
+                return _share(value)
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return _share(call.value)
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._finish(key, call.value, call.error is not None)
+            call.done.set()
+        return _share(call.value)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            value = self._cached(key)
+            if value is not _MISS:
+                return _share(value)
+            entry = self._async_inflight.get(key)
+            leader = entry is None or entry[0] is not loop
+            if leader:
+                future = loop.create_future()
+                self._async_inflight[key] = (loop, future)
+            else:
+                future = entry[1]
+                self._stats["coalesced"] += 1
+
+        if not leader:
+            # shield: a cancelled follower must not cancel the shared call
+            return _share(await asyncio.shield(future))
+
+        failed = True
+        try:
+            value = await fn()
+            failed = False
+            future.set_result(value)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # mark retrieved so an unawaited error is not logged
+            raise
+        finally:
+            with self._lock:
+                if self._async_inflight.get(key, (None, None))[1] is future:
+                    del self._async_inflight[key]
+                self._finish(key, None if failed else value, failed)
+        return _share(value)
+
+    def invalidate(self, key: Hashable = _MISS):
+        """Drop one cached key, or everything when called without a key."""
+        with self._lock:
+            if key is _MISS:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "cached_keys": len(self._cache), "ttl_seconds": self.ttl}
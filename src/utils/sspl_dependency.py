@@ -1,6 +1,7 @@
 from fastapi import Request, HTTPException
 from typing import Optional
 from . import sspl as sspl_module
+from .serialization import canonical_bytes
 from ..db.nonce_store import NonceStore
 from config.config import SSPL_ALLOW_DRIFT_SECONDS
 import logging
@@ -57,8 +58,7 @@ async def require_sspl(request: Request):
 
     # Build canonical message: prefer raw body bytes if available
     if body is not None:
-        import json
-        msg_bytes = json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+        msg_bytes = canonical_bytes(body)
     else:
         # fallback to path + query
         msg_bytes = (request.url.path + "?" + str(request.query_params)).encode("utf-8")
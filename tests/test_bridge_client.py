@@ -1,5 +1,8 @@
+import asyncio
 from unittest.mock import Mock
+import pytest
 import requests
+from src.utils import bridge_client
 from src.utils.bridge_client import BridgeClient
 
 
@@ -53,3 +56,77 @@ class TestBridgeClient:
         client = BridgeClient("http://test-server")
         monkeypatch.setattr(client, "health_check", Mock(side_effect=Exception("boom")))
         assert client.is_healthy() is False
+
+    def test_clients_share_one_connection_pool(self):
+        first = BridgeClient("http://test-server")
+        second = BridgeClient("http://other-server")
+        adapter = bridge_client.shared_http_adapter()
+        assert first.session.get_adapter("http://test-server/x") is adapter
+        assert second.session.get_adapter("https://other-server/x") is adapter
+        assert adapter._pool_maxsize == bridge_client.CONNECTION_POOL_SIZE
+
+    def test_async_transport_falls_back_to_threads_without_httpx(self, monkeypatch):
+        monkeypatch.setattr(bridge_client, "httpx", None)
+        assert BridgeClient("http://test-server", async_transport="httpx").async_transport == "thread"
+
+
+class TestBridgeClientHttpx:
+    @pytest.fixture
+    def transport(self, monkeypatch):
+        httpx = pytest.importorskip("httpx")
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                raise httpx.ConnectError("refused", request=request)
+            return httpx.Response(200, json={"generation_id": "g1"})
+
+        monkeypatch.setattr(bridge_client, "_new_async_client",
+                            lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+        monkeypatch.setattr(BridgeClient, "_backoff", staticmethod(lambda attempt: 0))
+        return calls
+
+    def test_async_calls_use_shared_httpx_client(self, transport):
+        client = BridgeClient("http://test-server", async_transport="httpx")
+
+        async def run():
+            try:
+                return await client.generate_async({"prompt": "p"})
+            finally:
+                await bridge_client.close_shared_async_client()
+
+        result = asyncio.run(run())
+        assert result == {"generation_id": "g1"}
+        assert len(transport) == 2
+        assert client.request_counts["/generate"] == 1
+
+
+def test_auto_transport_without_httpx_warns_once(monkeypatch, caplog):
+    monkeypatch.setattr(bridge_client, "httpx", None)
+    monkeypatch.setattr(bridge_client, "_warned_no_httpx", False)
+
+    with caplog.at_level("WARNING", logger=bridge_client.__name__):
+        first = BridgeClient("http://test-server", async_transport="auto")
+        second = BridgeClient("http://test-server", async_transport="auto")
+
+    assert first.async_transport == second.async_transport == "thread"
+    assert sum("httpx not installed" in r.getMessage() for r in caplog.records) == 1
+
+
+def test_request_counts_survive_concurrent_callers(monkeypatch):
+    import threading
+
+    client = BridgeClient("http://test-server")
+    monkeypatch.setattr(client.session, "post", Mock(return_value=make_response(200, {"status": "ok"})))
+
+    def call_many():
+        for _ in range(50):
+            client.log({"msg": "hello"})
+    threads = [threading.Thread(target=call_many) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert client.request_counts["/core/log"] == 400
@@ -0,0 +1,141 @@
+from unittest.mock import Mock
+
+import requests
+
+from src.utils.bridge_client import BridgeClient
+from src.utils.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, LatencyTracker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_after_threshold_and_probes_after_cooldown():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=3, cooldown=10, half_open_probes=1, clock=clock)
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe in flight
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.stats()["trips"] == 1
+
+
+def test_failed_probe_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=5, clock=clock)
+    breaker.record_failure()
+    clock.now = 5
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.retry_after() == 5
+
+
+def test_latency_tracker_derives_deadline_from_percentile():
+    tracker = LatencyTracker(max_timeout=5, min_timeout=0.1, percentile=99, multiplier=2, min_samples=10)
+    assert tracker.timeout() == 5
+    for _ in range(100):
+        tracker.observe(0.2)
+    assert tracker.timeout() == 0.4
+    for _ in range(5):
+        tracker.observe(10)
+    assert tracker.timeout() == 5  # clamped to the configured timeout
+
+
+def test_outage_fails_fast_once_circuit_opens(monkeypatch):
+    client = BridgeClient("http://test-server", failure_threshold=3, cooldown=60)
+    get = Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+    monkeypatch.setattr(client.session, "get", get)
+    sleep = Mock()
+    monkeypatch.setattr("src.utils.bridge_client.time.sleep", sleep)
+
+    first = client.history()
+    assert first["fallback_used"] is True
+    assert get.call_count == 3 and sleep.call_count == 2
+
+    second = client.history()
+    assert second["circuit_open"] is True
+    assert get.call_count == 3 and sleep.call_count == 2
+    assert client.circuit_stats()["/history"]["state"] == OPEN
+
+
+def test_client_errors_do_not_trip_breaker(monkeypatch):
+    client = BridgeClient("http://test-server", failure_threshold=1)
+    response = Mock(status_code=404)
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    monkeypatch.setattr(client.session, "post", Mock(return_value=response))
+
+    assert client.generate({})["error_type"] == "logic"
+    assert client.circuit_stats()["/generate"]["state"] == CLOSED
+
+
+def test_adaptive_deadline_is_passed_to_requests(monkeypatch):
+    client = BridgeClient("http://test-server", timeout=5)
+    ok = Mock(status_code=200)
+    ok.json.return_value = {"status": "ok"}
+    post = Mock(return_value=ok)
+    monkeypatch.setattr(client.session, "post", post)
+    tracker = client._latency_for("/core/log")
+    for _ in range(tracker.min_samples):
+        tracker.observe(0.01)
+
+    client.log({"m": 1})
+    assert post.call_args.kwargs["timeout"] == tracker.timeout() < 5
+
+
+def test_breaker_trip_mid_call_skips_remaining_backoff(monkeypatch):
+    client = BridgeClient("http://test-server", failure_threshold=2, cooldown=60)
+    monkeypatch.setattr(client.session, "post", Mock(side_effect=requests.exceptions.Timeout("slow")))
+    sleep = Mock()
+    monkeypatch.setattr("src.utils.bridge_client.time.sleep", sleep)
+
+    result = client.generate({})
+    assert result["circuit_open"] is True
+    assert client.session.post.call_count == 2
+    assert sleep.call_count == 1
+
+
+def test_timeouts_widen_the_deadline(monkeypatch):
+    client = BridgeClient("http://test-server", timeout=5, failure_threshold=3, cooldown=60)
+    ok = Mock(status_code=200)
+    ok.json.return_value = {"status": "ok"}
+
+    def slow_upstream(url, json=None, timeout=None):
+        # Upstream now takes 0.4s, well under the configured timeout
+        if timeout < 0.4:
+            raise requests.exceptions.Timeout("slow")
+        return ok
+
+    monkeypatch.setattr(client.session, "post", Mock(side_effect=slow_upstream))
+    monkeypatch.setattr("src.utils.bridge_client.time.sleep", Mock())
+    tracker = client._latency_for("/core/log")
+    for _ in range(200):
+        tracker.observe(0.01)
+    assert tracker.timeout() == 0.25
+
+    results = [client.log({"i": i}) for i in range(50)]
+    assert sum(r == {"status": "ok"} for r in results) >= 45
+    assert tracker.timeout() >= 0.4
+
+
+def test_half_open_probe_gets_full_timeout(monkeypatch):
+    client = BridgeClient("http://test-server", timeout=5, failure_threshold=1, cooldown=0)
+    tracker = client._latency_for("/core/log")
+    for _ in range(tracker.min_samples):
+        tracker.observe(0.01)
+    client._failed("/core/log")
+
+    assert client._breaker("/core/log").state == HALF_OPEN
+    assert client._deadline("/core/log") == 5
@@ -0,0 +1,117 @@
+import asyncio
+import time
+from unittest.mock import Mock
+
+from src.db.context_cache import CachedMemoryAdapter, ContextCache
+from src.db.memory_adapter import SQLiteAdapter
+
+
+def make_adapter(tmp_path, **kwargs):
+    inner = SQLiteAdapter(str(tmp_path / "context.db"))
+    return CachedMemoryAdapter(inner, **kwargs)
+
+
+def test_repeat_reads_hit_cache(tmp_path):
+    adapter = make_adapter(tmp_path)
+    adapter.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    adapter.inner.get_context = Mock(wraps=adapter.inner.get_context)
+
+    first = adapter.get_context("user1")
+    second = adapter.get_context("user1")
+
+    assert first == second
+    assert adapter.inner.get_context.call_count == 1
+    stats = adapter.cache_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_store_is_write_through(tmp_path):
+    adapter = make_adapter(tmp_path)
+    adapter.get_context("user1")
+    for i in range(7):
+        adapter.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+
+    cached = adapter.get_context("user1")
+    assert adapter.cache_stats()["hits"] == 1
+    assert cached == adapter.inner.get_context("user1")
+    assert [c["request"]["i"] for c in cached] == [6, 5, 4]
+
+
+def test_store_interactions_keeps_cache_exact(tmp_path):
+    adapter = make_adapter(tmp_path)
+    adapter.get_context("user1")
+    adapter.get_context("user2")
+
+    stored = adapter.store_interactions([
+        ("user1", {"module": "finance", "i": 0}, {"status": "success"}),
+        ("user1", {"module": "finance", "i": 1}, {"status": "success"}),
+        ("user2", {"module": "finance", "i": 2}, {"status": "success"}),
+    ])
+
+    assert [s["request"]["i"] for s in stored] == [0, 1, 2]
+    assert adapter.get_context("user1") == adapter.inner.get_context("user1")
+    assert [c["request"]["i"] for c in adapter.get_context("user1")] == [1, 0]
+    assert [c["request"]["i"] for c in adapter.get_context("user2")] == [2]
+
+
+def test_write_through_respects_module_retention(tmp_path):
+    adapter = make_adapter(tmp_path)
+    adapter.get_context("user1", limit=10)
+    for i in range(7):
+        adapter.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+    adapter.store_interaction("user1", {"module": "creator"}, {"status": "success"})
+
+    # Only the newest 5 finance rows remain visible; the cache must agree with storage
+    assert adapter.get_context("user1", limit=6) == adapter.inner.get_context("user1", limit=6)
+
+
+def test_larger_limit_than_cached_misses(tmp_path):
+    adapter = make_adapter(tmp_path)
+    for i in range(5):
+        adapter.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+    adapter.get_context("user1", limit=2)
+    assert len(adapter.get_context("user1", limit=5)) == 5
+    assert adapter.cache_stats()["misses"] == 2
+
+
+def test_ttl_and_size_eviction():
+    cache = ContextCache(max_users=2, ttl_seconds=0.05)
+    for user in ("a", "b", "c"):
+        cache.put(user, [], 3, cache.token(user))
+    assert cache.get("a", 3) is None
+    assert cache.get("c", 3) == []
+    assert cache.stats()["evictions"] == 1
+
+    time.sleep(0.06)
+    assert cache.get("c", 3) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_fetch_racing_a_write_is_not_cached():
+    cache = ContextCache()
+    token = cache.token("user1")
+    cache.begin_write("user1")
+    cache.put("user1", [{"module": "finance", "timestamp": "old"}], 3, token)
+    assert cache.get("user1", 3) is None
+
+
+def test_adapter_without_stored_record_invalidates():
+    inner = Mock()
+    inner.store_interaction.return_value = None
+    inner.get_context.return_value = [{"module": "creator"}]
+    adapter = CachedMemoryAdapter(inner)
+
+    adapter.get_context("user1")
+    adapter.store_interaction("user1", {"module": "creator"}, {})
+    adapter.get_context("user1")
+    assert inner.get_context.call_count == 2
+
+
+def test_async_hit_skips_inner(tmp_path):
+    adapter = make_adapter(tmp_path)
+    asyncio.run(adapter.store_interaction_async("user1", {"module": "finance"}, {"status": "success"}))
+    asyncio.run(adapter.get_context_async("user1"))
+    adapter.inner.get_context_async = Mock(side_effect=AssertionError("should be cached"))
+
+    assert len(asyncio.run(adapter.get_context_async("user1"))) == 1
@@ -1,4 +1,4 @@
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 from creator_routing import CreatorRouter
 
 
@@ -23,3 +23,56 @@ def test_forward_feedback_forwards_to_bridge(monkeypatch):
     resp = router.forward_feedback({"generation_id": 123, "command": "+1"})
     assert resp["status"] == "received"
     router.bridge.feedback.assert_called_once()
+
+
+def _gateway_with_shared_bridge(tmp_path, bridge):
+    from src.core.gateway import Gateway
+    from src.agents.creator import CreatorAgent
+    from src.db.memory_adapter import SQLiteAdapter
+
+    with patch('src.core.gateway.Gateway.__init__', return_value=None):
+        gateway = Gateway()
+    gateway.logger = Mock()
+    gateway.memory = SQLiteAdapter(str(tmp_path / "context.db"))
+    gateway.agents = {"creator": CreatorAgent(bridge=bridge)}
+    gateway.creator_router = CreatorRouter(gateway.memory, bridge=bridge)
+    return gateway
+
+
+def _mock_bridge(monkeypatch):
+    from src.utils.bridge_client import BridgeClient
+
+    bridge = BridgeClient("http://test-server", async_transport="thread")  # mocks the requests session
+    generate_resp = Mock()
+    generate_resp.json.return_value = {"generated_text": "Hello", "generation_id": 7, "related_context": []}
+    history_resp = Mock()
+    history_resp.json.return_value = []
+    monkeypatch.setattr(bridge.session, "post", Mock(return_value=generate_resp))
+    monkeypatch.setattr(bridge.session, "get", Mock(return_value=history_resp))
+    return bridge
+
+
+def test_creator_generate_calls_upstream_once(monkeypatch, tmp_path):
+    bridge = _mock_bridge(monkeypatch)
+    gateway = _gateway_with_shared_bridge(tmp_path, bridge)
+
+    result = gateway.process_request("creator", "generate", "user1", {"topic": "t1", "goal": "g1"})
+
+    assert result["status"] == "success"
+    assert result["result"]["generation_id"] == 7
+    assert bridge.request_counts["/generate"] == 1
+    # The prewarm payload is consumed by the agent and not persisted with the request
+    stored = gateway.memory.get_context("user1")[0]["request"]["data"]
+    assert "prewarm_generation" not in stored
+
+
+def test_creator_generate_async_calls_upstream_once(monkeypatch, tmp_path):
+    import asyncio
+
+    bridge = _mock_bridge(monkeypatch)
+    gateway = _gateway_with_shared_bridge(tmp_path, bridge)
+
+    result = asyncio.run(gateway.process_request_async("creator", "generate", "user1", {"topic": "t1", "goal": "g1"}))
+
+    assert result["result"]["generated_text"] == "Hello"
+    assert bridge.request_counts["/generate"] == 1
@@ -0,0 +1,182 @@
+import asyncio
+import time
+from unittest.mock import Mock, patch
+
+import requests
+
+from src.agents.base import BaseAgent
+from src.core.gateway import Gateway
+from src.db.memory_adapter import SQLiteAdapter
+from src.utils.bridge_client import BridgeClient
+
+
+class SlowAgent(BaseAgent):
+    def handle_request(self, intent, data, context=None):
+        time.sleep(0.2)
+        return {"status": "success", "message": "slow", "result": {"intent": intent}}
+
+
+def make_gateway(tmp_path):
+    with patch('src.core.gateway.Gateway.__init__', return_value=None):
+        gateway = Gateway()
+    gateway.agents = {"finance": SlowAgent()}
+    gateway.memory = SQLiteAdapter(str(tmp_path / "context.db"))
+    gateway.logger = Mock()
+    return gateway
+
+
+def test_process_request_async_stores_and_reads_context(tmp_path):
+    gateway = make_gateway(tmp_path)
+
+    result = asyncio.run(gateway.process_request_async("finance", "analyze", "user1", {"x": 1}))
+
+    assert result["status"] == "success"
+    assert result["result"] == {"intent": "analyze"}
+    context = gateway.memory.get_context("user1")
+    assert len(context) == 1
+    assert context[0]["request"]["intent"] == "analyze"
+
+
+def test_process_request_async_does_not_block_event_loop(tmp_path):
+    gateway = make_gateway(tmp_path)
+
+    async def run_concurrently():
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            gateway.process_request_async("finance", "analyze", f"user{i}", {})
+            for i in range(4)
+        ])
+        return time.perf_counter() - start
+
+    elapsed = asyncio.run(run_concurrently())
+    # Four 0.2s agents run in parallel threads rather than serially on the loop
+    assert elapsed < 0.6
+
+
+def test_process_request_async_unknown_module(tmp_path):
+    gateway = make_gateway(tmp_path)
+    result = asyncio.run(gateway.process_request_async("nonexistent", "generate", "user1", {}))
+    assert result["status"] == "error"
+
+
+class FailingAgent(BaseAgent):
+    def handle_request(self, intent, data, context=None):
+        raise RuntimeError("boom")
+
+
+def test_process_batch_async_partial_failure_in_order(tmp_path):
+    gateway = make_gateway(tmp_path)
+    gateway.agents["broken"] = FailingAgent()
+    requests_ = [
+        {"module": "finance", "intent": "analyze", "user_id": "user1", "data": {}},
+        {"module": "nonexistent", "intent": "generate", "user_id": "user1", "data": {}},
+        {"module": "broken", "intent": "analyze", "user_id": "user2", "data": {}},
+        {"module": "finance", "intent": "review", "user_id": "user2", "data": {}},
+    ]
+
+    results = asyncio.run(gateway.process_batch_async(requests_))
+
+    assert [r["status"] for r in results] == ["success", "error", "error", "success"]
+    assert results[0]["result"] == {"intent": "analyze"}
+    assert results[3]["result"] == {"intent": "review"}
+    assert "boom" in results[2]["message"]
+    assert len(gateway.memory.get_context("user1")) == 2
+    assert len(gateway.memory.get_context("user2")) == 2
+
+
+def test_process_batch_async_shares_context_and_store(tmp_path):
+    gateway = make_gateway(tmp_path)
+    gateway.memory.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    gateway.memory.get_context = Mock(wraps=gateway.memory.get_context)
+    gateway.memory.store_interaction = Mock(wraps=gateway.memory.store_interaction)
+    gateway.memory.store_interactions = Mock(wraps=gateway.memory.store_interactions)
+
+    async def run_batch():
+        start = time.perf_counter()
+        results = await gateway.process_batch_async([
+            {"module": "finance", "intent": "analyze", "user_id": f"user{i % 2}", "data": {}}
+            for i in range(4)
+        ])
+        return results, time.perf_counter() - start
+
+    results, elapsed = asyncio.run(run_batch())
+
+    assert all(r["status"] == "success" for r in results)
+    # One context read per distinct user, agents in parallel, one store for the whole batch
+    assert gateway.memory.get_context.call_count == 2
+    assert elapsed < 0.6
+    gateway.memory.store_interactions.assert_called_once()
+    gateway.memory.store_interaction.assert_not_called()
+    assert len(gateway.memory.store_interactions.call_args.args[0]) == 4
+
+
+def test_process_batch_async_context_failure_is_per_user(tmp_path):
+    gateway = make_gateway(tmp_path)
+    get_context = gateway.memory.get_context
+    gateway.memory.get_context = Mock(
+        side_effect=lambda user_id, *args: get_context(user_id, *args) if user_id == "ok" else 1 / 0
+    )
+
+    results = asyncio.run(gateway.process_batch_async([
+        {"module": "finance", "intent": "analyze", "user_id": "bad", "data": {}},
+        {"module": "finance", "intent": "analyze", "user_id": "ok", "data": {}},
+    ]))
+
+    assert results[0] == {"status": "error", "message": "Context retrieval failed", "result": {}}
+    assert results[1]["status"] == "success"
+    assert len(get_context("ok")) == 1
+    assert get_context("bad") == []
+
+
+def test_bridge_client_async_fallback_uses_async_backoff(monkeypatch):
+    client = BridgeClient("http://test-server", async_transport="thread")
+    monkeypatch.setattr(client.session, "get", Mock(side_effect=requests.exceptions.ConnectionError("refused")))
+    blocking_sleep = Mock()
+    monkeypatch.setattr("src.utils.bridge_client.time.sleep", blocking_sleep)
+    monkeypatch.setattr(BridgeClient, "_backoff", staticmethod(lambda attempt: 0))
+
+    result = asyncio.run(client.history_async())
+
+    assert result["fallback_used"] is True
+    assert result["error_type"] == "network"
+    assert client.session.get.call_count == 3
+    blocking_sleep.assert_not_called()
+
+
+def test_core_batch_charges_every_item_to_the_rate_limit(tmp_path):
+    import main
+    from src.core.models import CoreBatchRequest
+    from src.utils import security_hardening
+
+    fresh = security_hardening.SecurityHardening()
+    batch = CoreBatchRequest(requests=[
+        {"module": "finance", "intent": "analyze", "user_id": "user1", "data": {"i": i}} for i in range(40)
+    ])
+    with patch.object(security_hardening, "security", fresh), patch.object(main, "security", fresh), \
+            patch.object(main.gateway, "memory", SQLiteAdapter(str(tmp_path / "context.db"))):
+        response = asyncio.run(main.core_batch_endpoint(batch, Mock(client=Mock(host="10.0.0.1"))))
+
+    messages = [r.message for r in response.results]
+    assert all(m != "Rate limit exceeded" for m in messages[:30])
+    assert messages[30:] == ["Rate limit exceeded"] * 10
+
+
+def test_core_batch_uses_the_validated_user_id(tmp_path):
+    import main
+    from src.core.models import CoreBatchRequest
+
+    batch = CoreBatchRequest(requests=[
+        {"module": "finance", "intent": "analyze", "user_id": "User1", "data": {"i": i}} for i in range(3)
+    ])
+    adapter = SQLiteAdapter(str(tmp_path / "context.db"))
+    rate_limit = Mock(return_value=True)
+    with patch.object(main, "validate_user_request", Mock(side_effect=lambda user_id, request: user_id.lower())) as validate, \
+            patch.object(main.security, "check_user_rate_limit", rate_limit), \
+            patch.object(main.gateway, "memory", adapter):
+        response = asyncio.run(main.core_batch_endpoint(batch, Mock()))
+
+    assert [r.status for r in response.results] == ["success"] * 3
+    validate.assert_called_once()
+    assert [call.args[0] for call in rate_limit.call_args_list] == ["user1", "user1"]
+    assert len(adapter.get_user_history("user1")) == 3
+    assert adapter.get_user_history("User1") == []
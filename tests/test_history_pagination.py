@@ -0,0 +1,149 @@
+import asyncio
+from unittest.mock import Mock, patch
+
+import pytest
+from fastapi import HTTPException, Response
+
+from src.db.memory import ContextMemory
+from src.db.retention import RetentionPolicy
+
+
+@pytest.fixture
+def memory(tmp_path):
+    mem = ContextMemory(str(tmp_path / "context.db"), retention_policy=RetentionPolicy(max_count=50))
+    for i in range(12):
+        module = "finance" if i % 2 else "creator"
+        mem.store_interaction("user1", {"module": module, "i": i}, {"status": "success", "message": str(i)})
+    yield mem
+    mem.close()
+
+
+def test_pages_walk_full_history_in_order(memory):
+    seen = []
+    cursor = None
+    pages = 0
+    while True:
+        page = memory.get_history_page("user1", limit=5, cursor=cursor)
+        seen.extend(item["request"]["i"] for item in page["items"])
+        pages += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == list(range(11, -1, -1))
+    assert pages == 3
+
+
+def test_module_filter(memory):
+    items = memory.get_user_history("user1", limit=3, modules=["finance"])
+    assert [item["request"]["i"] for item in items] == [11, 9, 7]
+
+
+def test_history_query_uses_keyset_index(memory):
+    plan = memory._pool.connection().execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM interactions WHERE user_id = ? ORDER BY timestamp DESC, id DESC LIMIT 5",
+        ("user1",)
+    ).fetchall()
+    assert any("idx_user_timestamp_id" in row[-1] for row in plan)
+
+
+def test_unpaginated_history_is_unchanged(memory):
+    assert len(memory.get_user_history("user1")) == 12
+
+
+def test_invalid_cursor_raises(memory):
+    with pytest.raises(ValueError):
+        memory.get_history_page("user1", cursor="not-a-cursor")
+
+
+def test_later_pages_respect_retention(tmp_path):
+    mem = ContextMemory(str(tmp_path / "context.db"), sweep_every=1000)
+    for i in range(8):
+        mem.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+    first = mem.get_history_page("user1", limit=3)
+    second = mem.get_history_page("user1", limit=3, cursor=first["next_cursor"])
+    assert [i["request"]["i"] for i in first["items"] + second["items"]] == [7, 6, 5, 4, 3]
+    assert second["next_cursor"] is None
+    mem.close()
+
+
+def test_endpoint_exposes_next_cursor_header(memory):
+    import main
+    from src.db.memory_adapter import SQLiteAdapter
+
+    adapter = SQLiteAdapter(memory.db_path, retention_policy=RetentionPolicy(max_count=50))
+    response = Response()
+    with patch.object(main.gateway, "memory", adapter), \
+            patch.object(main, "validate_user_request", side_effect=lambda user_id, request: user_id):
+        body = asyncio.run(main.get_history("user1", Mock(), response, limit=5, cursor=None, module=None))
+        assert len(body) == 5
+        assert set(body[0]) == {"module", "timestamp", "response"}
+        next_cursor = response.headers["X-Next-Cursor"]
+
+        body = asyncio.run(main.get_history("user1", Mock(), Response(), limit=5, cursor=next_cursor, module=None))
+        assert body[0]["response"]["message"] == "6"
+
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(main.get_history("user1", Mock(), Response(), limit=5, cursor="bogus", module=None))
+        assert exc.value.status_code == 400
+    adapter.close()
+
+
+def test_endpoint_reads_gateway_adapter_with_retention(tmp_path):
+    import main
+    from src.db.memory_adapter import SQLiteAdapter
+
+    adapter = SQLiteAdapter(str(tmp_path / "context.db"), sweep_every=1000)
+    with patch.object(main.gateway, "memory", adapter), \
+            patch.object(main, "validate_user_request", side_effect=lambda user_id, request: user_id):
+        for i in range(8):
+            asyncio.run(main.gateway.process_request_async("finance", "analyze", "user1", {"i": i}))
+        body = asyncio.run(main.get_history("user1", Mock(), Response(), limit=10, cursor=None, module=None))
+        context = asyncio.run(main.get_context("user1", Mock()))
+    # Unswept surplus rows are hidden because reads share the writer's retention engine
+    assert len(body) == 5
+    assert len(context) == 3
+
+
+def test_endpoints_read_queued_write_behind_rows(tmp_path):
+    import main
+    from src.db.context_cache import CachedMemoryAdapter
+    from src.db.memory_adapter import SQLiteAdapter
+
+    adapter = CachedMemoryAdapter(SQLiteAdapter(str(tmp_path / "context.db"), write_behind=True, flush_interval=10))
+    with patch.object(main.gateway, "memory", adapter), \
+            patch.object(main, "validate_user_request", side_effect=lambda user_id, request: user_id):
+        asyncio.run(main.gateway.process_request_async("finance", "analyze", "user1", {}))
+        # The flush interval is long: the row is still queued when the endpoints read
+        body = asyncio.run(main.get_history("user1", Mock(), Response(), limit=10, cursor=None, module=None))
+        context = asyncio.run(main.get_context("user1", Mock()))
+    adapter.close()
+    assert len(body) == 1
+    assert len(context) == 1
+
+
+def test_endpoints_read_off_the_event_loop(memory):
+    import threading
+    import main
+    from src.db.memory_adapter import SQLiteAdapter
+
+    adapter = SQLiteAdapter(memory.db_path, retention_policy=RetentionPolicy(max_count=50))
+    reader_threads = []
+    for name in ("get_history_page", "get_context"):
+        original = getattr(adapter, name)
+
+        def recording(*args, _original=original, **kwargs):
+            reader_threads.append(threading.current_thread())
+            return _original(*args, **kwargs)
+        setattr(adapter, name, recording)
+
+    with patch.object(main.gateway, "memory", adapter), \
+            patch.object(main, "validate_user_request", side_effect=lambda user_id, request: user_id):
+        assert len(asyncio.run(main.get_history("user1", Mock(), Response(), limit=5, cursor=None, module=None))) == 5
+        assert len(asyncio.run(main.get_context("user1", Mock()))) == 3
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(main.get_history("user1", Mock(), Response(), limit=5, cursor="bogus", module=None))
+        assert exc.value.status_code == 400
+    adapter.close()
+    # asyncio.run drives the loop on this thread; the blocking reads must run elsewhere
+    assert len(reader_threads) == 3
+    assert threading.current_thread() not in reader_threads
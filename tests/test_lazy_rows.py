@@ -0,0 +1,79 @@
+import copy
+import json
+import pytest
+
+from src.db.context_cache import CachedMemoryAdapter
+from src.db.memory import ContextMemory
+from src.db.memory_adapter import SQLiteAdapter
+from src.db.rows import InteractionRow
+
+
+def test_row_decodes_payloads_on_first_access():
+    loads = []
+    row = InteractionRow({"module": "m"}, {"request": '{"a": 1}', "response": '{"b": 2}'},
+                         loads=lambda text: loads.append(text) or json.loads(text))
+    assert row["response"] == {"b": 2}
+    assert row.get("response") == {"b": 2}
+    assert not row.is_decoded("request")
+    assert loads == ['{"b": 2}']
+
+
+def test_row_behaves_like_a_plain_dict():
+    row = InteractionRow({"module": "m", "timestamp": "t"}, {"request": '{"a": 1}', "response": '{"b": 2}'})
+    expected = {"module": "m", "timestamp": "t", "request": {"a": 1}, "response": {"b": 2}}
+    assert row == expected
+    assert dict(row) == expected and {**row} == expected
+    assert json.loads(json.dumps(row)) == expected
+    assert copy.deepcopy(row) == expected
+    assert row.project(["module", "response"]) == {"module": "m", "response": {"b": 2}}
+
+
+@pytest.fixture
+def memory(tmp_path):
+    mem = ContextMemory(str(tmp_path / "context.db"))
+    mem.store_interaction("user1", {"module": "finance", "q": 1}, {"status": "success", "result": {"x": 1}})
+    yield mem
+    mem.close()
+
+
+def test_projection_skips_request_column(memory):
+    statements = []
+    memory._pool.connection().set_trace_callback(statements.append)
+    items = memory.get_context("user1", fields=("module", "timestamp", "response"))
+    memory._pool.connection().set_trace_callback(None)
+
+    assert items == [{"module": "finance", "timestamp": items[0]["timestamp"],
+                      "response": {"status": "success", "result": {"x": 1}}}]
+    assert not any("request_data" in stmt for stmt in statements)
+
+
+def test_reads_decode_lazily(memory):
+    item = memory.get_user_history("user1")[0]
+    assert not item.is_decoded("request") and not item.is_decoded("response")
+    assert item["request"] == {"module": "finance", "q": 1}
+    assert item.is_decoded("request") and not item.is_decoded("response")
+
+
+def test_unknown_field_rejected(memory):
+    with pytest.raises(ValueError):
+        memory.get_context("user1", fields=["password"])
+
+
+def test_cached_adapter_projects_cached_rows(tmp_path):
+    adapter = CachedMemoryAdapter(SQLiteAdapter(str(tmp_path / "context.db")))
+    adapter.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    assert adapter.get_context("user1")[0]["request"] == {"module": "finance"}
+    projected = adapter.get_context("user1", fields=["response"])
+    assert projected == [{"response": {"status": "success"}}]
+    assert adapter.cache_stats()["hits"] == 1
+
+
+def test_async_history_reads_apply_projection(tmp_path):
+    import asyncio
+
+    adapter = SQLiteAdapter(str(tmp_path / "context.db"))
+    adapter.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    page = asyncio.run(adapter.get_history_page_async("user1", fields=["module", "response"]))
+    history = asyncio.run(adapter.get_user_history_async("user1", fields=["response"]))
+    assert [set(item) for item in page["items"]] == [{"module", "response"}]
+    assert history == [{"response": {"status": "success"}}]
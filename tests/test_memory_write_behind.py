@@ -0,0 +1,131 @@
+import threading
+import time
+
+from src.db.memory import ContextMemory
+from src.db.memory_adapter import SQLiteAdapter
+
+
+def test_write_behind_reads_see_own_writes(tmp_path):
+    memory = ContextMemory(str(tmp_path / "context.db"), write_behind=True, flush_interval=10)
+    memory.store_interaction("user1", {"module": "finance", "i": 1}, {"status": "success"})
+
+    # Flush interval is long, so the read itself must flush the user's pending write
+    started = time.monotonic()
+    context = memory.get_context("user1")
+    assert time.monotonic() - started < 1
+    assert len(context) == 1
+    assert context[0]["request"]["i"] == 1
+    memory.close()
+
+
+def test_write_behind_batches_into_few_transactions(tmp_path):
+    memory = ContextMemory(str(tmp_path / "context.db"), write_behind=True, batch_size=50, flush_interval=0.5)
+    batches = []
+    original = memory._write_batch
+
+    def recording_write(records):
+        batches.append(len(records))
+        original(records)
+
+    memory._write_batch = recording_write
+    for i in range(40):
+        memory.store_interaction(f"user{i % 8}", {"module": "finance", "i": i}, {"status": "success"})
+    memory.flush()
+
+    assert sum(batches) == 40
+    assert len(batches) < 40
+    # Retention still applies per (user, module)
+    assert len(memory.get_user_history("user0")) == 5
+    memory.close()
+
+
+def test_store_interactions_single_transaction(tmp_path):
+    memory = ContextMemory(str(tmp_path / "context.db"))
+    batches = []
+    original = memory._write_batch
+
+    def recording_write(records):
+        batches.append(len(records))
+        original(records)
+
+    memory._write_batch = recording_write
+    stored = memory.store_interactions(
+        [(f"user{i % 2}", {"module": "finance", "i": i}, {"status": "success"}) for i in range(6)]
+    )
+
+    assert batches == [6]
+    assert [s["request"]["i"] for s in stored] == list(range(6))
+    assert [c["request"]["i"] for c in memory.get_context("user0")] == [4, 2, 0]
+    memory.close()
+
+def test_write_behind_concurrent_producers(tmp_path):
+    adapter = SQLiteAdapter(str(tmp_path / "context.db"), write_behind=True, batch_size=16, queue_size=8)
+
+    def produce(n):
+        for i in range(10):
+            adapter.store_interaction(f"user{n}", {"module": f"m{i}"}, {"status": "success"})
+
+    threads = [threading.Thread(target=produce, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    adapter.flush()
+
+    for n in range(4):
+        assert len(adapter.get_user_history(f"user{n}")) == 10
+
+
+def test_close_drains_queue(tmp_path):
+    db_path = str(tmp_path / "context.db")
+    memory = ContextMemory(db_path, write_behind=True, flush_interval=10)
+    memory.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    memory.close()
+
+    assert len(ContextMemory(db_path).get_context("user1")) == 1
+
+
+def test_write_behind_retries_a_failed_batch(tmp_path):
+    import sqlite3
+
+    memory = ContextMemory(str(tmp_path / "context.db"), write_behind=True, flush_interval=10)
+    attempts = []
+    original = memory._write_batch
+
+    def flaky_write(records):
+        attempts.append(len(records))
+        if len(attempts) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        original(records)
+
+    memory._write_batch = flaky_write
+    for i in range(3):
+        memory.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+
+    # The reader's flush waits for the retry, so no interaction goes missing
+    assert [c["request"]["i"] for c in memory.get_context("user1")] == [2, 1, 0]
+    assert attempts == [3, 3]
+    memory.close()
+
+
+def test_write_behind_drops_only_rows_that_fail_alone(tmp_path, monkeypatch):
+    from src.db import memory as memory_module
+
+    monkeypatch.setattr(memory_module, "_WRITE_RETRY_DELAY", 0)
+    memory = ContextMemory(str(tmp_path / "context.db"), write_behind=True, flush_interval=10)
+    original = memory._write_batch
+
+    def reject_bad_row(records):
+        if any(record[0] == "bad" for record in records):
+            raise ValueError("unwritable row")
+        original(records)
+
+    memory._write_batch = reject_bad_row
+    memory.store_interactions([
+        ("user1", {"module": "finance", "i": 0}, {"status": "success"}),
+        ("bad", {"module": "finance"}, {"status": "success"}),
+        ("user1", {"module": "finance", "i": 1}, {"status": "success"}),
+    ])
+
+    assert [c["request"]["i"] for c in memory.get_context("user1")] == [1, 0]
+    memory.close()
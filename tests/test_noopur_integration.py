@@ -84,6 +84,19 @@ class TestNoopurClient:
         mock_get.assert_called_once_with("http://test-server/history/test", timeout=5)
         assert result["history"][0]["topic"] == "test"
 
+    @patch('requests.Session.get')
+    def test_history_server_side_filters(self, mock_get):
+        """user_id/limit/since are sent as query parameters."""
+        mock_response = Mock()
+        mock_response.json.return_value = []
+        mock_get.return_value = mock_response
+
+        self.client.history(user_id="user 1", limit=3, since="2024-01-01T00:00:00")
+
+        mock_get.assert_called_once_with(
+            "http://test-server/history?user_id=user+1&limit=3&since=2024-01-01T00%3A00%3A00", timeout=5
+        )
+
     @patch('requests.Session.post')
     def test_request_timeout(self, mock_post):
         """Test timeout handling."""
@@ -200,5 +213,57 @@ class TestNoopurIntegration:
         assert "history" in history_result
 
 
+class TestRemoteNoopurAdapterHistory:
+    """RemoteNoopurAdapter asks Noopur for just the user's newest generations."""
+
+    def make_adapter(self, items):
+        from src.db.memory_adapter import RemoteNoopurAdapter
+        adapter = RemoteNoopurAdapter.__new__(RemoteNoopurAdapter)
+        adapter.client = Mock()
+        adapter.client.history.return_value = items
+        return adapter
+
+    def test_get_context_uses_user_and_limit(self):
+        adapter = self.make_adapter([
+            {"id": 2, "text": "b", "score": 1.0, "created_at": "2024-01-02T00:00:00"},
+            {"id": 1, "text": "a", "score": 0.0, "created_at": "2024-01-01T00:00:00"},
+        ])
+
+        context = adapter.get_context("user1", limit=2)
+
+        adapter.client.history.assert_called_once_with(user_id="user1", limit=2)
+        assert [c["response"]["id"] for c in context] == [2, 1]
+
+    def test_history_pages_are_positioned_server_side(self):
+        import base64
+
+        adapter = self.make_adapter([])
+        server_cursor = base64.urlsafe_b64encode(b"2024-01-02 00:00:00.000000|2").decode()
+        adapter.client.history_page.return_value = (
+            [{"id": i, "text": str(i), "created_at": f"2024-01-0{i}T00:00:00"} for i in (3, 2)], server_cursor
+        )
+
+        page = adapter.get_history_page("user1", limit=2)
+
+        adapter.client.history_page.assert_called_once_with(user_id="user1", limit=2, cursor=None)
+        assert [i["response"]["id"] for i in page["items"]] == [3, 2]
+
+        adapter.client.history_page.reset_mock()
+        adapter.client.history_page.return_value = (
+            [{"id": 1, "text": "1", "created_at": "2024-01-01T00:00:00"}], None
+        )
+        page = adapter.get_history_page("user1", limit=2, cursor=page["next_cursor"])
+
+        # The next page asks CreatorCore to continue after its own cursor instead of refetching everything
+        adapter.client.history_page.assert_called_once_with(user_id="user1", limit=2, cursor=server_cursor)
+        assert [i["response"]["id"] for i in page["items"]] == [1]
+        assert page["next_cursor"] is None
+
+    def test_invalid_history_cursor_raises(self):
+        adapter = self.make_adapter([])
+        with pytest.raises(ValueError):
+            adapter.get_history_page("user1", cursor="not-a-cursor")
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
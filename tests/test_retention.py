@@ -0,0 +1,121 @@
+from datetime import datetime, timedelta
+from unittest.mock import Mock, patch
+
+from src.db.memory import ContextMemory
+from src.db.retention import RetentionEngine, RetentionPolicy
+
+
+def _row_count(memory, user_id):
+    conn = memory._pool.connection()
+    return conn.execute("SELECT COUNT(*) FROM interactions WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+def test_inserts_do_not_prune_until_sweep(tmp_path):
+    memory = ContextMemory(str(tmp_path / "context.db"), sweep_every=20)
+    for i in range(12):
+        memory.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+
+    # Surplus rows are still on disk but hidden from reads
+    assert _row_count(memory, "user1") == 12
+    context = memory.get_context("user1", limit=10)
+    assert [c["request"]["i"] for c in context] == [11, 10, 9, 8, 7]
+    assert len(memory.get_user_history("user1")) == 5
+
+    pruned = memory.sweep_retention()
+    assert pruned == 7
+    assert _row_count(memory, "user1") == 5
+    stats = memory.retention_stats()
+    assert stats["sweeps"] == 1
+    assert stats["rows_pruned_total"] == 7
+    assert stats["last_sweep"]["rows_pruned"] == 7
+    memory.close()
+
+
+def test_sweep_triggers_after_sweep_every_writes(tmp_path):
+    memory = ContextMemory(str(tmp_path / "context.db"), sweep_every=10)
+    for i in range(10):
+        memory.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+    assert memory.retention_stats()["sweeps"] == 1
+    assert _row_count(memory, "user1") == 5
+    memory.close()
+
+
+def test_per_module_count_override(tmp_path):
+    policy = RetentionPolicy(max_count=2, module_overrides={"creator": {"max_count": 4}})
+    memory = ContextMemory(str(tmp_path / "context.db"), retention_policy=policy)
+    for i in range(6):
+        memory.store_interaction("user1", {"module": "creator"}, {"status": "success"})
+        memory.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+
+    modules = [item["module"] for item in memory.get_user_history("user1")]
+    assert modules.count("creator") == 4
+    assert modules.count("finance") == 2
+    memory.sweep_retention()
+    assert _row_count(memory, "user1") == 6
+    memory.close()
+
+
+def test_age_limit_hides_and_prunes_expired_rows(tmp_path):
+    policy = RetentionPolicy(max_count=10, module_overrides={"finance": {"max_age_seconds": 60}})
+    memory = ContextMemory(str(tmp_path / "context.db"), retention_policy=policy)
+    memory.store_interaction("user1", {"module": "finance", "old": True}, {"status": "success"})
+    memory.store_interaction("user1", {"module": "creator", "old": True}, {"status": "success"})
+    stale = (datetime.now() - timedelta(hours=1)).isoformat()
+    with memory._pool.connection() as conn:
+        conn.execute("UPDATE interactions SET timestamp = ?", (stale,))
+    memory.store_interaction("user1", {"module": "finance", "old": False}, {"status": "success"})
+
+    history = memory.get_user_history("user1")
+    assert sorted((h["module"], h["request"]["old"]) for h in history) == [("creator", True), ("finance", False)]
+    assert memory.sweep_retention() == 1
+    assert _row_count(memory, "user1") == 2
+    memory.close()
+
+
+def test_startup_prunes_existing_surplus(tmp_path):
+    db_path = str(tmp_path / "context.db")
+    memory = ContextMemory(db_path, sweep_every=1000)
+    for i in range(9):
+        memory.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    memory.close()
+
+    reopened = ContextMemory(db_path)
+    assert _row_count(reopened, "user1") == 5
+    reopened.close()
+
+
+def test_engine_failed_sweep_keeps_pairs_dirty():
+    prune = Mock(side_effect=[RuntimeError("db down"), 3])
+    engine = RetentionEngine(RetentionPolicy(), prune, sweep_every=1000)
+    engine.record_write("user1", "finance")
+
+    assert engine.sweep() == 0
+    assert engine.unswept("user1") == 1
+    assert engine.sweep() == 3
+    assert prune.call_args_list[1].args[0] == {("user1", "finance")}
+    assert engine.unswept("user1") == 0
+
+
+def test_mongodb_store_does_not_prune_per_insert():
+    from src.db.mongodb_adapter import MongoDBAdapter
+
+    mock_client = Mock()
+    mock_db = Mock()
+    mock_collection = Mock()
+    mock_client.__getitem__ = Mock(return_value=mock_db)
+    mock_db.interactions = mock_collection
+    mock_collection.find.return_value.sort.return_value.skip.return_value = [{"_id": 1}, {"_id": 2}]
+    mock_collection.delete_many.return_value.deleted_count = 2
+
+    with patch('src.db.mongodb_adapter.MongoClient', return_value=mock_client):
+        adapter = MongoDBAdapter("mongodb://localhost:27017", "test_db", sweep_every=1000)
+
+    for _ in range(7):
+        adapter.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    assert mock_collection.insert_one.call_count == 7
+    mock_collection.aggregate.assert_not_called()
+    mock_collection.delete_many.assert_not_called()
+
+    assert adapter.sweep_retention() == 2
+    mock_collection.delete_many.assert_called_once_with({"_id": {"$in": [1, 2]}})
+    assert adapter.retention_stats()["rows_pruned_total"] == 2
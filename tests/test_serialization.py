@@ -0,0 +1,72 @@
+import json
+import logging
+from collections import OrderedDict
+
+import pytest
+
+from src.db.memory import ContextMemory
+from src.utils import serialization
+from src.utils.logger import JSONFormatter
+from src.utils.serialization import RawJSON, canonical_bytes
+
+
+@pytest.fixture(params=["json", "orjson"])
+def backend(request):
+    if request.param == "orjson" and serialization.orjson is None:
+        pytest.skip("orjson not installed")
+    previous = serialization.backend_name()
+    serialization.use_backend(request.param)
+    yield request.param
+    serialization.use_backend(previous)
+
+
+def test_round_trip_is_standard_json(backend):
+    value = {"text": "héllo", "n": [1, 2.5, None, True], "nested": OrderedDict(a=1), 7: "int key"}
+    encoded = serialization.dumps(value)
+    assert json.loads(encoded) == {"text": "héllo", "n": [1, 2.5, None, True], "nested": {"a": 1}, "7": "int key"}
+    assert serialization.loads(encoded.encode("utf-8"))["nested"] == {"a": 1}
+
+
+def test_raw_json_and_oversized_ints(backend):
+    assert json.loads(serialization.dumps({"raw": RawJSON('{"x": 1}'), "big": 2 ** 70})) == {"raw": {"x": 1}, "big": 2 ** 70}
+
+
+def test_reads_stdlib_output_with_non_finite_floats(backend):
+    written = json.dumps({"nan": float("nan"), "inf": float("inf")})
+    decoded = serialization.loads(written)
+    assert decoded["inf"] == float("inf") and decoded["nan"] != decoded["nan"]
+    with pytest.raises(ValueError):
+        serialization.loads('{"truncated": ')
+
+
+def test_unknown_backend_falls_back_to_stdlib():
+    assert serialization.select_backend("not-a-backend").name == "json"
+
+
+def test_canonical_bytes_match_client_signing_format(backend):
+    body = {"b": "ü", "a": [1, {"d": 2, "c": 3}]}
+    assert canonical_bytes(body) == json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def test_generation_payload_reuses_encoded_payloads(tmp_path, backend):
+    mem = ContextMemory(str(tmp_path / "context.db"))
+    try:
+        mem.store_interaction("u1", {"module": "creator", "data": {"prompt": "p"}},
+                              {"status": "success", "result": {"generation_id": "g1"}})
+        generation = mem.get_generation("g1")
+        assert generation["payload"] == {
+            "request": {"module": "creator", "data": {"prompt": "p"}},
+            "response": {"status": "success", "result": {"generation_id": "g1"}},
+        }
+        assert generation["interaction"]["response"]["result"]["generation_id"] == "g1"
+    finally:
+        mem.close()
+
+
+def test_json_formatter_serializes_extras(backend):
+    record = logging.LogRecord("t", logging.INFO, __file__, 1, "hello", None, None)
+    record.user_id = "u1"
+    record.response_data = {"status": "success", "rows": OrderedDict(x=1)}
+    entry = json.loads(JSONFormatter().format(record))
+    assert entry["message"] == "hello"
+    assert entry["response_data"] == {"status": "success", "rows": {"x": 1}}
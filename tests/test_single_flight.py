@@ -0,0 +1,133 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock
+
+import pytest
+import requests
+
+from src.utils.bridge_client import BridgeClient
+from src.utils.noopur_client import NoopurClient
+from src.utils.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_fetch():
+    flight = SingleFlight(ttl=0)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return [{"id": 1}]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda _: flight.do("history", fetch), range(8)))
+
+    assert len(calls) == 1
+    assert all(r == [{"id": 1}] for r in results)
+    assert flight.stats()["coalesced"] == 7
+
+
+def test_async_burst_shares_one_fetch():
+    flight = SingleFlight(ttl=0)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"ok": True}
+
+    async def burst():
+        return await asyncio.gather(*(flight.do_async("k", fetch) for _ in range(20)))
+
+    assert asyncio.run(burst()) == [{"ok": True}] * 20
+    assert len(calls) == 1
+
+
+def test_results_cached_for_ttl_and_errors_not_cached():
+    now = [0.0]
+    flight = SingleFlight(ttl=2, clock=lambda: now[0])
+    fetch = Mock(return_value=[1, 2])
+    assert flight.do("k", fetch) == [1, 2]
+    assert flight.do("k", fetch) == [1, 2]
+    assert fetch.call_count == 1
+    now[0] = 2
+    flight.do("k", fetch)
+    assert fetch.call_count == 2
+
+    failing = Mock(side_effect=RuntimeError("down"))
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            flight.do("err", failing)
+    assert failing.call_count == 2
+
+
+def test_callers_get_independent_containers():
+    flight = SingleFlight(ttl=10)
+    first = flight.do("k", lambda: [1, 2, 3])
+    first.append(4)
+    assert flight.do("k", lambda: []) == [1, 2, 3]
+
+
+def test_bridge_history_burst_hits_upstream_once(monkeypatch):
+    client = BridgeClient("http://test-server")
+    gate = threading.Event()
+    response = Mock(status_code=200)
+    response.json.return_value = [{"id": 1}]
+
+    def slow_get(url, timeout=None):
+        gate.wait(1)
+        return response
+
+    get = Mock(side_effect=slow_get)
+    monkeypatch.setattr(client.session, "get", get)
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        futures = [pool.submit(client.history) for _ in range(10)]
+        time.sleep(0.05)
+        gate.set()
+        results = [f.result() for f in futures]
+
+    assert get.call_count == 1
+    assert client.request_counts["/history"] == 1
+    assert all(r == [{"id": 1}] for r in results)
+
+
+def test_bridge_fallbacks_are_not_cached(monkeypatch):
+    client = BridgeClient("http://test-server", failure_threshold=100)
+    monkeypatch.setattr(BridgeClient, "_backoff", staticmethod(lambda attempt: 0))
+    get = Mock(side_effect=requests.exceptions.ConnectionError("refused"))
+    monkeypatch.setattr(client.session, "get", get)
+
+    assert client.history()["fallback_used"] is True
+    assert client.history()["fallback_used"] is True
+    assert get.call_count == 6
+
+
+def test_noopur_history_is_coalesced(monkeypatch):
+    client = NoopurClient("http://noopur", api_key="")
+    response = Mock()
+    response.json.return_value = [{"id": 1, "text": "t"}]
+    get = Mock(return_value=response)
+    monkeypatch.setattr(client.session, "get", get)
+
+    assert client.history() == client.history() == [{"id": 1, "text": "t"}]
+    assert get.call_count == 1
+    client.history("topic")
+    assert get.call_count == 2
+
+
+def test_noopur_history_page_returns_next_cursor(monkeypatch):
+    client = NoopurClient("http://noopur", api_key="")
+    response = Mock()
+    response.json.return_value = [{"id": 2, "text": "t"}]
+    response.headers = {"X-Next-Cursor": "abc"}
+    get = Mock(return_value=response)
+    monkeypatch.setattr(client.session, "get", get)
+
+    assert client.history_page(user_id="u1", limit=1, cursor="xyz") == ([{"id": 2, "text": "t"}], "abc")
+    assert get.call_args[0][0] == "http://noopur/history?user_id=u1&limit=1&cursor=xyz"
+    # Coalesced and cached like history()
+    assert client.history_page(user_id="u1", limit=1, cursor="xyz")[1] == "abc"
+    assert get.call_count == 1
@@ -0,0 +1,104 @@
+import threading
+from unittest.mock import patch
+
+from src.db.memory import ContextMemory
+from src.db.migrations import SCHEMA_VERSION
+from src.db.sqlite_pool import SQLitePool
+
+
+def test_pool_reuses_connection_per_thread(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"))
+    assert pool.connection() is pool.connection()
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.connection()))
+    t.start()
+    t.join()
+    assert other[0] is not pool.connection()
+    pool.close_all()
+
+
+def test_pool_applies_pragmas_once(tmp_path):
+    pool = SQLitePool(str(tmp_path / "pool.db"), timeout=12)
+    conn = pool.connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 12000
+    pool.close_all()
+
+
+def test_context_memory_does_not_reconnect_per_call(tmp_path):
+    memory = ContextMemory(str(tmp_path / "context.db"))
+    with patch("src.db.sqlite_pool.sqlite3.connect") as mock_connect:
+        for i in range(5):
+            memory.store_interaction("user1", {"module": "finance", "i": i}, {"status": "success"})
+            memory.get_context("user1")
+            memory.get_user_history("user1")
+    mock_connect.assert_not_called()
+    assert len(memory.get_context("user1", limit=10)) == 5
+    memory.close()
+
+
+def test_in_memory_pool_shares_one_connection():
+    pool = SQLitePool(":memory:")
+    assert pool.shared is True
+
+    other = []
+    t = threading.Thread(target=lambda: other.append(pool.connection()))
+    t.start()
+    t.join()
+    assert other[0] is pool.connection()
+    pool.close_all()
+
+
+def test_in_memory_context_visible_across_threads():
+    memory = ContextMemory(":memory:")
+    t = threading.Thread(
+        target=memory.store_interaction,
+        args=("user1", {"module": "finance"}, {"status": "success"})
+    )
+    t.start()
+    t.join()
+    assert len(memory.get_context("user1")) == 1
+
+
+def test_schema_migrations_run_once(tmp_path):
+    db_path = str(tmp_path / "context.db")
+    memory = ContextMemory(db_path)
+    assert memory.schema_version == SCHEMA_VERSION
+    memory.close()
+
+    # Re-opening an up-to-date database records no new versions
+    memory = ContextMemory(db_path)
+    conn = memory._pool.connection()
+    versions = [row[0] for row in conn.execute("SELECT version FROM schema_version")]
+    assert versions == list(range(1, SCHEMA_VERSION + 1))
+
+    # Hot paths issue DML only
+    statements = []
+    conn.set_trace_callback(statements.append)
+    memory.store_interaction("user1", {"module": "finance"}, {"status": "success"})
+    memory.get_context("user1")
+    assert not any("CREATE" in stmt.upper() for stmt in statements)
+    memory.close()
+
+
+def test_migrates_legacy_database_without_module_column(tmp_path):
+    import sqlite3
+
+    db_path = str(tmp_path / "legacy.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("""
+            CREATE TABLE interactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                request_data TEXT NOT NULL,
+                response_data TEXT NOT NULL
+            )
+        """)
+    conn.close()
+
+    memory = ContextMemory(db_path)
+    memory.store_interaction("user1", {"module": "creator"}, {"status": "success"})
+    assert memory.get_context("user1")[0]["module"] == "creator"
+    memory.close()